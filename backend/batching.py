@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Collects single-item jobs into batches and runs them on one worker thread.
+
+    A batch is flushed as soon as it holds ``max_batch_size`` items or the oldest
+    queued item has waited ``max_wait_ms``, so added latency is bounded by the wait
+    window. ``run_batch`` receives a list of items and must return one result per item.
+    ``concurrency`` worker threads may run batches at once, for backends that can
+    execute several batches in parallel (e.g. an out-of-process inference pool).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run_batch,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        concurrency: int = 1,
+    ):
+        self.name = name
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._run_batch = run_batch
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._batch_sizes = Counter()
+        self._items = 0
+        self.concurrency = max(1, int(concurrency))
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"batcher-{name}-{index}", daemon=True)
+            for index in range(self.concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, item) -> Future:
+        future = Future()
+        with self._cond:
+            self._queue.append((item, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queue_depth": len(self._queue),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "concurrency": self.concurrency,
+                "batches": sum(self._batch_sizes.values()),
+                "items": self._items,
+                "batch_size_histogram": {
+                    str(size): count for size, count in sorted(self._batch_sizes.items())
+                },
+            }
+
+    def _next_batch(self):
+        with self._cond:
+            while True:
+                while not self._queue:
+                    self._cond.wait()
+                while self._queue and len(self._queue) < self.max_batch_size:
+                    remaining = self._queue[0][2] + self.max_wait - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                # With several workers another one may have taken the batch meanwhile.
+                if self._queue:
+                    break
+            size = min(len(self._queue), self.max_batch_size)
+            batch = [self._queue.popleft() for _ in range(size)]
+            self._batch_sizes[size] += 1
+            self._items += size
+            return batch
+
+    def _worker(self):
+        while True:
+            batch = self._next_batch()
+            # Skip jobs whose caller already gave up.
+            batch = [job for job in batch if job[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = self._run_batch([item for item, _, _ in batch])
+            except Exception as exc:
+                for _, future, _ in batch:
+                    future.set_exception(exc)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+def box_areas(boxes: np.ndarray) -> np.ndarray:
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    return np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+
+
+def intersection_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise intersection areas between xyxy boxes, shape (len(a), len(b))."""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    return np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    inter = intersection_matrix(a, b)
+    union = box_areas(a)[:, None] + box_areas(b)[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def overlap_join(damage_boxes: np.ndarray, part_boxes: np.ndarray, min_iou: float = 0.0):
+    """Match every damage box to the parts it touches.
+
+    Returns ``(damage_index, part_index, iou, coverage)`` tuples where coverage is the
+    share of the damage box lying on the part, which is the more telling number when
+    a small dent sits on a large panel.
+    """
+    inter = intersection_matrix(damage_boxes, part_boxes)
+    if inter.size == 0:
+        return []
+    iou = iou_matrix(damage_boxes, part_boxes)
+    damage_areas = box_areas(damage_boxes)[:, None]
+    coverage = np.divide(inter, damage_areas, out=np.zeros_like(inter), where=damage_areas > 0)
+    damage_idx, part_idx = np.nonzero((inter > 0) & (iou >= min_iou))
+    return [
+        (int(d), int(p), float(iou[d, p]), float(coverage[d, p]))
+        for d, p in zip(damage_idx, part_idx)
+    ]
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float, metric: str = "iou") -> np.ndarray:
+    """Greedy non-maximum suppression; returns kept indices by descending score.
+
+    ``metric="ios"`` measures overlap as intersection over the smaller box, which
+    also suppresses fragments of an object cut by a tile border.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    order = np.argsort(-np.asarray(scores), kind="stable")
+    areas = box_areas(boxes)
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        if not rest.size:
+            break
+        inter = intersection_matrix(boxes[best : best + 1], boxes[rest])[0]
+        if metric == "ios":
+            denom = np.minimum(areas[best], areas[rest])
+        else:
+            denom = areas[best] + areas[rest] - inter
+        overlap = np.divide(inter, denom, out=np.zeros_like(inter), where=denom > 0)
+        order = rest[overlap <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def batched_nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    classes: np.ndarray,
+    iou_threshold: float,
+    metric: str = "iou",
+):
+    """Class-aware NMS: boxes of different classes never suppress each other."""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    if not boxes.size:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.asarray(classes, dtype=np.float32)[:, None] * (boxes.max() + 1.0)
+    return nms(boxes + offsets, scores, iou_threshold, metric)
@@ -0,0 +1,122 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token plus message overhead)."""
+    return len(text) // 4 + 4
+
+
+class ChatStore:
+    """SQLite store of damage reports by id and the chat sessions held about them.
+
+    A session keeps every turn, plus a running summary of the turns that no longer
+    fit the prompt's history budget (``summarized`` counts them).
+    """
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS reports ("
+            "id TEXT PRIMARY KEY, image_name TEXT NOT NULL, report TEXT NOT NULL, updated REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, report_id TEXT NOT NULL, summary TEXT NOT NULL DEFAULT '',"
+            "summarized INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL, updated REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS turns ("
+            "session_id TEXT NOT NULL, idx INTEGER NOT NULL, role TEXT NOT NULL,"
+            "content TEXT NOT NULL, tokens INTEGER NOT NULL, PRIMARY KEY (session_id, idx));"
+        )
+        self._db.commit()
+
+    def put_report(self, report_id: str, image_name: str, report: dict):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO reports (id, image_name, report, updated) VALUES (?, ?, ?, ?)",
+                (report_id, image_name, json.dumps(report, separators=(",", ":")), time.time()),
+            )
+            self._db.commit()
+
+    def get_report(self, report_id: str):
+        """``(image_name, report)`` or ``None``."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT image_name, report FROM reports WHERE id = ?", (report_id,)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def create_session(self, report_id: str) -> str:
+        session_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO sessions (id, report_id, created, updated) VALUES (?, ?, ?, ?)",
+                (session_id, report_id, now, now),
+            )
+            self._db.commit()
+        return session_id
+
+    def get_session(self, session_id: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT report_id, summary, summarized FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        report_id, summary, summarized = row
+        return {"session_id": session_id, "report_id": report_id, "summary": summary, "summarized": summarized}
+
+    def turns(self, session_id: str, start: int = 0):
+        """Turns from index ``start`` on, as ``{"role", "content", "tokens"}`` dicts."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT role, content, tokens FROM turns WHERE session_id = ? AND idx >= ? ORDER BY idx",
+                (session_id, start),
+            ).fetchall()
+        return [{"role": role, "content": content, "tokens": tokens} for role, content, tokens in rows]
+
+    def append_turns(self, session_id: str, turns: list[tuple[str, str]]):
+        with self._lock:
+            count = self._db.execute(
+                "SELECT COUNT(*) FROM turns WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            self._db.executemany(
+                "INSERT INTO turns (session_id, idx, role, content, tokens) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (session_id, count + offset, role, content, estimate_tokens(content))
+                    for offset, (role, content) in enumerate(turns)
+                ],
+            )
+            self._db.execute("UPDATE sessions SET updated = ? WHERE id = ?", (time.time(), session_id))
+            self._db.commit()
+
+    def set_summary(self, session_id: str, summary: str, summarized: int):
+        with self._lock:
+            self._db.execute(
+                "UPDATE sessions SET summary = ?, summarized = ?, updated = ? WHERE id = ?",
+                (summary, summarized, time.time(), session_id),
+            )
+            self._db.commit()
+
+    def prune(self, max_age_s: float) -> int:
+        """Drop sessions idle for more than ``max_age_s`` seconds and reports no session uses
+        that were stored before then."""
+        cutoff = time.time() - max_age_s
+        with self._lock:
+            session_ids = [
+                row[0]
+                for row in self._db.execute("SELECT id FROM sessions WHERE updated < ?", (cutoff,)).fetchall()
+            ]
+            self._db.executemany("DELETE FROM turns WHERE session_id = ?", [(s,) for s in session_ids])
+            self._db.executemany("DELETE FROM sessions WHERE id = ?", [(s,) for s in session_ids])
+            self._db.execute(
+                "DELETE FROM reports WHERE updated < ? AND id NOT IN (SELECT report_id FROM sessions)",
+                (cutoff,),
+            )
+            self._db.commit()
+        return len(session_ids)
@@ -0,0 +1,47 @@
+import math
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+# EXIF orientations that rotate by 90/270 degrees and so swap width and height.
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+class ImageTooLarge(ValueError):
+    """The upload or the image it contains exceeds the configured limits."""
+
+
+def read_upload(file, max_bytes: int, chunk_size: int = 1 << 20) -> bytes:
+    """Read an upload in chunks, giving up as soon as it grows past ``max_bytes``."""
+    chunks = []
+    total = 0
+    while chunk := file.read(chunk_size):
+        total += len(chunk)
+        if total > max_bytes:
+            raise ImageTooLarge(f"Upload exceeds {max_bytes} bytes.")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def decode_image(data: bytes, target_side: int | None = None, max_pixels: int | None = None):
+    """Decode to an upright RGB image. Returns ``(image, original_size)``.
+
+    ``original_size`` is the full-resolution size after EXIF rotation. With
+    ``target_side``, JPEGs are DCT-scaled by 1/2, 1/4 or 1/8 while decoding, keeping
+    the longer side at least ``target_side``; the returned image is then smaller
+    than ``original_size`` and boxes found on it must be scaled back.
+    """
+    image = Image.open(BytesIO(data))
+    width, height = image.size
+    if max_pixels and width * height > max_pixels:
+        raise ImageTooLarge(f"Image has {width * height} pixels; the limit is {max_pixels}.")
+    if target_side and image.format == "JPEG" and max(width, height) > target_side:
+        scale = target_side / max(width, height)
+        image.draft("RGB", (math.ceil(width * scale), math.ceil(height * scale)))
+    if image.getexif().get(0x0112) in _TRANSPOSED_ORIENTATIONS:
+        width, height = height, width
+    # In place: the default returns a full copy even when there is nothing to rotate.
+    ImageOps.exif_transpose(image, in_place=True)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return image, (width, height)
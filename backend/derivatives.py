@@ -0,0 +1,59 @@
+import hashlib
+import os
+import threading
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+
+class DerivativeStore:
+    """Lazily generated, disk-cached resized JPEG variants of source images.
+
+    Derivatives are named after the source path, mtime and size, so editing or
+    replacing a source image produces a fresh derivative instead of a stale one.
+    """
+
+    def __init__(self, root: Path, variants: dict[str, int], quality: int = 85):
+        self.root = root
+        self.variants = variants
+        self.quality = quality
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def fingerprint(self, source: Path, stat: tuple[int, int] | None = None) -> str:
+        if stat is None:
+            file_stat = source.stat()
+            stat = (file_stat.st_mtime_ns, file_stat.st_size)
+        key = f"{source.resolve()}:{stat[0]}:{stat[1]}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+    def get(self, source: Path, variant: str, data=None, mtime_ns: int = 0) -> Path:
+        """Path of the ``variant`` derivative of ``source``. For an image that is not
+        a file of its own (a shard member), pass its bytes and mtime as well."""
+        max_side = self.variants[variant]
+        stat = (mtime_ns, len(data)) if data is not None else None
+        target = self.root / variant / f"{source.stem}-{self.fingerprint(source, stat)}.jpg"
+        if target.exists():
+            return target
+        with self._lock_for(target):
+            if not target.exists():
+                self._render(BytesIO(data) if data is not None else source, target, max_side)
+        return target
+
+    def _lock_for(self, target: Path):
+        with self._locks_guard:
+            return self._locks.setdefault(target, threading.Lock())
+
+    def _render(self, source, target: Path, max_side: int):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with Image.open(source) as image:
+            # Let the JPEG decoder scale down by powers of two before resampling.
+            image.draft("RGB", (max_side, max_side))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            tmp = target.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            image.save(tmp, format="JPEG", quality=self.quality, optimize=True)
+        os.replace(tmp, target)
+        with self._locks_guard:
+            self._locks.pop(target, None)
@@ -0,0 +1,206 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import asdict, dataclass
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from phash import HashIndex, phash
+from shards import ShardSet
+
+
+@dataclass
+class ImageEntry:
+    name: str
+    size: int
+    mtime: float
+    width: int | None = None
+    height: int | None = None
+    sha256: str | None = None
+
+    def as_dict(self):
+        return asdict(self)
+
+
+class _Snapshot:
+    """Immutable sorted views of the index; swapped in whole on every change."""
+
+    def __init__(self, entries: dict[str, ImageEntry]):
+        self.entries = entries
+        self.names = sorted(entries)
+        self.orders = {
+            "name": [(name,) for name in self.names],
+            "mtime": sorted((entry.mtime, entry.name) for entry in entries.values()),
+            "size": sorted((entry.size, entry.name) for entry in entries.values()),
+        }
+
+
+def encode_cursor(key: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    return tuple(json.loads(base64.urlsafe_b64decode(cursor.encode("ascii"))))
+
+
+class ImageIndex:
+    """In-memory listing of an image directory kept fresh by mtime polling.
+
+    Listing queries bisect into pre-sorted snapshots, so a page costs
+    O(log n + page size) no matter how many files the directory holds. Dimensions
+    and content hashes are filled in by the background thread after each scan, as
+    are perceptual hashes when a ``hash_index`` is given. Images packed in
+    ``shards`` are listed alongside the directory and win over loose files of the
+    same name.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        extensions: set[str],
+        poll_interval: float = 5.0,
+        hash_index: HashIndex | None = None,
+        shards: ShardSet | None = None,
+    ):
+        self.root = root
+        self.extensions = extensions
+        self.poll_interval = poll_interval
+        self.hash_index = hash_index
+        self.shards = shards
+        self._snapshot = _Snapshot({})
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="image-index", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def __len__(self):
+        return len(self._snapshot.names)
+
+    def get(self, name: str) -> ImageEntry | None:
+        return self._snapshot.entries.get(name)
+
+    def refresh(self) -> bool:
+        """Rescan the directory; returns True when anything changed."""
+        current = self._snapshot.entries
+        entries = {}
+        changed = False
+        try:
+            scan = list(os.scandir(self.root))
+        except FileNotFoundError:
+            scan = []
+        found = {}
+        for dirent in scan:
+            if os.path.splitext(dirent.name)[1].lower() not in self.extensions:
+                continue
+            try:
+                stat = dirent.stat()
+            except FileNotFoundError:
+                continue
+            found[dirent.name] = (stat.st_size, stat.st_mtime)
+        if self.shards is not None:
+            self.shards.refresh()
+            found.update(
+                (name, (size, mtime_ns / 1e9))
+                for name, size, mtime_ns in self.shards.items()
+                if "/" not in name and os.path.splitext(name)[1].lower() in self.extensions
+            )
+        for name, (size, mtime) in found.items():
+            previous = current.get(name)
+            if previous is not None and previous.size == size and previous.mtime == mtime:
+                entries[name] = previous
+            else:
+                entries[name] = ImageEntry(name, size, mtime)
+                changed = True
+        if changed or len(entries) != len(current):
+            self._snapshot = _Snapshot(entries)
+            return True
+        return False
+
+    def page(
+        self,
+        limit: int | None = None,
+        cursor: str | None = None,
+        prefix: str | None = None,
+        sort: str = "name",
+        descending: bool = False,
+    ):
+        """Return ``(entries, next_cursor)`` for one page of the listing."""
+        snapshot = self._snapshot
+        order = snapshot.orders[sort]
+        after = decode_cursor(cursor) if cursor else None
+
+        if sort == "name" and prefix:
+            lo = bisect_left(order, (prefix,))
+            hi = bisect_left(order, (prefix + "\U0010ffff",))
+        else:
+            lo, hi = 0, len(order)
+        if after is not None:
+            if descending:
+                hi = min(hi, bisect_left(order, after, lo, hi))
+            else:
+                lo = max(lo, bisect_right(order, after, lo, hi))
+
+        keys = []
+        indices = range(hi - 1, lo - 1, -1) if descending else range(lo, hi)
+        for index in indices:
+            key = order[index]
+            # Prefix filtering on non-name sorts has to walk the order until the page fills.
+            if prefix and not key[-1].startswith(prefix):
+                continue
+            keys.append(key)
+            if limit is not None and len(keys) > limit:
+                break
+
+        next_cursor = None
+        if limit is not None and len(keys) > limit:
+            keys = keys[:limit]
+            next_cursor = encode_cursor(keys[-1])
+        return [snapshot.entries[key[-1]] for key in keys], next_cursor
+
+    def _fill_details(self):
+        for entry in list(self._snapshot.entries.values()):
+            if self._stop.is_set():
+                return
+            if entry.sha256 is not None:
+                continue
+            data = self.shards.get(entry.name) if self.shards is not None else None
+            path = self.root / entry.name
+            try:
+                with Image.open(BytesIO(data) if data is not None else path) as image:
+                    entry.width, entry.height = image.size
+                    if self.hash_index is not None:
+                        # 1/8-scale JPEG decode; the hash only needs a 32x32 thumbnail.
+                        image.draft("L", (64, 64))
+                        image_hash = phash(ImageOps.exif_transpose(image))
+                if data is not None:
+                    entry.sha256 = hashlib.sha256(data).hexdigest()
+                else:
+                    digest = hashlib.sha256()
+                    with path.open("rb") as f:
+                        for chunk in iter(lambda: f.read(1 << 20), b""):
+                            digest.update(chunk)
+                    entry.sha256 = digest.hexdigest()
+                if self.hash_index is not None:
+                    self.hash_index.add(image_hash, entry.sha256, entry.name)
+            except Exception:
+                # Unreadable files stay listed; mark them so they are not retried.
+                entry.sha256 = ""
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._fill_details()
+            if self._stop.wait(self.poll_interval):
+                return
+            self.refresh()
@@ -0,0 +1,288 @@
+import ast
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from boxes import batched_nms
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("pytorch", "onnx", "onnx-int8")
+
+
+class DetectionBoxes:
+    """Minimal stand-in for ``ultralytics.engine.results.Boxes`` over an (n, 6) array."""
+
+    def __init__(self, data: np.ndarray):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self
+
+    @property
+    def xyxy(self):
+        return self.data[:, :4]
+
+    @property
+    def conf(self):
+        return self.data[:, 4]
+
+    @property
+    def cls(self):
+        return self.data[:, 5]
+
+
+class DetectionResult:
+    def __init__(self, boxes: DetectionBoxes, names: dict, orig_shape: tuple, speed: dict):
+        self.boxes = boxes
+        self.names = names
+        self.orig_shape = orig_shape
+        self.speed = speed
+
+
+class OnnxDetector:
+    """YOLO detection head served through ONNX Runtime.
+
+    Mirrors the parts of the ultralytics ``YOLO`` interface the API relies on:
+    ``names`` and ``predict(images)`` returning results with ``boxes``, ``names``
+    and ``speed``. Images are letterboxed to the exported square input size.
+    """
+
+    backend = "onnx"
+
+    def __init__(
+        self,
+        onnx_path: Path,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 1,
+        providers: list[str] | None = None,
+    ):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        available = set(ort.get_available_providers())
+        providers = [p for p in providers or ["CPUExecutionProvider"] if p in available]
+        self.session = ort.InferenceSession(
+            str(onnx_path),
+            sess_options=options,
+            providers=providers or ["CPUExecutionProvider"],
+        )
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata.get("names", "{}"))
+        imgsz = ast.literal_eval(metadata.get("imgsz", "[640, 640]"))
+        self.imgsz = int(max(imgsz)) if isinstance(imgsz, (list, tuple)) else int(imgsz)
+        self.stride = int(metadata.get("stride", 32))
+        self.input_name = self.session.get_inputs()[0].name
+
+    def _target_shape(self, images) -> tuple[int, int]:
+        """Square input for mixed batches; minimal stride-aligned padding when shapes agree.
+
+        Matches the ultralytics predictor, so results line up with the PyTorch backend
+        and same-shape batches do not pay for padding pixels.
+        """
+        sizes = {image.size for image in images}
+        if len(sizes) != 1:
+            return self.imgsz, self.imgsz
+        width, height = sizes.pop()
+        ratio = min(self.imgsz / height, self.imgsz / width)
+        new_w, new_h = round(width * ratio), round(height * ratio)
+        return (
+            new_h + (self.imgsz - new_h) % self.stride,
+            new_w + (self.imgsz - new_w) % self.stride,
+        )
+
+    def _letterbox(self, image: Image.Image, target: tuple[int, int]):
+        array = np.asarray(image.convert("RGB"))
+        height, width = array.shape[:2]
+        ratio = min(self.imgsz / height, self.imgsz / width)
+        new_w, new_h = round(width * ratio), round(height * ratio)
+        if (new_w, new_h) != (width, height):
+            array = cv2.resize(array, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        pad_w, pad_h = (target[1] - new_w) / 2, (target[0] - new_h) / 2
+        top, left = round(pad_h - 0.1), round(pad_w - 0.1)
+        canvas = np.full((*target, 3), 114, dtype=np.uint8)
+        canvas[top : top + new_h, left : left + new_w] = array
+        # Per-axis scale: each side is rounded on its own, as in ultralytics' scale_boxes.
+        return canvas, (new_w / width, new_h / height), (left, top), (height, width)
+
+    def _postprocess(self, output, ratio, pad, shape, conf, iou, max_det):
+        predictions = output.T  # (anchors, 4 + classes)
+        scores = predictions[:, 4:]
+        cls = scores.argmax(axis=1)
+        best = scores[np.arange(len(scores)), cls]
+        mask = best > conf
+        predictions, cls, best = predictions[mask], cls[mask], best[mask]
+        if not len(predictions):
+            return np.zeros((0, 6), dtype=np.float32)
+
+        xywh = predictions[:, :4]
+        xyxy = np.empty_like(xywh)
+        xyxy[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+        xyxy[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+        keep = batched_nms(xyxy, best, cls, iou)[:max_det]
+        xyxy, best, cls = xyxy[keep], best[keep], cls[keep]
+
+        xyxy[:, [0, 2]] -= pad[0]
+        xyxy[:, [1, 3]] -= pad[1]
+        xyxy[:, [0, 2]] /= ratio[0]
+        xyxy[:, [1, 3]] /= ratio[1]
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, shape[1])
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, shape[0])
+        return np.concatenate([xyxy, best[:, None], cls[:, None]], axis=1).astype(np.float32)
+
+    def predict(self, images, verbose=False, conf=0.25, iou=0.7, max_det=300, **kwargs):
+        if not isinstance(images, (list, tuple)):
+            images = [images]
+        if not images:
+            return []
+        started = time.perf_counter()
+        target = self._target_shape(images)
+        prepared = [self._letterbox(image, target) for image in images]
+        batch = np.stack([canvas for canvas, _, _, _ in prepared])
+        batch = np.ascontiguousarray(batch.transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+        preprocessed = time.perf_counter()
+        outputs = self.session.run(None, {self.input_name: batch})[0]
+        inferred = time.perf_counter()
+        detections = [
+            self._postprocess(output, ratio, pad, shape, conf, iou, max_det)
+            for output, (_, ratio, pad, shape) in zip(outputs, prepared)
+        ]
+        finished = time.perf_counter()
+        count = len(images)
+        speed = {
+            "preprocess": (preprocessed - started) * 1000 / count,
+            "inference": (inferred - preprocessed) * 1000 / count,
+            "postprocess": (finished - inferred) * 1000 / count,
+        }
+        return [
+            DetectionResult(DetectionBoxes(data), self.names, shape, speed)
+            for data, (_, _, _, shape) in zip(detections, prepared)
+        ]
+
+
+def export_onnx(weights_path: Path, cache_dir: Path, digest: str, imgsz: int) -> Path:
+    """Export ``weights_path`` to ONNX once, cached under ``cache_dir`` by weight hash."""
+    target = cache_dir / f"{weights_path.stem}-{digest[:16]}-{imgsz}.onnx"
+    if target.exists():
+        return target
+    from ultralytics import YOLO
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Export from a scratch copy so nothing is written next to the source weights.
+    with tempfile.TemporaryDirectory(dir=cache_dir) as scratch:
+        scratch_weights = Path(scratch) / weights_path.name
+        shutil.copy2(weights_path, scratch_weights)
+        exported = YOLO(str(scratch_weights)).export(
+            format="onnx", imgsz=imgsz, dynamic=True, verbose=False
+        )
+        os.replace(exported, target)
+    return target
+
+
+def quantize_onnx(onnx_path: Path, calibration_images: list[str]) -> Path:
+    """Static INT8 (QDQ) copy of an exported model, cached next to it.
+
+    Activation ranges are calibrated on ``calibration_images``, letterboxed the way
+    ``OnnxDetector`` feeds the model. Dynamic quantization is not used: it keeps
+    activations in float and on YOLO's convolutions runs slower than FP32.
+    """
+    target = onnx_path.with_name(f"{onnx_path.stem}-int8.onnx")
+    if target.exists():
+        return target
+    if not calibration_images:
+        raise ValueError("INT8 quantization needs calibration images.")
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    detector = OnnxDetector(onnx_path)
+    square = (detector.imgsz, detector.imgsz)
+
+    class Reader(CalibrationDataReader):
+        def __init__(self):
+            self._paths = iter(calibration_images)
+
+        def get_next(self):
+            path = next(self._paths, None)
+            if path is None:
+                return None
+            with Image.open(path) as image:
+                image.draft("RGB", square)
+                canvas = detector._letterbox(image, square)[0]
+            batch = np.ascontiguousarray(canvas.transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+            return {detector.input_name: batch}
+
+    with tempfile.TemporaryDirectory(dir=onnx_path.parent) as scratch:
+        scratch_target = Path(scratch) / target.name
+        quantize_static(
+            str(onnx_path),
+            str(scratch_target),
+            Reader(),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+        )
+        os.replace(scratch_target, target)
+    return target
+
+
+def load_detector(
+    weights_path: Path,
+    backend: str,
+    digest: str,
+    cache_dir: Path,
+    imgsz: int = 640,
+    intra_op_threads: int = 0,
+    inter_op_threads: int = 1,
+    providers: list[str] | None = None,
+    pytorch_imgsz: int | None = None,
+    calibration_images: list[str] | None = None,
+):
+    """Load detection weights with the requested backend, falling back to PyTorch.
+
+    ``pytorch_imgsz`` overrides the input size the weights were trained at when they
+    run on PyTorch (ONNX models take ``imgsz`` from the export).
+    """
+    if backend in ("onnx", "onnx-int8"):
+        try:
+            onnx_path = export_onnx(weights_path, cache_dir, digest, imgsz)
+            if backend == "onnx-int8":
+                onnx_path = quantize_onnx(onnx_path, calibration_images or [])
+            detector = OnnxDetector(
+                onnx_path,
+                intra_op_threads=intra_op_threads,
+                inter_op_threads=inter_op_threads,
+                providers=providers,
+            )
+            detector.backend = backend
+            return detector
+        except Exception:
+            logger.warning(
+                "%s backend unavailable for %s; falling back to PyTorch.",
+                backend,
+                weights_path,
+                exc_info=True,
+            )
+    from ultralytics import YOLO
+
+    model = YOLO(str(weights_path))
+    if pytorch_imgsz is not None:
+        model.overrides["imgsz"] = pytorch_imgsz
+    model.backend = "pytorch"
+    return model
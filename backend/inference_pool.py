@@ -0,0 +1,350 @@
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from PIL import Image
+
+from inference_backends import DetectionBoxes, DetectionResult
+
+logger = logging.getLogger(__name__)
+
+
+class PoolError(RuntimeError):
+    """The pool cannot serve: it failed to start or did not become ready in time."""
+
+
+def core_sets(workers: int, cpus: list[int] | None = None) -> list[list[int]]:
+    """Split the available CPUs into ``workers`` disjoint, contiguous sets."""
+    if cpus is None:
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+    if not cpus:
+        return [[] for _ in range(workers)]
+    per_worker = max(1, len(cpus) // workers)
+    starts = [(index * per_worker) % len(cpus) for index in range(workers)]
+    return [cpus[start : start + per_worker] for start in starts]
+
+
+def _to_array(result) -> np.ndarray:
+    boxes = getattr(result, "boxes", None) if result is not None else None
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+    boxes = boxes.cpu().numpy()
+    return np.concatenate(
+        [boxes.xyxy, boxes.conf[:, None], boxes.cls[:, None]], axis=1
+    ).astype(np.float32)
+
+
+def _worker_main(index, cores, threads, specs, warmup_sizes, requests, results):
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    from inference_backends import load_detector
+
+    models = {}
+    try:
+        for task, spec in specs.items():
+            models[task] = load_detector(intra_op_threads=threads, **spec)
+        if "torch" in sys.modules:
+            sys.modules["torch"].set_num_threads(threads)
+        for model in models.values():
+            for size in warmup_sizes:
+                model.predict([Image.new("RGB", (size, size), (114, 114, 114))], verbose=False)
+    except Exception as exc:
+        results.put(("failed", index, f"{type(exc).__name__}: {exc}"))
+        return
+    results.put(
+        (
+            "ready",
+            index,
+            {task: model.names for task, model in models.items()},
+            # The backend each model actually loaded with, after any PyTorch fallback.
+            {task: model.backend for task, model in models.items()},
+        )
+    )
+
+    while True:
+        message = requests.get()
+        if message is None:
+            return
+        job_id, task, shm_name, layout = message
+        try:
+            images = []
+            if layout:
+                # Spawned workers share the parent's resource tracker, so attaching
+                # does not register a second owner; the parent unlinks the block.
+                shm = SharedMemory(name=shm_name)
+                try:
+                    # One memcpy out of the block so it can be closed right away;
+                    # predictors may keep references to their inputs.
+                    images = [
+                        Image.fromarray(
+                            np.ndarray((height, width, 3), np.uint8, shm.buf, offset).copy()
+                        )
+                        for offset, width, height in layout
+                    ]
+                finally:
+                    shm.close()
+            predictions = models[task].predict(images, verbose=False) if images else []
+            payload = [
+                (_to_array(result), (height, width), dict(getattr(result, "speed", None) or {}))
+                for result, (_, width, height) in zip(predictions, layout)
+            ]
+            results.put(("result", job_id, True, payload))
+        except Exception as exc:
+            results.put(("result", job_id, False, f"{type(exc).__name__}: {exc}"))
+
+
+class PoolModel:
+    """Model proxy with the ``names``/``predict`` surface of an ultralytics ``YOLO``."""
+
+    def __init__(self, pool: "InferencePool", task: str, names: dict, backend: str):
+        self.pool = pool
+        self.task = task
+        self.names = names
+        self.backend = f"pool:{backend}"
+
+    def predict(self, images, verbose=False, **kwargs):
+        if not isinstance(images, (list, tuple)):
+            images = [images]
+        return self.pool.predict(self.task, images).result()
+
+
+class InferencePool:
+    """Runs detection models in ``workers`` separate processes.
+
+    Each worker is pinned to its own core set, limited to ``threads`` compute
+    threads and holds one copy of every model in ``specs`` (keyword arguments for
+    ``inference_backends.load_detector``). Batches are handed over as raw RGB pixels
+    in a shared-memory block instead of pickled images; only the small box arrays
+    travel back through the result queue. Every worker has its own request queue and
+    gets the batch to the ready worker with the fewest in flight, so a worker that dies
+    only fails the batches it held.
+    """
+
+    def __init__(
+        self,
+        specs: dict[str, dict],
+        workers: int,
+        threads: int = 0,
+        warmup_sizes: list[int] | None = None,
+    ):
+        self.specs = specs
+        self.workers = max(1, int(workers))
+        cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+        self.threads = threads or max(1, cpu_count // self.workers)
+        self.warmup_sizes = warmup_sizes or []
+        self._ctx = mp.get_context("spawn")
+        self._requests: dict[int, mp.Queue] = {}
+        self._results = self._ctx.Queue()
+        self._processes: dict[int, mp.Process] = {}
+        self._cores = core_sets(self.workers)
+        # job id -> (future, shared memory, task, worker index)
+        self._pending: dict[int, tuple[Future, SharedMemory | None, str, int]] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._names: dict[str, dict] = {}
+        self._backends: dict[str, str] = {}
+        self._ready = threading.Event()
+        self._ready_workers: set[int] = set()
+        self._error: str | None = None
+        self._stopping = False
+        self._collector = None
+
+    def start(self):
+        """Spawn the workers without blocking; ``model()`` waits until one is ready."""
+        self._collector = threading.Thread(target=self._collect, name="inference-pool", daemon=True)
+        self._collector.start()
+        # Worker 0 starts alone so one-off work such as the ONNX export runs once;
+        # the rest are spawned when it reports ready.
+        self._spawn(0)
+
+    def stop(self):
+        self._stopping = True
+        for requests in list(self._requests.values()):
+            requests.put(None)
+        for process in self._processes.values():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._fail_pending("Inference pool stopped.")
+
+    def model(self, task: str, timeout: float | None = None) -> PoolModel:
+        if task not in self.specs:
+            raise KeyError(f"Inference pool does not serve {task!r}")
+        if not self._ready.wait(timeout):
+            raise PoolError("Inference pool did not become ready.")
+        if self._error is not None:
+            raise PoolError(f"Inference pool failed to start: {self._error}")
+        return PoolModel(self, task, self._names[task], self._backends[task])
+
+    def predict(self, task: str, images: list[Image.Image]) -> Future:
+        arrays = [np.asarray(image.convert("RGB")) for image in images]
+        layout, offset = [], 0
+        for array in arrays:
+            height, width = array.shape[:2]
+            layout.append((offset, width, height))
+            offset += array.nbytes
+        shm = SharedMemory(create=True, size=max(offset, 1)) if arrays else None
+        for array, (start, _, _) in zip(arrays, layout):
+            np.ndarray(array.shape, np.uint8, shm.buf, start)[...] = array
+
+        future = Future()
+        job_id = next(self._ids)
+        with self._lock:
+            # Enqueued under the lock so a worker's restart cannot orphan the batch.
+            worker = self._pick_worker()
+            if worker is not None:
+                self._pending[job_id] = (future, shm, task, worker)
+                self._requests[worker].put((job_id, task, shm.name if shm else None, layout))
+        if worker is None:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            future.set_exception(PoolError("No inference worker is running."))
+        return future
+
+    def _pick_worker(self) -> int | None:
+        # Called with the lock held.
+        candidates = [index for index in list(self._ready_workers) if index in self._requests]
+        candidates = candidates or list(self._requests)
+        if not candidates:
+            return None
+        in_flight = dict.fromkeys(candidates, 0)
+        for *_, worker in self._pending.values():
+            if worker in in_flight:
+                in_flight[worker] += 1
+        return min(candidates, key=in_flight.__getitem__)
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "workers": self.workers,
+            "threads_per_worker": self.threads,
+            "ready_workers": len(self._ready_workers),
+            "alive_workers": sum(p.is_alive() for p in self._processes.values()),
+            "pending_batches": pending,
+        }
+
+    def _spawn(self, index: int) -> list[int]:
+        """Start worker ``index`` on a fresh request queue; returns the ids of batches
+        sent to its previous process, which are lost with it."""
+        with self._lock:
+            lost = [job_id for job_id, entry in self._pending.items() if entry[3] == index]
+            previous = self._requests.get(index)
+            self._requests[index] = requests = self._ctx.Queue()
+        if previous is not None:
+            # Nobody reads it any more; do not let its feeder thread block exit.
+            previous.cancel_join_thread()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                index,
+                self._cores[index],
+                self.threads,
+                self.specs,
+                self.warmup_sizes,
+                requests,
+                self._results,
+            ),
+            name=f"inference-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[index] = process
+        return lost
+
+    def _release(self, job_id: int):
+        with self._lock:
+            future, shm, task, _ = self._pending.pop(job_id, (None, None, None, None))
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+        return future, task
+
+    def _fail_pending(self, reason: str, job_ids: list[int] | None = None):
+        """Fail ``job_ids``, or every batch in flight."""
+        if job_ids is None:
+            with self._lock:
+                job_ids = list(self._pending)
+        for job_id in job_ids:
+            future, _ = self._release(job_id)
+            if future is not None and not future.done():
+                future.set_exception(RuntimeError(reason))
+
+    def _collect(self):
+        checked = time.monotonic()
+        while not self._stopping:
+            try:
+                message = self._results.get(timeout=1.0)
+            except queue.Empty:
+                message = None
+            # Also while results keep arriving, so a dead worker is noticed under load.
+            if time.monotonic() - checked >= 1.0:
+                self._check_workers()
+                checked = time.monotonic()
+            if message is None:
+                continue
+            kind = message[0]
+            if kind == "ready":
+                _, index, names, backends = message
+                self._names = names
+                self._backends = backends
+                self._ready_workers.add(index)
+                if index == 0:
+                    for other in range(1, self.workers):
+                        self._spawn(other)
+                self._ready.set()
+            elif kind == "failed":
+                _, index, error = message
+                logger.error("Inference worker %s failed to start: %s", index, error)
+                if not self._ready_workers:
+                    self._error = error
+                    self._ready.set()
+            else:
+                _, job_id, ok, payload = message
+                future, task = self._release(job_id)
+                if future is None:
+                    continue
+                if not ok:
+                    future.set_exception(RuntimeError(payload))
+                    continue
+                future.set_result(
+                    [
+                        DetectionResult(DetectionBoxes(data), self._names[task], shape, speed)
+                        for data, shape, speed in payload
+                    ]
+                )
+
+    def _check_workers(self):
+        for index, process in list(self._processes.items()):
+            if process.is_alive() or self._stopping:
+                continue
+            was_ready = index in self._ready_workers
+            self._ready_workers.discard(index)
+            if was_ready:
+                # Only the batches this worker held are lost; the others keep running.
+                logger.error("Inference worker %s exited (%s); restarting.", index, process.exitcode)
+                self._fail_pending(f"Inference worker {index} exited.", self._spawn(index))
+                continue
+            # Died while loading, possibly without reporting why (OOM kill, segfault).
+            # Not restarted, so weights that cannot load do not crash-loop the worker.
+            logger.error("Inference worker %s exited during startup (%s).", index, process.exitcode)
+            with self._lock:
+                lost = [job_id for job_id, entry in self._pending.items() if entry[3] == index]
+                del self._processes[index]
+                self._requests.pop(index).cancel_join_thread()
+            self._fail_pending(f"Inference worker {index} exited.", lost)
+            if not self._ready.is_set():
+                self._error = f"worker {index} exited during startup ({process.exitcode})"
+                self._ready.set()
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class JobStore:
+    """SQLite-backed record of bulk jobs and the per-image items they contain."""
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, params TEXT NOT NULL,"
+            "created REAL NOT NULL, updated REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS job_items ("
+            "job_id TEXT NOT NULL, idx INTEGER NOT NULL, image_name TEXT NOT NULL,"
+            "status TEXT NOT NULL, result TEXT, error TEXT, updated REAL NOT NULL,"
+            "PRIMARY KEY (job_id, idx));"
+            "CREATE INDEX IF NOT EXISTS job_items_status ON job_items (status);"
+        )
+        self._db.commit()
+
+    def create(self, image_names: list[str], params: dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, params, created, updated) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(params), now, now),
+            )
+            self._db.executemany(
+                "INSERT INTO job_items (job_id, idx, image_name, status, updated) VALUES (?, ?, ?, 'queued', ?)",
+                [(job_id, index, name, now) for index, name in enumerate(image_names)],
+            )
+            self._db.commit()
+        return job_id
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, params, created, updated FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            counts = dict(
+                self._db.execute(
+                    "SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)
+                ).fetchall()
+            )
+        status, params, created, updated = row
+        return {
+            "job_id": job_id,
+            "status": status,
+            "params": json.loads(params),
+            "created": created,
+            "updated": updated,
+            "total": sum(counts.values()),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "running": counts.get("running", 0),
+            "queued": counts.get("queued", 0),
+        }
+
+    def items(self, job_id: str, offset: int = 0, limit: int | None = None):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT idx, image_name, status, result, error FROM job_items "
+                "WHERE job_id = ? ORDER BY idx LIMIT ? OFFSET ?",
+                (job_id, -1 if limit is None else limit, offset),
+            ).fetchall()
+        return [
+            {
+                "index": index,
+                "image_name": image_name,
+                "status": status,
+                "result": json.loads(result) if result else None,
+                "error": error,
+            }
+            for index, image_name, status, result, error in rows
+        ]
+
+    def unfinished(self):
+        """``(job_id, index, image_name, params)`` for every item still to run."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT i.job_id, i.idx, i.image_name, j.params FROM job_items i "
+                "JOIN jobs j ON j.id = i.job_id "
+                "WHERE i.status IN ('queued', 'running') ORDER BY j.created, i.idx"
+            ).fetchall()
+        return [(job_id, index, name, json.loads(params)) for job_id, index, name, params in rows]
+
+    def update_item(self, job_id: str, index: int, status: str, result=None, error: str | None = None):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE job_items SET status = ?, result = ?, error = ?, updated = ? WHERE job_id = ? AND idx = ?",
+                (
+                    status,
+                    json.dumps(result, separators=(",", ":")) if result is not None else None,
+                    error,
+                    now,
+                    job_id,
+                    index,
+                ),
+            )
+            remaining = self._db.execute(
+                "SELECT COUNT(*) FROM job_items WHERE job_id = ? AND status IN ('queued', 'running')",
+                (job_id,),
+            ).fetchone()[0]
+            job_status = "running" if remaining else "done"
+            self._db.execute(
+                "UPDATE jobs SET status = ?, updated = ? WHERE id = ?", (job_status, now, job_id)
+            )
+            self._db.commit()
+        return job_status
+
+    def prune(self, max_age_s: float) -> int:
+        """Drop finished jobs last touched more than ``max_age_s`` seconds ago."""
+        cutoff = time.time() - max_age_s
+        with self._lock:
+            job_ids = [
+                row[0]
+                for row in self._db.execute(
+                    "SELECT id FROM jobs WHERE status = 'done' AND updated < ?", (cutoff,)
+                ).fetchall()
+            ]
+            self._db.executemany("DELETE FROM job_items WHERE job_id = ?", [(j,) for j in job_ids])
+            self._db.executemany("DELETE FROM jobs WHERE id = ?", [(j,) for j in job_ids])
+            self._db.commit()
+        return len(job_ids)
+
+
+class JobRunner:
+    """Processes queued job items with at most ``concurrency`` in flight.
+
+    ``process_item(image_name, params)`` is a coroutine returning a JSON-able result;
+    an exception marks just that item as failed. Items still queued or running when
+    the process stopped are picked up again by ``start()``. Store calls run in worker
+    threads so SQLite commits never block the event loop.
+    """
+
+    def __init__(self, store: JobStore, process_item, concurrency: int = 4):
+        self.store = store
+        self.process_item = process_item
+        self.concurrency = max(1, int(concurrency))
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+        self._listeners: dict[str, set[asyncio.Queue]] = {}
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        for job_id, index, image_name, params in await asyncio.to_thread(self.store.unfinished):
+            self._queue.put_nowait((job_id, index, image_name, params))
+        if self._queue.qsize():
+            logger.info("Resuming %d unfinished job items.", self._queue.qsize())
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, image_names: list[str], params: dict) -> str:
+        job_id = await asyncio.to_thread(self.store.create, image_names, params)
+        for index, image_name in enumerate(image_names):
+            self._queue.put_nowait((job_id, index, image_name, params))
+        return job_id
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self._listeners.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        listeners = self._listeners.get(job_id)
+        if listeners is not None:
+            listeners.discard(queue)
+            if not listeners:
+                del self._listeners[job_id]
+
+    def stats(self):
+        return {
+            "concurrency": self.concurrency,
+            "queued_items": self._queue.qsize() if self._queue is not None else 0,
+            "listeners": sum(len(listeners) for listeners in self._listeners.values()),
+        }
+
+    def _publish(self, job_id: str, event: dict):
+        for queue in self._listeners.get(job_id, ()):
+            queue.put_nowait(event)
+
+    async def _worker(self):
+        while True:
+            job_id, index, image_name, params = await self._queue.get()
+            try:
+                await asyncio.to_thread(self.store.update_item, job_id, index, "running")
+                try:
+                    result = await self.process_item(image_name, params)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    detail = getattr(exc, "detail", None) or str(exc) or type(exc).__name__
+                    job_status = await asyncio.to_thread(
+                        self.store.update_item, job_id, index, "failed", error=detail
+                    )
+                    event = {"index": index, "image_name": image_name, "status": "failed", "error": detail}
+                else:
+                    job_status = await asyncio.to_thread(
+                        self.store.update_item, job_id, index, "done", result=result
+                    )
+                    event = {"index": index, "image_name": image_name, "status": "done"}
+                event["job_status"] = job_status
+                self._publish(job_id, event)
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,75 @@
+import json
+
+
+class ItemsStreamParser:
+    """Incrementally scans a streamed JSON report and yields ``items[]`` entries.
+
+    Text is fed as it arrives; each object in the top-level ``items`` array is
+    decoded and returned as soon as its closing brace is seen, without waiting for
+    the rest of the document. Anything before the first ``{`` (such as a Markdown
+    code fence) is ignored.
+    """
+
+    def __init__(self, key: str = "items"):
+        self.key = key
+        self._text = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = None
+        self._last_key = None
+        self._items_depth = None
+        self._item_start = None
+
+    def feed(self, chunk: str):
+        self._text += chunk
+        completed = []
+        text = self._text
+        for index in range(self._pos, len(text)):
+            char = text[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start : index + 1]
+                continue
+
+            if not self._stack and char != "{":
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char == ":":
+                if len(self._stack) == 1 and self._last_string is not None:
+                    self._last_key = json.loads(self._last_string)
+            elif char in "{[":
+                self._stack.append(char)
+                if char == "[" and len(self._stack) == 2 and self._last_key == self.key:
+                    self._items_depth = 2
+                elif char == "{" and self._items_depth and len(self._stack) == 3:
+                    self._item_start = index
+            elif char in "}]":
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                if char == "}" and self._item_start is not None and len(self._stack) == 2:
+                    try:
+                        completed.append(json.loads(text[self._item_start : index + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self._item_start = None
+                elif char == "]" and self._items_depth and len(self._stack) == 1:
+                    self._items_depth = None
+            elif char == "," and len(self._stack) == 1:
+                self._last_string = None
+        self._pos = len(text)
+        return completed
+
+    @property
+    def text(self) -> str:
+        return self._text
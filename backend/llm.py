@@ -0,0 +1,166 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+# First API version that accepts stream_options (token usage on streamed completions).
+STREAM_USAGE_API_VERSION = "2024-09-01"
+
+
+class LLMError(Exception):
+    """A completion failed for good (non-retryable status or retries exhausted)."""
+
+
+def _retry_after_seconds(response: httpx.Response | None):
+    if response is None:
+        return None
+    value = response.headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMClient:
+    """Async chat-completions client with a concurrency cap and retry/backoff.
+
+    The semaphore is only held while a request is in flight, so requests waiting
+    out a backoff do not block other callers. ``stream_usage`` asks streamed
+    completions for token usage; it is switched off for good if the service rejects it.
+    """
+
+    def __init__(
+        self,
+        client,
+        max_concurrency: int = 4,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        stream_usage: bool = True,
+    ):
+        self.client = client
+        self.stream_usage = stream_usage
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def complete(self, **kwargs):
+        from openai import APIConnectionError, APIStatusError, APITimeoutError, OpenAIError
+
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    return await self.client.chat.completions.create(**kwargs)
+            except APIStatusError as exc:
+                if exc.status_code not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    raise LLMError(str(exc)) from exc
+                delay = _retry_after_seconds(exc.response)
+            except (APIConnectionError, APITimeoutError) as exc:
+                if attempt >= self.max_retries:
+                    raise LLMError(str(exc)) from exc
+                delay = None
+            except OpenAIError as exc:
+                raise LLMError(str(exc)) from exc
+            if delay is None:
+                delay = self.backoff_base * (2**attempt) * (0.5 + random.random() / 2)
+            await asyncio.sleep(min(delay, self.backoff_max))
+            attempt += 1
+
+    async def stream(self, on_usage=None, **kwargs):
+        """Yield completion text deltas; only the initial request is retried.
+
+        Token usage arrives in a final chunk without choices and is passed to
+        ``on_usage``; without ``stream_usage`` it is never called.
+        """
+        from openai import APIConnectionError, APIStatusError, APITimeoutError, OpenAIError
+
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                options = {"stream_options": {"include_usage": True}} if self.stream_usage else {}
+                try:
+                    stream = await self.client.chat.completions.create(stream=True, **options, **kwargs)
+                except APIStatusError as exc:
+                    if exc.status_code == 400 and options:
+                        # Older API versions reject stream_options; usage stays unknown.
+                        self.stream_usage = False
+                        continue
+                    if exc.status_code not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                        raise LLMError(str(exc)) from exc
+                    delay = _retry_after_seconds(exc.response)
+                except (APIConnectionError, APITimeoutError) as exc:
+                    if attempt >= self.max_retries:
+                        raise LLMError(str(exc)) from exc
+                    delay = None
+                except OpenAIError as exc:
+                    raise LLMError(str(exc)) from exc
+                else:
+                    try:
+                        async for chunk in stream:
+                            if on_usage is not None and getattr(chunk, "usage", None) is not None:
+                                on_usage(chunk.usage)
+                            if not chunk.choices:
+                                continue
+                            content = chunk.choices[0].delta.content
+                            if content:
+                                yield content
+                    except OpenAIError as exc:
+                        raise LLMError(str(exc)) from exc
+                    return
+            if delay is None:
+                delay = self.backoff_base * (2**attempt) * (0.5 + random.random() / 2)
+            await asyncio.sleep(min(delay, self.backoff_max))
+            attempt += 1
+
+
+def build_client(
+    endpoint: str,
+    api_key: str,
+    api_version: str,
+    max_concurrency: int,
+    max_connections: int,
+    timeout: float,
+    max_retries: int,
+) -> LLMClient:
+    # Imported here so the API process does not pay for the openai SDK at startup.
+    from openai import AsyncAzureOpenAI
+
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+        timeout=httpx.Timeout(timeout, connect=min(timeout, 10.0)),
+    )
+    client = AsyncAzureOpenAI(
+        api_key=api_key,
+        azure_endpoint=endpoint,
+        api_version=api_version,
+        http_client=http_client,
+        # Retries are handled by LLMClient so they respect the concurrency cap.
+        max_retries=0,
+    )
+    return LLMClient(
+        client,
+        max_concurrency=max_concurrency,
+        max_retries=max_retries,
+        # "YYYY-MM-DD[-preview]" versions compare correctly as strings.
+        stream_usage=api_version[:10] >= STREAM_USAGE_API_VERSION,
+    )
@@ -1,26 +1,134 @@
+import asyncio
 import base64
+import hashlib
 import json
+import mimetypes
 import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from email.utils import formatdate, parsedate_to_datetime
 from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
 from typing import Literal
 
+import numpy as np
 from dotenv import load_dotenv
-from fastapi import Body, FastAPI, File, HTTPException, UploadFile
+from fastapi import (
+    Body,
+    FastAPI,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from openai import AzureOpenAI
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from PIL import Image
-from ultralytics import YOLO
 from pydantic import BaseModel, Field
 
+from batching import MicroBatcher
+from boxes import overlap_join
+from chat_sessions import ChatStore
+from decode import ImageTooLarge, decode_image, read_upload
+from derivatives import DerivativeStore
+from image_index import ImageIndex
+from inference_backends import BACKENDS, load_detector
+from inference_pool import InferencePool, PoolError
+from jobs import JobRunner, JobStore
+from json_stream import ItemsStreamParser
+from llm import LLMError, build_client
+import metrics
+from phash import HashIndex, phash, phash_bytes
+from result_cache import ResultCache, make_key
+from shards import ShardSet
+from tiling import merge_tiles, tile_grid
+from variants import FULL, VariantSelector, parse_variants
+
+# Before any config below is read, so settings in backend/.env take effect.
+load_dotenv(Path(__file__).resolve().parent / ".env")
+
 API_TITLE = "NeuroEYE Portal API"
-DATA_ROOT = Path("/Users/kanavkahol/work/car_parts/data")
-IMAGE_DIR = DATA_ROOT / "Car damages dataset" / "File1" / "img"
-MODELS_DIR = Path("/Users/kanavkahol/work/car_parts/models")
+DATA_ROOT = Path(os.getenv("DATA_ROOT", "/Users/kanavkahol/work/car_parts/data"))
+IMAGE_DIR = Path(os.getenv("IMAGE_DIR", DATA_ROOT / "Car damages dataset" / "File1" / "img"))
+# Directory of packed image shards (scripts/pack_shards.py); members shadow IMAGE_DIR files.
+IMAGE_SHARD_DIR = os.getenv("IMAGE_SHARD_DIR")
+MODELS_DIR = Path(os.getenv("MODELS_DIR", "/Users/kanavkahol/work/car_parts/models"))
 PARTS_MODEL_PATH = MODELS_DIR / "parts_best.pt"
 DAMAGE_MODEL_PATH = MODELS_DIR / "damage_best.pt"
+PART_CLASSIFIER_MODEL_PATH = Path(
+    os.getenv("PART_CLASSIFIER_MODEL_PATH", MODELS_DIR / "part_damage_cls.pt")
+)
+PART_CLASSIFIER_IMGSZ = int(os.getenv("PART_CLASSIFIER_IMGSZ", "224"))
+PART_CLASSIFIER_MAX_BATCH = int(os.getenv("PART_CLASSIFIER_MAX_BATCH", "32"))
+PART_CROP_MARGIN = float(os.getenv("PART_CROP_MARGIN", "0.1"))
+# Classifier labels meaning "no damage"; any other label counts as damaged.
+PART_CLASSIFIER_NEGATIVE_LABELS = {
+    label.strip().lower()
+    for label in os.getenv("PART_CLASSIFIER_NEGATIVE_LABELS", "intact,undamaged,no_damage,normal").split(",")
+}
+PART_REVIEW_LOW = float(os.getenv("PART_REVIEW_LOW", "0.35"))
+PART_REVIEW_HIGH = float(os.getenv("PART_REVIEW_HIGH", "0.65"))
+PARTS_MODEL_BACKEND = os.getenv("PARTS_MODEL_BACKEND", os.getenv("MODEL_BACKEND", "pytorch"))
+DAMAGE_MODEL_BACKEND = os.getenv("DAMAGE_MODEL_BACKEND", os.getenv("MODEL_BACKEND", "pytorch"))
+MODEL_IMGSZ = int(os.getenv("MODEL_IMGSZ", "640"))
+# Cheaper variants per task, ``name:backend:imgsz[:weights]`` from most to least
+# expensive; relative weights paths are under MODELS_DIR.
+MODEL_VARIANTS = {
+    "parts": parse_variants(os.getenv("PARTS_MODEL_VARIANTS", "")),
+    "damage": parse_variants(os.getenv("DAMAGE_MODEL_VARIANTS", "")),
+}
+# "adaptive" picks by load; "full" or a variant name pins every request to it.
+VARIANT_POLICY = os.getenv("VARIANT_POLICY", "adaptive")
+VARIANT_TARGET_LATENCY_MS = float(os.getenv("VARIANT_TARGET_LATENCY_MS", "1000"))
+VARIANT_COOLDOWN_S = float(os.getenv("VARIANT_COOLDOWN_S", "5"))
+MODEL_CALIBRATION_IMAGES = int(os.getenv("MODEL_CALIBRATION_IMAGES", "32"))
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+ONNX_INTER_OP_THREADS = int(os.getenv("ONNX_INTER_OP_THREADS", "1"))
+ONNX_PROVIDERS = os.getenv("ONNX_PROVIDERS", "CPUExecutionProvider").split(",")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+INFERENCE_THREADS_PER_WORKER = int(os.getenv("INFERENCE_THREADS_PER_WORKER", "0"))
+# How long a model load waits for the pool's first worker (ONNX export included).
+INFERENCE_READY_TIMEOUT_S = float(os.getenv("INFERENCE_READY_TIMEOUT_S", "600"))
+PREDICT_MAX_BATCH_SIZE = int(os.getenv("PREDICT_MAX_BATCH_SIZE", "8"))
+PREDICT_MAX_WAIT_MS = float(os.getenv("PREDICT_MAX_WAIT_MS", "10"))
+VARIANT_MAX_QUEUE = int(os.getenv("VARIANT_MAX_QUEUE", str(2 * PREDICT_MAX_BATCH_SIZE)))
+PREDICT_BATCH_CHUNK_SIZE = int(os.getenv("PREDICT_BATCH_CHUNK_SIZE", "16"))
+PREDICT_BATCH_MAX_ITEMS = int(os.getenv("PREDICT_BATCH_MAX_ITEMS", "1000"))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 << 20)))
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", "50000000"))
+DECODE_DRAFT = os.getenv("DECODE_DRAFT", "true").lower() in {"1", "true", "yes"}
+TILE_SIZE = int(os.getenv("TILE_SIZE", "640"))
+TILE_OVERLAP = float(os.getenv("TILE_OVERLAP", "0.2"))
+TILE_MAX_COUNT = int(os.getenv("TILE_MAX_COUNT", "64"))
+TILE_MERGE_IOU = float(os.getenv("TILE_MERGE_IOU", "0.5"))
+TILE_INCLUDE_FULL = os.getenv("TILE_INCLUDE_FULL", "true").lower() in {"1", "true", "yes"}
+CACHE_DIR = Path(os.getenv("RESULT_CACHE_DIR", Path(__file__).resolve().parent / ".cache"))
+RESULT_CACHE_MEMORY_ITEMS = int(os.getenv("RESULT_CACHE_MEMORY_ITEMS", "512"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(256 << 20)))
+ONNX_CACHE_DIR = Path(os.getenv("ONNX_CACHE_DIR", CACHE_DIR / "onnx"))
+IMAGE_VARIANTS = {
+    "thumb": int(os.getenv("IMAGE_THUMB_MAX_SIDE", "320")),
+    "display": int(os.getenv("IMAGE_DISPLAY_MAX_SIDE", "1600")),
+    "llm": int(os.getenv("LLM_IMAGE_MAX_SIDE", "1024")),
+}
+LLM_IMAGE_MAX_SIDE = IMAGE_VARIANTS["llm"]
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in {"1", "true", "yes"}
+IMAGE_CACHE_CONTROL = os.getenv("IMAGE_CACHE_CONTROL", "public, max-age=86400")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "16"))
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "120"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+GROUNDED_MAX_TOKENS = int(os.getenv("GROUNDED_MAX_TOKENS", "1200"))
+LLM_MAX_CROPS = int(os.getenv("LLM_MAX_CROPS", "4"))
+LLM_CROP_MAX_SIDE = int(os.getenv("LLM_CROP_MAX_SIDE", "512"))
+LLM_CROP_MARGIN = float(os.getenv("LLM_CROP_MARGIN", "0.1"))
 FALLBACK_PARTS = [
     "Back-bumper",
     "Back-door",
@@ -44,32 +152,289 @@ FALLBACK_PARTS = [
     "Trunk",
     "Windshield",
 ]
+PLACEHOLDER_VALUES = {"unknown", "n/a", "none"}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+# INT8 variants are calibrated on the first MODEL_CALIBRATION_IMAGES images here.
+MODEL_CALIBRATION_DIR = Path(os.getenv("MODEL_CALIBRATION_DIR", IMAGE_DIR))
+IMAGE_INDEX_POLL_S = float(os.getenv("IMAGE_INDEX_POLL_S", "5"))
+# Hamming distance (of 64 pHash bits) within which a cached result of another image
+# is reused; negative disables reuse.
+DUPLICATE_MAX_DISTANCE = int(os.getenv("DUPLICATE_MAX_DISTANCE", "4"))
+# Upload hashes kept for near-duplicate lookups; the oldest are dropped past this.
+HASH_INDEX_MAX_UPLOADS = int(os.getenv("HASH_INDEX_MAX_UPLOADS", "100000"))
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "4"))
+JOB_MAX_IMAGES = int(os.getenv("JOB_MAX_IMAGES", "200"))
+JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+CHAT_HISTORY_TOKENS = int(os.getenv("CHAT_HISTORY_TOKENS", "2000"))
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "300"))
+CHAT_SUMMARIZE = os.getenv("CHAT_SUMMARIZE", "true").lower() in {"1", "true", "yes"}
+CHAT_RETENTION_DAYS = float(os.getenv("CHAT_RETENTION_DAYS", "30"))
+WARMUP_MODELS = [
+    t
+    for t in os.getenv(
+        "WARMUP_MODELS",
+        "parts,damage,part_damage" if PART_CLASSIFIER_MODEL_PATH.exists() else "parts,damage",
+    ).split(",")
+    if t
+]
+WARMUP_IMAGE_SIZES = [
+    int(size) for size in os.getenv("WARMUP_IMAGE_SIZES", str(MODEL_IMGSZ)).split(",") if size
+]
+
+_batchers: dict[str, MicroBatcher] = {}
+_batchers_lock = threading.Lock()
+_inference_pool: InferencePool | None = None
+_job_store = JobStore(CACHE_DIR / "jobs.sqlite3")
+_chat_store = ChatStore(CACHE_DIR / "chat.sqlite3")
+_llm_usage: dict[str, dict] = {}
+_llm_usage_lock = threading.Lock()
+_variant_keys = [f"{task}:{name}" for task, variants in MODEL_VARIANTS.items() for name in variants]
+_variant_selectors = {
+    task: VariantSelector(
+        [FULL, *variants],
+        max_queue=VARIANT_MAX_QUEUE,
+        target_latency_s=VARIANT_TARGET_LATENCY_MS / 1000.0,
+        cooldown_s=VARIANT_COOLDOWN_S,
+    )
+    for task, variants in MODEL_VARIANTS.items()
+    if variants
+}
+_model_locks = {
+    "parts": threading.Lock(),
+    "damage": threading.Lock(),
+    "part_damage": threading.Lock(),
+    **{key: threading.Lock() for key in _variant_keys},
+}
+# Backend each loaded model really runs on, filled by _load_model; differs from the
+# configured one when an ONNX load fell back to PyTorch.
+_loaded_backends: dict[str, str] = {}
+# Variants are always warmed: the adaptive policy only switches to loaded ones.
+_model_status = {
+    task: {"status": "pending", "backend": None, "load_s": None, "warmup_s": None, "error": None}
+    for task in WARMUP_MODELS + _variant_keys
+}
+_decode_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="decode")
+_hash_index = HashIndex(max_unnamed=HASH_INDEX_MAX_UPLOADS)
+_image_shards = ShardSet(Path(IMAGE_SHARD_DIR)) if IMAGE_SHARD_DIR else None
+_image_index = ImageIndex(
+    IMAGE_DIR,
+    IMAGE_EXTENSIONS,
+    poll_interval=IMAGE_INDEX_POLL_S,
+    hash_index=_hash_index,
+    shards=_image_shards,
+)
+_derivatives = DerivativeStore(CACHE_DIR / "derivatives", IMAGE_VARIANTS)
+_result_cache = ResultCache(
+    CACHE_DIR / "results.sqlite3",
+    memory_items=RESULT_CACHE_MEMORY_ITEMS,
+    max_disk_bytes=RESULT_CACHE_MAX_BYTES,
+)
+
+def _warm_model(task: str):
+    status = _model_status[task]
+    status["status"] = "loading"
+    started = time.perf_counter()
+    try:
+        _load_model(task)
+        status["backend"] = _loaded_backends[task]
+        status["load_s"] = round(time.perf_counter() - started, 3)
+        status["status"] = "warming"
+        started = time.perf_counter()
+        # Through the batcher so warmup never races a request on the model, and once
+        # at full batch size so batched graphs are set up as well.
+        batcher = _get_batcher(task)
+        for size in WARMUP_IMAGE_SIZES:
+            image = Image.new("RGB", (size, size), (114, 114, 114))
+            batcher.submit(image).result()
+            for future in [batcher.submit(image) for _ in range(PREDICT_MAX_BATCH_SIZE)]:
+                future.result()
+        status["warmup_s"] = round(time.perf_counter() - started, 3)
+        status["status"] = "ready"
+    except Exception as exc:
+        status["status"] = "error"
+        status["error"] = str(exc)
+
 
-load_dotenv()
+def _warm_up():
+    with ThreadPoolExecutor(max_workers=len(_model_status) + 1, thread_name_prefix="warmup") as pool:
+        for task in _model_status:
+            pool.submit(_warm_model, task)
+        if os.getenv("AZURE_OPENAI_ENDPOINT"):
+            pool.submit(__import__, "openai")
 
 
-app = FastAPI(title=API_TITLE)
+def _start_inference_pool():
+    specs = {
+        task: _detector_spec(task, _model_path(task), _model_backend(task), _model_imgsz(task))
+        for task in ["parts", "damage", *_variant_keys]
+        if _model_path(task).exists()
+    }
+    if not specs:
+        return None
+    pool = InferencePool(
+        specs,
+        workers=INFERENCE_WORKERS,
+        threads=INFERENCE_THREADS_PER_WORKER,
+        warmup_sizes=WARMUP_IMAGE_SIZES,
+    )
+    pool.start()
+    return pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _inference_pool
+    _image_index.start()
+    if INFERENCE_WORKERS > 0:
+        _inference_pool = _start_inference_pool()
+    _job_store.prune(JOB_RETENTION_DAYS * 86400)
+    _chat_store.prune(CHAT_RETENTION_DAYS * 86400)
+    await _job_runner.start()
+    # Warm up in the background so /health answers while models load.
+    threading.Thread(target=_warm_up, name="warmup", daemon=True).start()
+    yield
+    await _job_runner.stop()
+    _image_index.stop()
+    if _inference_pool is not None:
+        _inference_pool.stop()
+
+
+app = FastAPI(title=API_TITLE, lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Cache", "ETag", "Server-Timing"],
 )
 
 
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    # Refuse oversized single-image uploads before the multipart body is spooled.
+    # /predict/batch carries many files, so it relies on the per-file check only.
+    length = request.headers.get("content-length")
+    if (
+        request.url.path in {"/predict", "/predict/all"}
+        and length is not None
+        and length.isdigit()
+        and int(length) > MAX_UPLOAD_BYTES + (64 << 10)
+    ):
+        return JSONResponse(
+            status_code=413, content={"detail": f"Upload exceeds {MAX_UPLOAD_BYTES} bytes."}
+        )
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    trace = metrics.begin()
+    response = await call_next(request)
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    if not trace.labels["cache"]:
+        trace.labels["cache"] = response.headers.get("X-Cache", "")
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = trace.server_timing()
+    body = response.body_iterator
+
+    async def observed_body():
+        # Observed once the body is fully sent, so streamed stages are included.
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            metrics.observe_request(trace, route, request.method, response.status_code)
+
+    response.body_iterator = observed_body()
+    return response
+
+
+def _detector_spec(task: str, path: Path, backend: str, imgsz: int | None = None) -> dict:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown model backend {backend!r}; expected one of {BACKENDS}")
+    spec = {
+        "weights_path": path,
+        "backend": backend,
+        "digest": _model_digest(task),
+        "cache_dir": ONNX_CACHE_DIR,
+        "imgsz": imgsz or MODEL_IMGSZ,
+        "inter_op_threads": ONNX_INTER_OP_THREADS,
+        "providers": ONNX_PROVIDERS,
+    }
+    if imgsz is not None:
+        # Variants pin their size on PyTorch too; the main models keep the trained size.
+        spec["pytorch_imgsz"] = imgsz
+    if backend == "onnx-int8":
+        spec["calibration_images"] = _calibration_images()
+    return spec
+
+
+def _load_detector(task: str, path: Path, backend: str, imgsz: int | None = None):
+    if _inference_pool is not None and task in _inference_pool.specs:
+        return _inference_pool.model(task, timeout=INFERENCE_READY_TIMEOUT_S)
+    return load_detector(
+        **_detector_spec(task, path, backend, imgsz), intra_op_threads=ONNX_INTRA_OP_THREADS
+    )
+
+
+@lru_cache(maxsize=1)
+def _calibration_images() -> list[str]:
+    try:
+        paths = sorted(p for p in MODEL_CALIBRATION_DIR.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    except FileNotFoundError:
+        return []
+    return [str(p) for p in paths[:MODEL_CALIBRATION_IMAGES]]
+
+
+def _model_key(task: str, model_variant: str) -> str:
+    return task if model_variant == FULL else f"{task}:{model_variant}"
+
+
+def _model_path(task: str) -> Path:
+    base, _, name = task.partition(":")
+    weights = MODEL_VARIANTS[base][name].weights if name else None
+    if weights is not None:
+        return MODELS_DIR / weights
+    return {"parts": PARTS_MODEL_PATH, "part_damage": PART_CLASSIFIER_MODEL_PATH}.get(base, DAMAGE_MODEL_PATH)
+
+
+def _model_imgsz(task: str) -> int | None:
+    """Input size of a variant; ``None`` for the main models."""
+    base, _, name = task.partition(":")
+    return MODEL_VARIANTS[base][name].imgsz if name else None
+
+
+@lru_cache(maxsize=None)
+def load_variant_model(task: str):
+    path = _model_path(task)
+    if not path.exists():
+        raise FileNotFoundError(f"Missing {task} model: {path}")
+    return _load_detector(task, path, _model_backend(task), _model_imgsz(task))
+
+
 @lru_cache(maxsize=1)
 def load_parts_model():
     if not PARTS_MODEL_PATH.exists():
         raise FileNotFoundError(f"Missing parts model: {PARTS_MODEL_PATH}")
-    return YOLO(str(PARTS_MODEL_PATH))
+    return _load_detector("parts", PARTS_MODEL_PATH, PARTS_MODEL_BACKEND)
 
 
 @lru_cache(maxsize=1)
 def load_damage_model():
     if not DAMAGE_MODEL_PATH.exists():
         raise FileNotFoundError(f"Missing damage model: {DAMAGE_MODEL_PATH}")
-    return YOLO(str(DAMAGE_MODEL_PATH))
+    return _load_detector("damage", DAMAGE_MODEL_PATH, DAMAGE_MODEL_BACKEND)
+
+
+@lru_cache(maxsize=1)
+def load_part_classifier_model():
+    if not PART_CLASSIFIER_MODEL_PATH.exists():
+        raise FileNotFoundError(f"Missing part damage classifier: {PART_CLASSIFIER_MODEL_PATH}")
+    from ultralytics import YOLO
+
+    # Always PyTorch in-process: the ONNX backend and the worker pool handle detectors only.
+    return YOLO(str(PART_CLASSIFIER_MODEL_PATH))
 
 
 @lru_cache(maxsize=1)
@@ -80,10 +445,15 @@ def load_azure_client():
         raise FileNotFoundError(
             "Missing AZURE_OPENAI_ENDPOINT or AZURE_OPENAI_KEY in backend/.env"
         )
-    return AzureOpenAI(
+    return build_client(
+        endpoint=endpoint,
         api_key=api_key,
-        azure_endpoint=endpoint,
-        api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview"),
+        # Streamed completions only report token usage from 2024-09-01-preview on.
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-10-21"),
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        max_connections=LLM_MAX_CONNECTIONS,
+        timeout=LLM_TIMEOUT_S,
+        max_retries=LLM_MAX_RETRIES,
     )
 
 
@@ -92,54 +462,369 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/ready")
+def ready(response: Response):
+    models = {task: dict(status) for task, status in _model_status.items()}
+    # Variants are optional: the adaptive policy only switches to ones that are ready.
+    is_ready = all(models[task]["status"] == "ready" for task in WARMUP_MODELS)
+    if not is_ready:
+        response.status_code = 503
+    return {"ready": is_ready, "models": models}
+
+
+@app.get("/stats")
+def stats():
+    return {
+        "batching": {task: batcher.stats() for task, batcher in _batchers.items()},
+        "cache": _result_cache.stats(),
+        "inference_pool": _inference_pool.stats() if _inference_pool is not None else None,
+        "jobs": _job_runner.stats(),
+        "llm": _llm_usage_stats(),
+        "variants": {task: selector.stats() for task, selector in _variant_selectors.items()},
+    }
+
+
 @app.get("/images")
-def list_images():
-    if not IMAGE_DIR.exists():
+def list_images(
+    limit: int | None = Query(default=None, ge=1, le=1000),
+    cursor: str | None = None,
+    prefix: str | None = None,
+    sort: Literal["name", "mtime", "size"] = "name",
+    order: Literal["asc", "desc"] = "asc",
+    details: bool = False,
+):
+    if not IMAGE_DIR.exists() and _image_shards is None:
         raise HTTPException(status_code=500, detail="Image directory not found.")
-    files = sorted(
-        [p.name for p in IMAGE_DIR.iterdir() if p.suffix.lower() in {".jpg", ".jpeg", ".png"}]
-    )
-    return {"images": files}
+    try:
+        entries, next_cursor = _image_index.page(
+            limit=limit,
+            cursor=cursor,
+            prefix=prefix,
+            sort=sort,
+            descending=order == "desc",
+        )
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor.") from exc
+    images = [entry.as_dict() if details else entry.name for entry in entries]
+    return {"images": images, "next_cursor": next_cursor, "total": len(_image_index)}
+
+
+def _resolve_image_path(name: str) -> Path:
+    image_path = IMAGE_DIR / name
+    if not image_path.resolve().is_relative_to(IMAGE_DIR.resolve()) or not image_path.is_file():
+        raise HTTPException(status_code=404, detail="Image not found.")
+    return image_path
+
+
+def _packed_image(name: str):
+    """Zero-copy slice of the shard holding ``name``, or ``None``."""
+    return _image_shards.get(name) if _image_shards is not None else None
+
+
+def _read_image(name: str):
+    """Bytes of a dataset image, from its shard when packed, else from IMAGE_DIR."""
+    packed = _packed_image(name)
+    if packed is not None:
+        return packed
+    return _resolve_image_path(name).read_bytes()
+
+
+def _image_derivative(name: str, variant: str) -> Path:
+    packed = _packed_image(name)
+    if packed is not None:
+        _, mtime_ns = _image_shards.stat(name)
+        return _derivatives.get(IMAGE_DIR / name, variant, packed, mtime_ns)
+    return _derivatives.get(_resolve_image_path(name), variant)
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
 
 
 @app.get("/images/{filename}")
-def get_image(filename: str):
+def get_image(
+    filename: str,
+    request: Request,
+    variant: Literal["original", "thumb", "display"] = "original",
+):
     # Decode the filename in case it was URL-encoded
     from urllib.parse import unquote
     decoded_filename = unquote(filename)
-    image_path = IMAGE_DIR / decoded_filename
-    if not image_path.exists():
-        raise HTTPException(status_code=404, detail="Image not found.")
-    return FileResponse(image_path)
+    packed = _packed_image(decoded_filename) if variant == "original" else None
+    if packed is not None:
+        size, mtime_ns = _image_shards.stat(decoded_filename)
+    else:
+        if variant != "original":
+            image_path = _image_derivative(decoded_filename, variant)
+        else:
+            image_path = _resolve_image_path(decoded_filename)
+        stat = image_path.stat()
+        size, mtime_ns = stat.st_size, stat.st_mtime_ns
+
+    etag = f'"{mtime_ns:x}-{size:x}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(mtime_ns / 1e9, usegmt=True),
+        "Cache-Control": IMAGE_CACHE_CONTROL,
+    }
+    if _not_modified(request, etag, mtime_ns / 1e9):
+        return Response(status_code=304, headers=headers)
+    if packed is not None:
+        return Response(bytes(packed), media_type=mimetypes.guess_type(decoded_filename)[0], headers=headers)
+    return FileResponse(image_path, headers=headers)
+
+
+@app.get("/images/{filename}/duplicates")
+def image_duplicates(
+    filename: str,
+    max_distance: int = Query(default=8, ge=0, le=64),
+    limit: int = Query(default=20, ge=1, le=500),
+):
+    """Images whose perceptual hash is within ``max_distance`` bits of this one."""
+    from urllib.parse import unquote
+    name = unquote(filename)
+    data = _read_image(name)
+    digest = _content_digest(data)
+    image_hash = _image_hash(digest, data)
+    matches = [
+        {"image_name": name, "sha256": other, "distance": distance}
+        for distance, other, name in _hash_index.search(image_hash, max_distance, limit + 1)
+        if other != digest
+    ]
+    return {
+        "image_name": name,
+        "phash": f"{image_hash:016x}",
+        "duplicates": matches[:limit],
+        "indexed": len(_hash_index),
+    }
+
+
+def _load_model(task: str):
+    # Serialized per task so a request arriving during warmup waits for the
+    # load already in progress instead of loading the weights a second time.
+    with _model_locks[task]:
+        if task in _variant_keys:
+            model = load_variant_model(task)
+        elif task == "parts":
+            model = load_parts_model()
+        elif task == "part_damage":
+            model = load_part_classifier_model()
+        else:
+            model = load_damage_model()
+        # Pool workers run the same models, so they share cache entries with in-process ones.
+        _loaded_backends[task] = getattr(model, "backend", "pytorch").removeprefix("pool:")
+        return model
+
+
+def _content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _image_hash(digest: str, data: bytes | None = None, image: Image.Image | None = None) -> int:
+    """Perceptual hash of an image, from the index when it was seen before."""
+    image_hash = _hash_index.get(digest)
+    if image_hash is None:
+        try:
+            image_hash = phash(image) if image is not None else phash_bytes(data)
+        except Exception as exc:
+            raise HTTPException(status_code=400, detail="Unreadable image.") from exc
+        _hash_index.add(image_hash, digest)
+    return image_hash
+
+
+def _near_duplicate(digest: str, image_hash: int, key_for):
+    """Cached result for a different image within DUPLICATE_MAX_DISTANCE of this one.
+
+    ``key_for(digest)`` gives the cache key the result would have for that image.
+    Results that were themselves borrowed are skipped, so reuse never chains.
+    """
+    if DUPLICATE_MAX_DISTANCE < 0:
+        return None
+    for distance, other, name in _hash_index.search(image_hash, DUPLICATE_MAX_DISTANCE):
+        if other == digest:
+            continue
+        result = _result_cache.get(key_for(other))
+        if result is not None and "near_duplicate" not in result:
+            return {
+                **result,
+                "near_duplicate": {"sha256": other, "image_name": name, "distance": distance},
+            }
+    return None
+
+
+@lru_cache(maxsize=8)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _model_digest(task: str) -> str:
+    # Pinned alongside the lru_cached model so cache keys always describe the
+    # weights actually in memory; replacing the .pt file changes the key on restart.
+    path = _model_path(task)
+    stat = path.stat()
+    return _file_digest(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _result_arrays(result):
+    """Pull boxes, scores and class ids out of a result once, as NumPy arrays."""
+    boxes = result.boxes if result is not None else None
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+    boxes = boxes.cpu().numpy()
+    xyxy = np.asarray(boxes.xyxy, dtype=np.float32).reshape(-1, 4)
+    conf = (
+        np.asarray(boxes.conf, dtype=np.float32).reshape(-1)
+        if boxes.conf is not None
+        else np.zeros(len(xyxy), dtype=np.float32)
+    )
+    cls = (
+        np.asarray(boxes.cls).reshape(-1).astype(np.int64)
+        if boxes.cls is not None
+        else np.zeros(len(xyxy), dtype=np.int64)
+    )
+    return xyxy, conf, cls
+
+
+def _format_result(result, image: Image.Image):
+    names = (result.names if result is not None else None) or {}
+    xyxy, conf, cls = _result_arrays(result)
+    labels = {cls_id: names.get(cls_id, str(cls_id)) for cls_id in set(cls.tolist())}
+    predictions = [
+        {"class_id": cls_id, "label": labels[cls_id], "confidence": score, "bbox": bbox}
+        for cls_id, score, bbox in zip(cls.tolist(), conf.tolist(), xyxy.tolist())
+    ]
+    return {"width": image.width, "height": image.height, "predictions": predictions}
+
+
+def _to_columnar(payload: dict):
+    """Parallel arrays instead of one dict per box; much smaller JSON on crowded images."""
+    predictions = payload["predictions"]
+    columnar = {key: value for key, value in payload.items() if key != "predictions"}
+    columnar["predictions"] = {
+        field: [prediction[field] for prediction in predictions]
+        for field in ("class_id", "label", "confidence", "bbox")
+    }
+    return columnar
+
+
+def _run_batch_prediction(model, images: list[Image.Image], task: str | None = None):
+    results = model.predict(images, verbose=False) or []
+    if task is not None:
+        speed = getattr(results[0], "speed", None) if results else None
+        metrics.observe_model_batch(task, getattr(model, "backend", "pytorch"), speed, len(images))
+    results = list(results) + [None] * (len(images) - len(results))
+    return [_format_result(result, image) for result, image in zip(results, images)]
+
+
+def _run_batch_classification(model, images: list[Image.Image], task: str = "part_damage"):
+    """One forward pass of the classifier over all crops; per crop, the class
+    probabilities plus the probability that the part is damaged at all."""
+    results = model.predict(images, imgsz=PART_CLASSIFIER_IMGSZ, verbose=False) or []
+    if results:
+        metrics.observe_model_batch(task, "pytorch", getattr(results[0], "speed", None), len(images))
+    outputs = []
+    for result in results:
+        names = result.names or {}
+        probs = result.probs.data.cpu().numpy()
+        top = int(probs.argmax())
+        negative = sum(
+            float(p) for i, p in enumerate(probs) if names.get(i, "").lower() in PART_CLASSIFIER_NEGATIVE_LABELS
+        )
+        outputs.append(
+            {
+                "label": names.get(top, str(top)),
+                "confidence": float(probs[top]),
+                "damage_score": 1.0 - negative,
+                "scores": {names.get(i, str(i)): float(p) for i, p in enumerate(probs)},
+            }
+        )
+    return outputs
 
 
 def _run_prediction(model, image: Image.Image):
-    results = model.predict(image, verbose=False)
-    if not results:
-        return {"width": image.width, "height": image.height, "predictions": []}
-
-    result = results[0]
-    names = result.names or {}
-    predictions = []
-    if result.boxes is not None:
-        for box in result.boxes:
-            cls_id = int(box.cls[0]) if box.cls is not None else 0
-            conf = float(box.conf[0]) if box.conf is not None else 0.0
-            x1, y1, x2, y2 = [float(v) for v in box.xyxy[0].tolist()]
-            predictions.append(
-                {
-                    "class_id": cls_id,
-                    "label": names.get(cls_id, str(cls_id)),
-                    "confidence": conf,
-                    "bbox": [x1, y1, x2, y2],
-                }
+    return _run_batch_prediction(model, [image])[0]
+
+
+def _get_batcher(task: str) -> MicroBatcher:
+    # One scheduler per model so concurrent /predict calls share a single
+    # batched forward pass instead of queueing on the model one by one.
+    with _batchers_lock:
+        if task == "part_damage" and task not in _batchers:
+            # Crops are small, so the classifier takes much larger batches.
+            _batchers[task] = MicroBatcher(
+                task,
+                lambda images: _run_batch_classification(_load_model(task), images, task),
+                max_batch_size=PART_CLASSIFIER_MAX_BATCH,
+                max_wait_ms=PREDICT_MAX_WAIT_MS,
+            )
+        if task not in _batchers:
+            _batchers[task] = MicroBatcher(
+                task,
+                lambda images: _run_batch_prediction(_load_model(task), images, task),
+                max_batch_size=PREDICT_MAX_BATCH_SIZE,
+                max_wait_ms=PREDICT_MAX_WAIT_MS,
+                # One batch in flight per pool worker; in-process models run one at a time.
+                concurrency=INFERENCE_WORKERS if _inference_pool is not None else 1,
             )
+        return _batchers[task]
+
+
+def _predictions_to_arrays(predictions: list[dict]):
+    if not predictions:
+        return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+    return (
+        np.array([p["bbox"] for p in predictions], dtype=np.float32).reshape(-1, 4),
+        np.array([p["confidence"] for p in predictions], dtype=np.float32),
+        np.array([p["class_id"] for p in predictions], dtype=np.int64),
+    )
+
+
+def _run_tiled_prediction(task: str, image: Image.Image, tiles: list[tuple[int, int, int, int]]):
+    """Predict overlapping tiles (plus the full frame) and merge them into one result."""
+    windows = list(tiles)
+    if TILE_INCLUDE_FULL or not windows:
+        windows.append((0, 0, image.width, image.height))
+    batcher = _get_batcher(task)
+    # Submitted together so the batcher packs the tiles into full batches.
+    futures = [batcher.submit(image.crop(window)) for window in windows]
+    results = [future.result()["predictions"] for future in futures]
+    labels = {p["class_id"]: p["label"] for predictions in results for p in predictions}
+    xyxy, conf, cls = merge_tiles(
+        [_predictions_to_arrays(predictions) for predictions in results],
+        [(x0, y0) for x0, y0, _, _ in windows],
+        iou_threshold=TILE_MERGE_IOU,
+    )
+    predictions = [
+        {"class_id": cls_id, "label": labels[cls_id], "confidence": score, "bbox": bbox}
+        for cls_id, score, bbox in zip(cls.tolist(), conf.tolist(), xyxy.tolist())
+    ]
     return {"width": image.width, "height": image.height, "predictions": predictions}
 
 
 def _get_parts_list():
     try:
-        model = load_parts_model()
+        model = _load_model("parts")
         names = model.names or {}
         return [names[i] for i in sorted(names.keys())]
     except Exception:
@@ -147,14 +832,160 @@ def _get_parts_list():
 
 
 def _image_to_data_url(image: Image.Image):
-    from io import BytesIO
-
     buffer = BytesIO()
     image.save(buffer, format="JPEG", quality=90)
     encoded = base64.b64encode(buffer.getvalue()).decode("utf-8")
     return f"data:image/jpeg;base64,{encoded}"
 
 
+def _image_name(image_path: Path) -> str:
+    """Name of a dataset image relative to IMAGE_DIR, subdirectories included."""
+    return image_path.relative_to(IMAGE_DIR).as_posix()
+
+
+def _llm_data_url(image_path: Path):
+    # The bounded-size derivative is already a JPEG, so it is sent as-is.
+    encoded = base64.b64encode(_image_derivative(_image_name(image_path), "llm").read_bytes()).decode("utf-8")
+    return f"data:image/jpeg;base64,{encoded}"
+
+
+def _crop_regions(detections: dict):
+    """Pick up to LLM_MAX_CROPS regions to show the model: damaged parts first,
+    then damage boxes that touch no detected part. Returns ``(label, bbox)`` pairs."""
+    parts = detections["parts"]
+    damage = detections["damage"]
+    part_scores = {}
+    on_part = set()
+    for overlap in detections["overlaps"]:
+        on_part.add(overlap["damage_index"])
+        score = damage[overlap["damage_index"]]["confidence"] * overlap["coverage"]
+        part_scores[overlap["part_index"]] = max(part_scores.get(overlap["part_index"], 0.0), score)
+    regions = [
+        (score, parts[index]["label"], parts[index]["bbox"]) for index, score in part_scores.items()
+    ]
+    regions += [
+        (prediction["confidence"], f"{prediction['label']} region", prediction["bbox"])
+        for index, prediction in enumerate(damage)
+        if index not in on_part
+    ]
+    regions.sort(key=lambda region: region[0], reverse=True)
+    return [(label, bbox) for _, label, bbox in regions[:LLM_MAX_CROPS]]
+
+
+def _crop_data_urls(data: bytes, regions: list):
+    image, _ = _decode_image(data, full_resolution=True)
+    urls = []
+    for _, (x1, y1, x2, y2) in regions:
+        margin_x, margin_y = (x2 - x1) * LLM_CROP_MARGIN, (y2 - y1) * LLM_CROP_MARGIN
+        crop = image.crop(
+            (
+                max(0, int(x1 - margin_x)),
+                max(0, int(y1 - margin_y)),
+                min(image.width, int(x2 + margin_x) + 1),
+                min(image.height, int(y2 + margin_y) + 1),
+            )
+        )
+        crop.thumbnail((LLM_CROP_MAX_SIDE, LLM_CROP_MAX_SIDE))
+        urls.append(_image_to_data_url(crop))
+    return urls
+
+
+def _box_text(bbox) -> str:
+    return "[" + ", ".join(str(round(value)) for value in bbox) + "]"
+
+
+def _grounded_prompt(detections: dict, crop_labels: list[str]):
+    parts = detections["parts"]
+    damage = detections["damage"]
+    touching = {}
+    for overlap in detections["overlaps"]:
+        touching.setdefault(overlap["damage_index"], []).append(
+            f"{overlap['part']} ({overlap['coverage']:.0%})"
+        )
+    part_lines = [f"- {p['label']} {_box_text(p['bbox'])}" for p in parts] or ["- none detected"]
+    damage_lines = [
+        f"- {d['label']} ({d['confidence']:.2f}) {_box_text(d['bbox'])}"
+        + (f" on {', '.join(touching[index])}" if index in touching else "")
+        for index, d in enumerate(damage)
+    ] or ["- none detected"]
+    if crop_labels:
+        view = f"The images are close-up crops of, in order: {', '.join(crop_labels)}."
+    else:
+        view = "The image is the full photo."
+    return (
+        "You are an auto damage assessor. Object detectors found these car parts and damage "
+        f"regions in a {detections['width']}x{detections['height']} photo "
+        "(boxes are x1, y1, x2, y2 pixels; percentages are how much of the damage box lies on the part).\n"
+        "Parts:\n" + "\n".join(part_lines) + "\n"
+        "Damage:\n" + "\n".join(damage_lines) + "\n"
+        f"{view} Confirm or reject each damage region from what you see and return JSON only:\n"
+        "{\n"
+        '  "summary": "concise narrative, 150-250 words",\n'
+        '  "overall_severity": "low|medium|high",\n'
+        '  "recommended_actions": "one short paragraph",\n'
+        '  "items": [\n'
+        "    {\n"
+        '      "part": "one of the detected parts",\n'
+        '      "damage_type": "scratch|dent|crack|paint|glass|unknown",\n'
+        '      "severity": "minor|moderate|severe",\n'
+        '      "evidence": "one sentence",\n'
+        '      "repair_recommendation": "replace|repair|refinish|inspect",\n'
+        '      "estimated_repair_cost_usd": "range string like 200-600",\n'
+        '      "description": "one or two sentences"\n'
+        "    }\n"
+        "  ]\n"
+        "}\n"
+        "Only include items for damage you can see on the detected parts."
+    )
+
+
+def _record_llm_usage(mode: str, usage: dict):
+    with _llm_usage_lock:
+        totals = _llm_usage.setdefault(
+            mode,
+            {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "latency_ms": 0.0},
+        )
+        totals["calls"] += 1
+        totals["prompt_tokens"] += usage.get("prompt_tokens") or 0
+        totals["completion_tokens"] += usage.get("completion_tokens") or 0
+        totals["latency_ms"] += usage["latency_ms"]
+
+
+def _llm_usage_stats():
+    with _llm_usage_lock:
+        return {
+            mode: {
+                **totals,
+                "latency_ms": round(totals["latency_ms"], 1),
+                "mean_prompt_tokens": totals["prompt_tokens"] / totals["calls"],
+                "mean_completion_tokens": totals["completion_tokens"] / totals["calls"],
+                "mean_latency_ms": round(totals["latency_ms"] / totals["calls"], 1),
+            }
+            for mode, totals in _llm_usage.items()
+        }
+
+
+def _usage_summary(meta: dict, usage, started: float):
+    summary = {
+        **meta,
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "total_tokens": getattr(usage, "total_tokens", None),
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    _record_llm_usage(meta["mode"], summary)
+    return summary
+
+
+async def _complete(client, **kwargs):
+    try:
+        return await client.complete(**kwargs)
+    except LLMError as exc:
+        raise HTTPException(
+            status_code=502, detail=f"Azure OpenAI request failed: {exc}"
+        ) from exc
+
+
 def _extract_json(text: str):
     try:
         return json.loads(text)
@@ -169,9 +1000,62 @@ def _extract_json(text: str):
     return None
 
 
+PredictionFormat = Literal["records", "columnar"]
+
+
+def _is_placeholder_item(item: dict) -> bool:
+    return (item.get("part") or "").lower() in PLACEHOLDER_VALUES and (
+        item.get("damage_type") or ""
+    ).lower() in PLACEHOLDER_VALUES
+
+
+def _finalize_report(content: str):
+    """Parse the model's reply into a report; returns (report, cacheable)."""
+    parsed = _extract_json(content or "")
+    if not parsed:
+        # Unparseable replies are not cached so a retry gets a fresh completion.
+        return {"raw": content or "", "summary": content or "", "overall_severity": "", "items": []}, False
+
+    if not parsed.get("summary") and content:
+        parsed["raw"] = content
+        parsed["summary"] = content
+
+    # Filter out placeholder unknown rows unless they are the only findings.
+    items = parsed.get("items") or []
+    filtered = [item for item in items if not _is_placeholder_item(item)]
+    if filtered:
+        parsed["items"] = filtered
+    return parsed, True
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _sse_response(events, cache_status: str | None = None):
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if cache_status:
+        headers["X-Cache"] = cache_status
+    return StreamingResponse(events, media_type="text/event-stream", headers=headers)
+
+
+ReportMode = Literal["full", "grounded"]
+
+
 class DamageAnalysisRequest(BaseModel):
     image_name: str | None = None
     parts: list[str] = Field(default_factory=list)
+    # "grounded" runs the detectors first and prompts with their findings only.
+    mode: ReportMode = "full"
+    crops: bool = False
+
+
+class JobRequest(BaseModel):
+    image_names: list[str] = Field(min_length=1)
+    parts: list[str] = Field(default_factory=list)
+    detections: bool = True
+    mode: ReportMode = "full"
+    crops: bool = False
 
 
 class ChatMessage(BaseModel):
@@ -180,52 +1064,560 @@ class ChatMessage(BaseModel):
 
 
 class ChatRequest(BaseModel):
-    image_name: str
-    report: dict  # The damage analysis report
-    messages: list[ChatMessage]  # Chat history
+    # Session mode: the report_id from /damage-analysis (first turn) or the
+    # session_id from the previous reply, plus only the new message.
+    session_id: str | None = None
+    report_id: str | None = None
+    message: str | None = None
+    # Stateless mode: the full report and chat history on every call.
+    image_name: str | None = None
+    report: dict | None = None
+    messages: list[ChatMessage] = Field(default_factory=list)
+
+
+def _read_upload(upload: UploadFile) -> bytes:
+    try:
+        return read_upload(upload.file, MAX_UPLOAD_BYTES)
+    except ImageTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+
+
+def _read_image_source(image: UploadFile | None, image_name: str | None) -> bytes:
+    if image is None and image_name is None:
+        raise HTTPException(status_code=400, detail="Provide image file or image_name.")
+
+    if image is not None:
+        return _read_upload(image)
+    return _read_image(image_name)
+
+
+def _decode_image(data: bytes, full_resolution: bool = False):
+    """Upright RGB image plus its full-resolution size. Unless ``full_resolution``,
+    JPEGs are decoded at reduced scale, just large enough for MODEL_IMGSZ."""
+    target_side = MODEL_IMGSZ if DECODE_DRAFT and not full_resolution else None
+    try:
+        return decode_image(data, target_side, MAX_IMAGE_PIXELS)
+    except (ImageTooLarge, Image.DecompressionBombError) as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except Exception as exc:
+        # Not just UnidentifiedImageError: ultralytics patches Image.open to retry
+        # unknown formats through an optional HEIF plugin, which may be missing.
+        raise HTTPException(status_code=400, detail="Unreadable image.") from exc
+
+
+def _rescale_result(result: dict, original_size: tuple[int, int]) -> dict:
+    """Map a prediction made on a reduced-scale decode back to full-resolution pixels."""
+    width, height = original_size
+    if (result["width"], result["height"]) == (width, height):
+        return result
+    scale_x, scale_y = width / result["width"], height / result["height"]
+    predictions = [
+        {
+            **prediction,
+            "bbox": [
+                prediction["bbox"][0] * scale_x,
+                prediction["bbox"][1] * scale_y,
+                prediction["bbox"][2] * scale_x,
+                prediction["bbox"][3] * scale_y,
+            ],
+        }
+        for prediction in result["predictions"]
+    ]
+    return {**result, "width": width, "height": height, "predictions": predictions}
+
+
+def _model_backend(task: str) -> str:
+    base, _, name = task.partition(":")
+    if name:
+        return MODEL_VARIANTS[base][name].backend
+    return PARTS_MODEL_BACKEND if task == "parts" else DAMAGE_MODEL_BACKEND
+
+
+def _served_backend(task: str) -> str:
+    """Backend the loaded model runs on; the configured one until it is loaded.
+
+    Never loads the model, so a cache lookup stays a key lookup. Keys built before the
+    load are only used for lookups: results are stored under keys built after it.
+    """
+    return _loaded_backends.get(task) or _model_backend(task)
+
+
+def _prediction_cache_key(task: str, digest: str, *variant, model_variant: str = FULL) -> str:
+    key = _model_key(task, model_variant)
+    try:
+        return make_key(
+            digest,
+            "predict",
+            task,
+            _model_digest(key),
+            _served_backend(key),
+            # Decode settings change the pixels the model sees.
+            "upright",
+            MODEL_IMGSZ if DECODE_DRAFT else None,
+            *variant,
+            # Full-model keys are unchanged, so their cached results stay valid.
+            *(() if model_variant == FULL else ("variant", model_variant, _model_imgsz(key))),
+        )
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=503, detail=f"Missing {key} model.") from exc
+
+
+def _choose_variant(task: str, requested: str | None = None) -> str:
+    """Model variant to serve ``task`` with: ``requested``, else per VARIANT_POLICY."""
+    names = [FULL, *MODEL_VARIANTS.get(task, {})]
+    if requested is not None:
+        if requested not in names:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown {task} model variant {requested!r}; expected one of {names}."
+            )
+        return requested
+    selector = _variant_selectors.get(task)
+    if selector is None:
+        return FULL
+    if VARIANT_POLICY != "adaptive":
+        return VARIANT_POLICY if VARIANT_POLICY in names else FULL
+    queue_depth = sum(
+        batcher.queue_depth()
+        for key, batcher in list(_batchers.items())
+        if key == task or key.startswith(f"{task}:")
+    )
+    return selector.choose(
+        queue_depth,
+        ready=lambda name: _model_status[_model_key(task, name)]["status"] == "ready",
+    )
+
+
+def _submit_prediction(task: str, model_variant: str, image: Image.Image):
+    """Queue ``image`` on the variant's batcher; its latency feeds the adaptive selector."""
+    future = _get_batcher(_model_key(task, model_variant)).submit(image)
+    selector = _variant_selectors.get(task)
+    if selector is not None:
+        started = time.perf_counter()
+        future.add_done_callback(
+            lambda _: selector.observe(model_variant, time.perf_counter() - started)
+        )
+    return future
+
+
+def _ensure_model(task: str):
+    try:
+        _load_model(task)
+    except (FileNotFoundError, PoolError) as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
 
 
 @app.post("/predict")
 def predict(
     task: Literal["parts", "damage"],
+    response: Response,
     image: UploadFile | None = File(default=None),
     image_name: str | None = None,
+    output_format: PredictionFormat = Query(default="records", alias="format"),
+    tiled: bool = False,
+    tile_size: int = Query(default=TILE_SIZE, ge=128, le=4096),
+    tile_overlap: float = Query(default=TILE_OVERLAP, ge=0.0, le=0.9),
+    model_variant: str | None = None,
 ):
-    if image is None and image_name is None:
-        raise HTTPException(status_code=400, detail="Provide image file or image_name.")
+    if tiled and task != "damage":
+        raise HTTPException(status_code=400, detail="Tiled inference is only available for task=damage.")
+    if tiled and model_variant not in (None, FULL):
+        raise HTTPException(status_code=400, detail="Tiled inference always uses the full model.")
+    metrics.label(task=task)
+    with metrics.stage("read"):
+        data = _read_image_source(image, image_name)
+    variant = ("tiled", tile_size, tile_overlap, TILE_MERGE_IOU, TILE_INCLUDE_FULL) if tiled else ()
+    digest = _content_digest(data)
 
-    if image is not None:
-        pil_image = Image.open(image.file).convert("RGB")
-    else:
-        if image_name is None:
-            raise HTTPException(status_code=400, detail="image_name is required.")
-        image_path = IMAGE_DIR / image_name
-        if not image_path.exists():
-            raise HTTPException(status_code=404, detail="Image not found.")
-        pil_image = Image.open(image_path).convert("RGB")
+    def respond(result: dict, cache_status: str, served: str):
+        response.headers["X-Cache"] = cache_status
+        response.headers["X-Model-Variant"] = served
+        result = {**result, "model_variant": served}
+        return _to_columnar(result) if output_format == "columnar" else result
 
-    try:
-        if task == "parts":
-            model = load_parts_model()
+    # A cached full-model result beats running any variant, so it is checked before
+    # choosing one (unless a variant was asked for by name).
+    with metrics.stage("cache"):
+        cache_key = _prediction_cache_key(task, digest, *variant)
+        cached = _result_cache.get(cache_key) if model_variant in (None, FULL) else None
+        if cached is None:
+            model_variant = FULL if tiled else _choose_variant(task, model_variant)
+            if model_variant != FULL:
+                cache_key = _prediction_cache_key(task, digest, *variant, model_variant=model_variant)
+                cached = _result_cache.get(cache_key)
+    if cached is not None:
+        return respond(cached, "hit", model_variant or FULL)
+
+    _ensure_model(_model_key(task, model_variant))
+    # Rebuilt now the model is loaded, so the result is stored under the backend it runs on.
+    cache_key = _prediction_cache_key(task, digest, *variant, model_variant=model_variant)
+    with metrics.stage("decode"):
+        # Tiles exist to recover full-resolution detail, so they skip the reduced decode.
+        pil_image, original_size = _decode_image(data, full_resolution=tiled)
+    with metrics.stage("dedup"):
+        near = _near_duplicate(
+            digest,
+            _image_hash(digest, image=pil_image),
+            lambda other: _prediction_cache_key(task, other, *variant, model_variant=model_variant),
+        )
+    if near is not None:
+        result = _rescale_result(near, original_size)
+        _result_cache.set(cache_key, result)
+        return respond(result, "near-hit", model_variant)
+    with metrics.stage("model"):
+        if tiled:
+            tiles = tile_grid(pil_image.width, pil_image.height, tile_size, tile_overlap)
+            if len(tiles) > TILE_MAX_COUNT:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{len(tiles)} tiles exceeds TILE_MAX_COUNT={TILE_MAX_COUNT}; "
+                    "use a larger tile_size or smaller tile_overlap.",
+                )
+            result = _run_tiled_prediction(task, pil_image, tiles)
         else:
-            model = load_damage_model()
-    except FileNotFoundError as exc:
-        raise HTTPException(status_code=503, detail=str(exc)) from exc
+            result = _submit_prediction(task, model_variant, pil_image).result()
+            result = _rescale_result(result, original_size)
+    _result_cache.set(cache_key, result)
+    return respond(result, "miss", model_variant)
 
-    return _run_prediction(model, pil_image)
 
+def _combined_prediction(data: bytes, min_iou: float = 0.0, adaptive: bool = True):
+    """Parts and damage in one pass: one decode, both models in parallel, plus a join.
 
-@app.post("/damage-analysis")
-def damage_analysis(payload: DamageAnalysisRequest = Body(default=None)):
-    payload = payload or DamageAnalysisRequest()
-    if not payload.image_name:
-        raise HTTPException(status_code=400, detail="Provide image_name.")
+    Tasks without a cached full-model result run on the variant chosen by load unless
+    ``adaptive`` is off. Returns ``(payload, cache_status)``.
+    """
+    digest = _content_digest(data)
+    tasks = ("parts", "damage")
+    cache_keys = {task: _prediction_cache_key(task, digest) for task in tasks}
+    results = {task: _result_cache.get(cache_keys[task]) for task in tasks}
+    served = dict.fromkeys(tasks, FULL)
+
+    missing = [task for task in tasks if results[task] is None]
+    cache_status = "miss" if missing else "hit"
+    if missing:
+        for task in missing:
+            _ensure_model(task)
+            # Rebuilt now the model is loaded, so results are stored under its real backend.
+            cache_keys[task] = _prediction_cache_key(task, digest)
+        with metrics.stage("decode"):
+            pil_image, original_size = _decode_image(data)
+        with metrics.stage("dedup"):
+            image_hash = _image_hash(digest, image=pil_image)
+            for task in missing:
+                near = _near_duplicate(
+                    digest, image_hash, lambda other: _prediction_cache_key(task, other)
+                )
+                if near is not None:
+                    results[task] = _rescale_result(near, original_size)
+                    _result_cache.set(cache_keys[task], results[task])
+        if all(results[task] is not None for task in missing):
+            cache_status = "near-hit"
+        missing = [task for task in missing if results[task] is None]
+        for task in missing:
+            served[task] = _choose_variant(task) if adaptive else FULL
+            if served[task] != FULL:
+                cache_keys[task] = _prediction_cache_key(task, digest, model_variant=served[task])
+                results[task] = _result_cache.get(cache_keys[task])
+                if results[task] is None:
+                    _ensure_model(_model_key(task, served[task]))
+                    cache_keys[task] = _prediction_cache_key(task, digest, model_variant=served[task])
+        missing = [task for task in missing if results[task] is None]
+        # Each model has its own batcher thread, so both forward passes overlap.
+        with metrics.stage("model"):
+            futures = {task: _submit_prediction(task, served[task], pil_image) for task in missing}
+            for task, future in futures.items():
+                results[task] = _rescale_result(future.result(), original_size)
+                _result_cache.set(cache_keys[task], results[task])
+
+    parts = results["parts"]["predictions"]
+    damage = results["damage"]["predictions"]
+    overlaps = [
+        {
+            "damage_index": damage_index,
+            "part_index": part_index,
+            "damage": damage[damage_index]["label"],
+            "part": parts[part_index]["label"],
+            "iou": iou,
+            "coverage": coverage,
+        }
+        for damage_index, part_index, iou, coverage in overlap_join(
+            [prediction["bbox"] for prediction in damage],
+            [prediction["bbox"] for prediction in parts],
+            min_iou=min_iou,
+        )
+    ]
+    return {
+        "width": results["parts"]["width"],
+        "height": results["parts"]["height"],
+        "parts": parts,
+        "damage": damage,
+        "overlaps": overlaps,
+        "model_variants": served,
+    }, cache_status
+
+
+@app.post("/predict/all")
+def predict_all(
+    response: Response,
+    image: UploadFile | None = File(default=None),
+    image_name: str | None = None,
+    min_iou: float = Query(default=0.0, ge=0.0, le=1.0),
+):
+    """Parts and damage in one pass: one decode, both models in parallel, plus a join."""
+    metrics.label(task="all")
+    with metrics.stage("read"):
+        data = _read_image_source(image, image_name)
+    payload, cache_status = _combined_prediction(data, min_iou)
+    response.headers["X-Cache"] = cache_status
+    return payload
 
-    image_path = IMAGE_DIR / (payload.image_name or "")
-    if not image_path.exists():
-        raise HTTPException(status_code=404, detail="Image not found.")
-    pil_image = Image.open(image_path).convert("RGB")
 
+def _part_crops(image: Image.Image, predictions: list[dict]):
+    crops = []
+    for prediction in predictions:
+        x1, y1, x2, y2 = prediction["bbox"]
+        margin_x, margin_y = (x2 - x1) * PART_CROP_MARGIN, (y2 - y1) * PART_CROP_MARGIN
+        crops.append(
+            image.crop(
+                (
+                    max(0, int(x1 - margin_x)),
+                    max(0, int(y1 - margin_y)),
+                    min(image.width, int(x2 + margin_x) + 1),
+                    min(image.height, int(y2 + margin_y) + 1),
+                )
+            )
+        )
+    return crops
+
+
+def _part_damage_prediction(data: bytes):
+    """Detect parts, then score every part crop with the damage classifier.
+
+    All crops of an image go to the classifier batcher together, so they share a
+    forward pass (with crops from concurrent requests). Returns ``(payload, cache_status)``.
+    """
+    digest = _content_digest(data)
+    key_parts = (
+        "part-damage",
+        _model_digest("part_damage") if PART_CLASSIFIER_MODEL_PATH.exists() else None,
+        PART_CROP_MARGIN,
+        PART_CLASSIFIER_IMGSZ,
+    )
+    cached = _result_cache.get(_prediction_cache_key("parts", digest, *key_parts))
+    if cached is not None:
+        return cached, "hit"
+
+    _ensure_model("parts")
+    _ensure_model("part_damage")
+    # Built once the parts model is loaded, so it names the backend that runs it.
+    cache_key = _prediction_cache_key("parts", digest, *key_parts)
+    with metrics.stage("decode"):
+        pil_image, original_size = _decode_image(data)
+    with metrics.stage("model"):
+        parts = _get_batcher("parts").submit(pil_image).result()
+    with metrics.stage("crop"):
+        crops = _part_crops(pil_image, parts["predictions"])
+    with metrics.stage("classify"):
+        batcher = _get_batcher("part_damage")
+        scores = [future.result() for future in [batcher.submit(crop) for crop in crops]]
+
+    result = _rescale_result(parts, original_size)
+    review = []
+    for index, (prediction, score) in enumerate(zip(result["predictions"], scores)):
+        prediction["damage"] = score
+        # Only parts the classifier is unsure about need a closer (LLM or human) look.
+        prediction["needs_review"] = PART_REVIEW_LOW <= score["damage_score"] <= PART_REVIEW_HIGH
+        if prediction["needs_review"]:
+            review.append(index)
+    result["damaged"] = [
+        index for index, score in enumerate(scores) if score["damage_score"] > PART_REVIEW_HIGH
+    ]
+    result["needs_review"] = review
+    _result_cache.set(cache_key, result)
+    return result, "miss"
+
+
+@app.post("/predict/part-damage")
+def predict_part_damage(
+    response: Response,
+    image: UploadFile | None = File(default=None),
+    image_name: str | None = None,
+):
+    """Per-part damage triage: part boxes, each with classifier damage scores."""
+    metrics.label(task="part_damage")
+    with metrics.stage("read"):
+        data = _read_image_source(image, image_name)
+    payload, cache_status = _part_damage_prediction(data)
+    response.headers["X-Cache"] = cache_status
+    return payload
+
+
+def _prepare_batch_item(
+    task: str, image_name: str, data: bytes | None, model_variant: str = FULL, prefer_full: bool = True
+):
+    # Runs on the decode pool: read, hash, cache lookup and decode for one image.
+    if data is None:
+        try:
+            data = _read_image(image_name)
+        except HTTPException as exc:
+            return {"error": exc.detail}
+    digest = _content_digest(data)
+    if prefer_full and model_variant != FULL:
+        cached = _result_cache.get(_prediction_cache_key(task, digest))
+        if cached is not None:
+            return {"model_variant": FULL, "result": cached}
+    cache_key = _prediction_cache_key(task, digest, model_variant=model_variant)
+    cached = _result_cache.get(cache_key)
+    if cached is not None:
+        return {"cache_key": cache_key, "model_variant": model_variant, "result": cached}
+    try:
+        pil_image, original_size = _decode_image(data)
+    except HTTPException as exc:
+        return {"error": exc.detail}
+    return {
+        "cache_key": cache_key,
+        "model_variant": model_variant,
+        "image": pil_image,
+        "original_size": original_size,
+    }
+
+
+@app.post("/predict/batch")
+def predict_batch(
+    task: Literal["parts", "damage"],
+    image_names: list[str] | None = Query(default=None),
+    images: list[UploadFile] | None = File(default=None),
+    output_format: PredictionFormat = Query(default="records", alias="format"),
+    model_variant: str | None = None,
+):
+    """Score many images in one request, streaming one NDJSON line per image.
+
+    Without ``model_variant`` each chunk runs on the variant chosen by current load.
+    """
+    metrics.label(task=task)
+    sources = [(name, None) for name in image_names or []]
+    # Uploads are read up front because the form is closed once streaming starts.
+    sources.extend((upload.filename or "", _read_upload(upload)) for upload in images or [])
+    if not sources:
+        raise HTTPException(status_code=400, detail="Provide image files or image_names.")
+    if len(sources) > PREDICT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {PREDICT_BATCH_MAX_ITEMS} images per request.",
+        )
+
+    _ensure_model(task)
+    if model_variant is not None:
+        _ensure_model(_model_key(task, _choose_variant(task, model_variant)))
+
+    def prepare_chunk(start: int):
+        chunk = sources[start : start + PREDICT_BATCH_CHUNK_SIZE]
+        if not chunk:
+            return []
+        chosen = _choose_variant(task, model_variant)
+        return [
+            _decode_pool.submit(_prepare_batch_item, task, name, data, chosen, model_variant is None)
+            for name, data in chunk
+        ]
+
+    def item_error(exc: Exception):
+        # One bad image gets an error line; it never cuts the stream short.
+        return {"error": getattr(exc, "detail", None) or str(exc) or type(exc).__name__}
+
+    def settle(future):
+        try:
+            return future.result()
+        except Exception as exc:
+            return item_error(exc)
+
+    def stream():
+        pending = prepare_chunk(0)
+        for start in range(0, len(sources), PREDICT_BATCH_CHUNK_SIZE):
+            items = [settle(future) for future in pending]
+            # Decode the next chunk while this one is on the model.
+            pending = prepare_chunk(start + PREDICT_BATCH_CHUNK_SIZE)
+            inference = {}
+            for offset, item in enumerate(items):
+                if "image" in item:
+                    try:
+                        inference[offset] = _submit_prediction(task, item["model_variant"], item["image"])
+                    except Exception as exc:
+                        items[offset] = item_error(exc)
+            for offset, item in enumerate(items):
+                index = start + offset
+                line = {"index": index, "image_name": sources[index][0]}
+                if "error" in item:
+                    line["error"] = item["error"]
+                elif "result" in item:
+                    line.update(item["result"], cached=True, model_variant=item["model_variant"])
+                else:
+                    prediction = settle(inference[offset])
+                    if "error" in prediction:
+                        line["error"] = prediction["error"]
+                    else:
+                        result = _rescale_result(prediction, item["original_size"])
+                        _result_cache.set(item["cache_key"], result)
+                        line.update(result, cached=False, model_variant=item["model_variant"])
+                if output_format == "columnar" and "predictions" in line:
+                    line = _to_columnar(line)
+                yield json.dumps(line) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+async def _replay_report(report: dict):
+    for item in report.get("items") or []:
+        yield _sse("item", item)
+    yield _sse("report", report)
+
+
+def _register_report(report_id: str, image_name: str, report: dict):
+    """Store the report under an id so /chat sessions can refer to it."""
+    report["report_id"] = report_id
+    _chat_store.put_report(report_id, image_name, report)
+
+
+def _store_report(cache_key: str, image_name: str, report: dict, cacheable: bool):
+    # SQLite writes; called through run_in_threadpool so they never block the event loop.
+    _register_report(cache_key, image_name, report)
+    if cacheable:
+        _result_cache.set(cache_key, report)
+
+
+async def _stream_report(client, request_kwargs: dict, cache_key: str, meta: dict, image_name: str):
+    parser = ItemsStreamParser()
+    usage = []
+    started = time.perf_counter()
+    try:
+        with metrics.stage("llm"):
+            async for delta in client.stream(on_usage=usage.append, **request_kwargs):
+                if not parser.text and delta:
+                    metrics.record("llm_ttft", time.perf_counter() - started)
+                for item in parser.feed(delta):
+                    if not _is_placeholder_item(item):
+                        yield _sse("item", item)
+    except LLMError as exc:
+        yield _sse("error", {"detail": f"Azure OpenAI request failed: {exc}"})
+        return
+    with metrics.stage("parse"):
+        report, cacheable = _finalize_report(parser.text)
+    report["usage"] = _usage_summary(meta, usage[-1] if usage else None, started)
+    await run_in_threadpool(_store_report, cache_key, image_name, report, cacheable)
+    yield _sse("report", report)
+
+
+async def _report_request(
+    image_path: Path,
+    data: bytes,
+    parts: list[str],
+    mode: str = "full",
+    crops: bool = False,
+):
+    """Build the completion request for a damage report.
+
+    Returns ``(client, request_kwargs, cache_key, cached_report, meta)``;
+    ``request_kwargs`` is ``None`` when the report is already cached.
+    """
     try:
         client = load_azure_client()
     except FileNotFoundError as exc:
@@ -240,96 +1632,252 @@ def damage_analysis(payload: DamageAnalysisRequest = Body(default=None)):
             detail="Missing AZURE_OPENAI_DEPLOYMENT or AZURE_OPENAI_MODEL in backend/.env",
         )
 
-    parts_list = payload.parts or _get_parts_list()
-    prompt = (
-        "You are an auto damage assessor. Analyze the car image and produce a very detailed "
-        "insurance-style damage report (aim for 4-5 pages of content). Return JSON only. "
-        "Use the format:\n"
-        "{\n"
-        '  "summary": "long multi-paragraph narrative (at least 800-1200 words)",\n'
-        '  "overall_severity": "low|medium|high",\n'
-        '  "recommended_actions": "multi-paragraph recommendations and next steps",\n'
-        '  "items": [\n'
-        "    {\n"
-        '      "part": "one of the listed parts or unknown",\n'
-        '      "damage_type": "scratch|dent|crack|paint|glass|unknown",\n'
-        '      "severity": "minor|moderate|severe",\n'
-        '      "evidence": "what you see that supports the claim",\n'
-        '      "repair_recommendation": "replace|repair|refinish|inspect",\n'
-        '      "estimated_repair_cost_usd": "range string like 200-600",\n'
-        '      "description": "paragraph describing the damage for this part"\n'
-        "    }\n"
-        "  ]\n"
-        "}\n"
-        f"Only use these part names when possible: {', '.join(parts_list)}.\n"
-        "Assess each part in the list and include it if damage is visible. "
-        "Do not include an 'unknown' item unless there is clear non-part-specific damage."
-    )
+    if mode == "grounded":
+        with metrics.stage("detect"):
+            # Reports are cached and LLM-bound, so they always get full-model detections.
+            detections, _ = await run_in_threadpool(_combined_prediction, data, adaptive=False)
+        regions = _crop_regions(detections) if crops else []
+        crop_labels = [label for label, _ in regions]
+        prompt = _grounded_prompt(detections, crop_labels)
+        variant = ("grounded", LLM_MAX_CROPS, LLM_CROP_MAX_SIDE, LLM_CROP_MARGIN) if regions else ("grounded",)
+        max_tokens = GROUNDED_MAX_TOKENS
+    else:
+        parts_list = parts or await run_in_threadpool(_get_parts_list)
+        prompt = (
+            "You are an auto damage assessor. Analyze the car image and produce a very detailed "
+            "insurance-style damage report (aim for 4-5 pages of content). Return JSON only. "
+            "Use the format:\n"
+            "{\n"
+            '  "summary": "long multi-paragraph narrative (at least 800-1200 words)",\n'
+            '  "overall_severity": "low|medium|high",\n'
+            '  "recommended_actions": "multi-paragraph recommendations and next steps",\n'
+            '  "items": [\n'
+            "    {\n"
+            '      "part": "one of the listed parts or unknown",\n'
+            '      "damage_type": "scratch|dent|crack|paint|glass|unknown",\n'
+            '      "severity": "minor|moderate|severe",\n'
+            '      "evidence": "what you see that supports the claim",\n'
+            '      "repair_recommendation": "replace|repair|refinish|inspect",\n'
+            '      "estimated_repair_cost_usd": "range string like 200-600",\n'
+            '      "description": "paragraph describing the damage for this part"\n'
+            "    }\n"
+            "  ]\n"
+            "}\n"
+            f"Only use these part names when possible: {', '.join(parts_list)}.\n"
+            "Assess each part in the list and include it if damage is visible. "
+            "Do not include an 'unknown' item unless there is clear non-part-specific damage."
+        )
+        regions = []
+        variant = ()
+        max_tokens = 3500
 
-    data_url = _image_to_data_url(pil_image)
-    response = client.chat.completions.create(
+    digest = _content_digest(data)
+    cache_key = make_key(digest, "damage-analysis", prompt, deployment, LLM_IMAGE_MAX_SIDE, *variant)
+    meta = {"mode": mode, "images": max(1, len(regions)), "crops": bool(regions)}
+    cached = await run_in_threadpool(_result_cache.get, cache_key)
+    if cached is None:
+        # The full-mode prompt does not depend on the image, so a near-duplicate's report
+        # is found under its own digest; grounded prompts match when the detections do.
+        with metrics.stage("dedup"):
+            image_hash = await run_in_threadpool(_image_hash, digest, data)
+            cached = await run_in_threadpool(
+                _near_duplicate,
+                digest,
+                image_hash,
+                lambda other: make_key(
+                    other, "damage-analysis", prompt, deployment, LLM_IMAGE_MAX_SIDE, *variant
+                ),
+            )
+        if cached is not None:
+            await run_in_threadpool(_result_cache.set, cache_key, cached)
+    if cached is not None:
+        # Re-registered so the id stays valid after the chat store was pruned.
+        await run_in_threadpool(_register_report, cache_key, _image_name(image_path), cached)
+        return client, None, cache_key, cached, meta
+
+    with metrics.stage("image_encode"):
+        if regions:
+            # Close-ups of the damaged regions instead of the whole frame; "low" detail
+            # bills each small crop as a single tile.
+            urls = await run_in_threadpool(_crop_data_urls, data, regions)
+            images = [{"type": "image_url", "image_url": {"url": url, "detail": "low"}} for url in urls]
+        else:
+            url = await run_in_threadpool(_llm_data_url, image_path)
+            images = [{"type": "image_url", "image_url": {"url": url}}]
+    request_kwargs = dict(
         model=deployment,
         response_format={"type": "json_object"},
         messages=[
             {"role": "system", "content": "Return JSON only."},
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt},
-                    {"type": "image_url", "image_url": {"url": data_url}},
-                ],
-            },
+            {"role": "user", "content": [{"type": "text", "text": prompt}, *images]},
         ],
         temperature=0.2,
-        max_tokens=3500,
+        max_tokens=max_tokens,
     )
+    return client, request_kwargs, cache_key, None, meta
 
-    content = response.choices[0].message.content if response.choices else ""
-    parsed = _extract_json(content or "")
-    if not parsed:
-        return {"raw": content or "", "summary": content or "", "overall_severity": "", "items": []}
 
-    if not parsed.get("summary") and content:
-        parsed["raw"] = content
-        parsed["summary"] = content
+async def _generate_report(
+    image_path: Path, data: bytes, parts: list[str], mode: str = "full", crops: bool = False
+):
+    """Non-streaming report generation; returns ``(report, cache_status)``."""
+    client, request_kwargs, cache_key, cached, meta = await _report_request(
+        image_path, data, parts, mode, crops
+    )
+    if cached is not None:
+        return cached, "hit"
+    started = time.perf_counter()
+    with metrics.stage("llm"):
+        completion = await _complete(client, **request_kwargs)
+    content = completion.choices[0].message.content if completion.choices else ""
+    with metrics.stage("parse"):
+        report, cacheable = _finalize_report(content)
+    # Cached with the report, so hits show the cost of the call that produced it.
+    report["usage"] = _usage_summary(meta, completion.usage, started)
+    await run_in_threadpool(_store_report, cache_key, _image_name(image_path), report, cacheable)
+    return report, "miss"
 
-    # Filter out placeholder unknown rows unless they are the only findings.
-    items = parsed.get("items") or []
-    filtered = [
-        item
-        for item in items
-        if (item.get("part") or "").lower() not in {"unknown", "n/a", "none"}
-        or (item.get("damage_type") or "").lower() not in {"unknown", "n/a", "none"}
-    ]
-    if filtered:
-        parsed["items"] = filtered
 
-    return parsed
+@app.post("/damage-analysis")
+async def damage_analysis(
+    response: Response,
+    payload: DamageAnalysisRequest = Body(default=None),
+    stream: bool = False,
+):
+    payload = payload or DamageAnalysisRequest()
+    if not payload.image_name:
+        raise HTTPException(status_code=400, detail="Provide image_name.")
 
+    image_path = IMAGE_DIR / payload.image_name
+    metrics.label(task=payload.mode)
+    with metrics.stage("read"):
+        data = await run_in_threadpool(_read_image, payload.image_name)
 
-@app.post("/chat")
-def chat_with_report(payload: ChatRequest = Body(...)):
-    """Chat with the damage analysis report."""
-    if not payload.messages:
-        raise HTTPException(status_code=400, detail="No messages provided.")
+    if stream:
+        client, request_kwargs, cache_key, cached, meta = await _report_request(
+            image_path, data, payload.parts, payload.mode, payload.crops
+        )
+        if cached is not None:
+            return _sse_response(_replay_report(cached), cache_status="hit")
+        return _sse_response(
+            _stream_report(client, request_kwargs, cache_key, meta, _image_name(image_path)),
+            cache_status="miss",
+        )
 
-    try:
-        client = load_azure_client()
-    except FileNotFoundError as exc:
-        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    report, cache_status = await _generate_report(
+        image_path, data, payload.parts, payload.mode, payload.crops
+    )
+    response.headers["X-Cache"] = cache_status
+    return report
 
-    deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT") or os.getenv("AZURE_OPENAI_MODEL")
-    if not deployment:
+
+async def _process_job_item(image_name: str, params: dict):
+    image_path = IMAGE_DIR / image_name
+    data = await run_in_threadpool(_read_image, image_name)
+    result = {}
+    if params.get("detections", True):
+        result["detections"], _ = await run_in_threadpool(_combined_prediction, data)
+    result["report"], _ = await _generate_report(
+        image_path,
+        data,
+        params.get("parts") or [],
+        params.get("mode", "full"),
+        params.get("crops", False),
+    )
+    return result
+
+
+_job_runner = JobRunner(_job_store, _process_job_item, concurrency=JOB_CONCURRENCY)
+
+
+def _get_job(job_id: str):
+    job = _job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(payload: JobRequest):
+    """Queue damage reports for many images; poll or stream the job for progress."""
+    if len(payload.image_names) > JOB_MAX_IMAGES:
         raise HTTPException(
-            status_code=503,
-            detail="Missing AZURE_OPENAI_DEPLOYMENT in backend/.env",
+            status_code=400, detail=f"At most {JOB_MAX_IMAGES} images per job."
         )
+    job_id = await _job_runner.submit(
+        payload.image_names,
+        {
+            "parts": payload.parts,
+            "detections": payload.detections,
+            "mode": payload.mode,
+            "crops": payload.crops,
+        },
+    )
+    return await run_in_threadpool(_get_job, job_id)
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    return _get_job(job_id)
+
+
+@app.get("/jobs/{job_id}/results")
+def get_job_results(
+    job_id: str,
+    offset: int = Query(default=0, ge=0),
+    limit: int | None = Query(default=None, ge=1, le=1000),
+):
+    job = _get_job(job_id)
+    return {"job": job, "items": _job_store.items(job_id, offset=offset, limit=limit)}
+
+
+async def _stream_job(job_id: str, updates):
+    try:
+        job = await run_in_threadpool(_job_store.get, job_id)
+        yield _sse("status", job)
+        while job["status"] != "done":
+            try:
+                event = await asyncio.wait_for(updates.get(), timeout=15)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield _sse("item", event)
+            if event["job_status"] == "done":
+                job = await run_in_threadpool(_job_store.get, job_id)
+        yield _sse("done", job)
+    finally:
+        _job_runner.unsubscribe(job_id, updates)
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    await run_in_threadpool(_get_job, job_id)
+    # Subscribe before the first status read so no item completes unseen.
+    return _sse_response(_stream_job(job_id, _job_runner.subscribe(job_id)))
+
+
+async def _stream_chat(client, request_kwargs: dict, on_reply=None, extra: dict | None = None):
+    reply, usage = [], []
+    started = time.perf_counter()
+    try:
+        async for delta in client.stream(on_usage=usage.append, **request_kwargs):
+            reply.append(delta)
+            yield _sse("delta", {"content": delta})
+    except LLMError as exc:
+        yield _sse("error", {"detail": f"Azure OpenAI request failed: {exc}"})
+        return
+    reply = "".join(reply)
+    if on_reply is not None:
+        await run_in_threadpool(on_reply, reply)
+    summary = _usage_summary({"mode": "chat"}, usage[-1] if usage else None, started)
+    yield _sse("done", {"reply": reply, **(extra or {}), "usage": summary})
+
+
+def _chat_system_prompt(image_name: str | None, report: dict, summary: str = "") -> str:
+    report_summary = report.get("summary", "No summary available.")
+    report_severity = report.get("overall_severity", "Unknown")
+    report_items = report.get("items", [])
 
-    # Build system prompt with report context
-    report_summary = payload.report.get("summary", "No summary available.")
-    report_severity = payload.report.get("overall_severity", "Unknown")
-    report_items = payload.report.get("items", [])
-    
     items_text = "\n".join(
         f"- {item.get('part', 'Unknown')}: {item.get('damage_type', 'unknown')} "
         f"({item.get('severity', 'unknown')}) - Est. ${item.get('estimated_repair_cost_usd', 'N/A')}"
@@ -347,23 +1895,139 @@ and produced the following damage report:
 **Damage Findings:**
 {items_text if items_text else "No specific damage items identified."}
 
-**Image:** {payload.image_name}
+**Image:** {image_name}
 
 Answer the user's questions about this damage report. Be helpful, specific, and reference 
 the findings above. If asked about costs, provide estimates based on the report. 
 If asked about repair priorities, use your expertise to advise."""
+    if summary:
+        system_prompt += f"\n\n**Earlier in this conversation:**\n{summary}"
+    return system_prompt
+
+
+def _chat_session(payload: ChatRequest):
+    """Resolve (or start) the session a chat message belongs to, plus its stored report."""
+    if payload.session_id:
+        session = _chat_store.get_session(payload.session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Chat session not found.")
+    else:
+        session = {"session_id": None, "report_id": payload.report_id, "summary": "", "summarized": 0}
+    stored = _chat_store.get_report(session["report_id"])
+    if stored is None:
+        raise HTTPException(
+            status_code=404, detail="Report not found; run /damage-analysis again to get a new report_id."
+        )
+    if session["session_id"] is None:
+        session["session_id"] = _chat_store.create_session(session["report_id"])
+    return session, stored
+
+
+async def _summarize_turns(client, deployment: str, summary: str, turns: list[dict]) -> str:
+    transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+    earlier = f"Summary so far:\n{summary}\n\n" if summary else ""
+    started = time.perf_counter()
+    try:
+        completion = await client.complete(
+            model=deployment,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "Condense this conversation about a car damage report into a short "
+                    "summary of what the user asked and what was answered. Keep figures, "
+                    "decisions and open questions.",
+                },
+                {"role": "user", "content": f"{earlier}Conversation:\n{transcript}"},
+            ],
+            temperature=0.2,
+            max_tokens=CHAT_SUMMARY_MAX_TOKENS,
+        )
+    except LLMError:
+        # The old turns are still dropped from the prompt; only their summary is lost.
+        return summary
+    _usage_summary({"mode": "chat:summary"}, completion.usage, started)
+    return (completion.choices[0].message.content if completion.choices else "") or summary
 
-    # Build message history
-    api_messages = [{"role": "system", "content": system_prompt}]
-    for msg in payload.messages:
-        api_messages.append({"role": msg.role, "content": msg.content})
 
-    response = client.chat.completions.create(
+async def _session_history(client, deployment: str, session: dict):
+    """``(summary, turns)`` to send with the next message. Once the unsummarized turns
+    exceed CHAT_HISTORY_TOKENS, the oldest are folded into the session summary until
+    half the budget is left, so summarizing does not run on every message."""
+    turns = await run_in_threadpool(_chat_store.turns, session["session_id"], session["summarized"])
+    if sum(turn["tokens"] for turn in turns) <= CHAT_HISTORY_TOKENS:
+        return session["summary"], turns
+    cut, kept_tokens = len(turns), 0
+    while cut > 0 and kept_tokens + turns[cut - 1]["tokens"] <= CHAT_HISTORY_TOKENS // 2:
+        cut -= 1
+        kept_tokens += turns[cut]["tokens"]
+    # Cut on a user/assistant pair boundary.
+    cut += cut % 2
+    summary = session["summary"]
+    if CHAT_SUMMARIZE:
+        summary = await _summarize_turns(client, deployment, summary, turns[:cut])
+    await run_in_threadpool(
+        _chat_store.set_summary, session["session_id"], summary, session["summarized"] + cut
+    )
+    return summary, turns[cut:]
+
+
+@app.post("/chat")
+async def chat_with_report(payload: ChatRequest = Body(...), stream: bool = False):
+    """Chat with the damage analysis report."""
+    session_mode = bool(payload.session_id or payload.report_id)
+    if session_mode and not (payload.message or "").strip():
+        raise HTTPException(status_code=400, detail="Provide message.")
+    if not session_mode and (not payload.messages or payload.report is None):
+        raise HTTPException(status_code=400, detail="No messages provided.")
+
+    try:
+        client = load_azure_client()
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+    deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT") or os.getenv("AZURE_OPENAI_MODEL")
+    if not deployment:
+        raise HTTPException(
+            status_code=503,
+            detail="Missing AZURE_OPENAI_DEPLOYMENT in backend/.env",
+        )
+
+    extra = {}
+    on_reply = None
+    if session_mode:
+        # Chat store reads and writes are SQLite, so they run off the event loop.
+        session, (image_name, report) = await run_in_threadpool(_chat_session, payload)
+        summary, history = await _session_history(client, deployment, session)
+        api_messages = [{"role": "system", "content": _chat_system_prompt(image_name, report, summary)}]
+        api_messages += [{"role": turn["role"], "content": turn["content"]} for turn in history]
+        api_messages.append({"role": "user", "content": payload.message})
+        extra = {"session_id": session["session_id"], "report_id": session["report_id"]}
+
+        def on_reply(reply: str):
+            _chat_store.append_turns(
+                session["session_id"], [("user", payload.message), ("assistant", reply)]
+            )
+
+    else:
+        api_messages = [{"role": "system", "content": _chat_system_prompt(payload.image_name, payload.report)}]
+        for msg in payload.messages:
+            api_messages.append({"role": msg.role, "content": msg.content})
+
+    request_kwargs = dict(
         model=deployment,
         messages=api_messages,
         temperature=0.7,
         max_tokens=1000,
     )
+    if stream:
+        return _sse_response(_stream_chat(client, request_kwargs, on_reply, extra))
+
+    started = time.perf_counter()
+    with metrics.stage("llm"):
+        completion = await _complete(client, **request_kwargs)
 
-    assistant_reply = response.choices[0].message.content if response.choices else ""
-    return {"reply": assistant_reply}
+    assistant_reply = completion.choices[0].message.content if completion.choices else ""
+    if on_reply is not None:
+        await run_in_threadpool(on_reply, assistant_reply)
+    usage = _usage_summary({"mode": "chat"}, completion.usage, started)
+    return {"reply": assistant_reply, **extra, "usage": usage}
@@ -0,0 +1,109 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, Histogram, generate_latest
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+REQUEST_SECONDS = Histogram(
+    "neuroeye_request_duration_seconds",
+    "End-to-end request time, including streamed bodies.",
+    ["route", "method", "status", "task", "cache"],
+    buckets=BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "neuroeye_stage_duration_seconds",
+    "Time spent in one stage of a request (read, decode, model, llm, ...).",
+    ["route", "stage", "task", "cache"],
+    buckets=BUCKETS,
+)
+MODEL_STAGE_SECONDS = Histogram(
+    "neuroeye_model_stage_seconds",
+    "Per-image model preprocess / inference / postprocess time.",
+    ["task", "backend", "stage"],
+    buckets=BUCKETS,
+)
+MODEL_BATCH_SIZE = Histogram(
+    "neuroeye_model_batch_size",
+    "Images per model forward pass.",
+    ["task", "backend"],
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+_current: ContextVar["Trace | None"] = ContextVar("trace", default=None)
+
+
+class Trace:
+    """Stage timings and labels collected over one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: list[tuple[str, float]] = []
+        self.labels = {"task": "", "cache": ""}
+
+    def add(self, name: str, seconds: float):
+        self.stages.append((name, seconds))
+
+    def totals(self) -> dict[str, float]:
+        totals = defaultdict(float)
+        for name, seconds in self.stages:
+            totals[name] += seconds
+        return totals
+
+    def server_timing(self) -> str:
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.totals().items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+def begin() -> Trace:
+    trace = Trace()
+    _current.set(trace)
+    return trace
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as ``name`` on the current request's trace, if any."""
+    trace = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace.add(name, time.perf_counter() - started)
+
+
+def record(name: str, seconds: float):
+    """Add an externally measured duration (e.g. time to first LLM token)."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+def label(**labels):
+    trace = _current.get()
+    if trace is not None:
+        trace.labels.update({key: str(value) for key, value in labels.items()})
+
+
+def observe_request(trace: Trace, route: str, method: str, status: int):
+    labels = trace.labels
+    REQUEST_SECONDS.labels(route, method, str(status), labels["task"], labels["cache"]).observe(
+        time.perf_counter() - trace.started
+    )
+    for name, seconds in trace.totals().items():
+        STAGE_SECONDS.labels(route, name, labels["task"], labels["cache"]).observe(seconds)
+
+
+def observe_model_batch(task: str, backend: str, speed: dict | None, batch_size: int):
+    MODEL_BATCH_SIZE.labels(task, backend).observe(batch_size)
+    for name, milliseconds in (speed or {}).items():
+        if milliseconds is not None:
+            MODEL_STAGE_SECONDS.labels(task, backend, name).observe(milliseconds / 1000.0)
+
+
+def render() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
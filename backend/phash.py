@@ -0,0 +1,199 @@
+import threading
+from io import BytesIO
+from itertools import combinations
+
+import numpy as np
+from PIL import Image, ImageOps
+
+_SIDE = 32
+_BANDS = 4
+_BAND_BITS = 64 // _BANDS
+# Largest per-band radius probed through the band tables; wider searches scan everything.
+_MAX_BAND_RADIUS = 1
+
+# Orthonormal DCT-II basis; ``_DCT @ pixels @ _DCT.T`` is the 2-D transform.
+_k = np.arange(_SIDE)
+_DCT = np.cos(np.pi * (2 * _k[None, :] + 1) * _k[:, None] / (2 * _SIDE)) * np.sqrt(2 / _SIDE)
+_DCT[0] /= np.sqrt(2)
+_DCT = _DCT.astype(np.float32)
+
+# XOR masks turning a band value into every 16-bit value within each band radius.
+_BAND_MASKS = [
+    np.array(
+        [sum(1 << bit for bit in bits) for r in range(radius + 1) for bits in combinations(range(_BAND_BITS), r)],
+        dtype=np.uint32,
+    )
+    for radius in range(_MAX_BAND_RADIUS + 1)
+]
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def phash(image: Image.Image) -> int:
+    """64-bit DCT perceptual hash: the 8x8 lowest frequencies of a 32x32 grayscale
+    thumbnail, each compared against their median."""
+    gray = np.asarray(image.convert("L").resize((_SIDE, _SIDE), Image.Resampling.BILINEAR), dtype=np.float32)
+    low = (_DCT @ gray @ _DCT.T)[:8, :8].reshape(-1)
+    # The DC term only tracks overall brightness, so it stays out of the median.
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def phash_bytes(data: bytes) -> int:
+    """``phash`` of encoded image bytes; JPEGs are decoded at 1/8 scale."""
+    with Image.open(BytesIO(data)) as image:
+        image.draft("L", (_SIDE * 2, _SIDE * 2))
+        image = ImageOps.exif_transpose(image)
+        return phash(image)
+
+
+class HashIndex:
+    """64-bit image hashes with Hamming-radius search.
+
+    Hashes live in one ``uint64`` array, one row per content digest. For lookups each
+    hash is also split into four 16-bit bands (multi-index hashing): any hash within
+    distance ``d`` of the query agrees with it in some band to within ``d // 4`` bits.
+    The bands of all rows are kept as one sorted array of ``band << 16 | value``
+    keys, so a search looks up every probe with a single ``searchsorted`` and verifies
+    only the rows it returns. Rows added since the last re-sort sit in a short tail
+    that is scanned directly.
+
+    Rows without a name (uploads) are capped at ``max_unnamed``: past it, the oldest
+    are dropped in one compaction, so a long-running server does not grow without
+    bound. Named rows (files in the image directory) are never dropped.
+    """
+
+    def __init__(self, capacity: int = 1024, merge_every: int = 4096, max_unnamed: int | None = None):
+        self.merge_every = merge_every
+        self.max_unnamed = max_unnamed
+        self._unnamed = 0
+        self._lock = threading.Lock()
+        self._hashes = np.zeros(capacity, dtype=np.uint64)
+        self._digests: list[str] = []
+        self._names: list[str | None] = []
+        self._rows: dict[str, int] = {}
+        self._sorted = 0
+        self._band_keys = np.zeros(0, dtype=np.uint32)
+        self._band_rows = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._digests)
+
+    def nbytes(self) -> int:
+        """Memory held by the hash and band arrays."""
+        return self._hashes.nbytes + self._band_keys.nbytes + self._band_rows.nbytes
+
+    def add(self, value: int, digest: str, name: str | None = None):
+        """Record the hash of the image with content ``digest``; ``name`` marks it as a
+        file in the image directory."""
+        with self._lock:
+            row = self._rows.get(digest)
+            if row is not None:
+                if name is not None:
+                    self._unnamed -= self._names[row] is None
+                    self._names[row] = name
+                return
+            row = len(self._digests)
+            if row == len(self._hashes):
+                self._hashes = np.concatenate([self._hashes, np.zeros_like(self._hashes)])
+            self._hashes[row] = value
+            self._digests.append(digest)
+            self._names.append(name)
+            self._rows[digest] = row
+            self._unnamed += name is None
+            if not self._evict() and row + 1 - self._sorted >= self.merge_every:
+                self._merge()
+
+    def extend(self, values: np.ndarray, digests: list[str]):
+        """Bulk ``add``, re-sorting the bands once at the end."""
+        with self._lock:
+            for value, digest in zip(values.tolist(), digests):
+                if digest in self._rows:
+                    continue
+                row = len(self._digests)
+                if row == len(self._hashes):
+                    self._hashes = np.concatenate([self._hashes, np.zeros_like(self._hashes)])
+                self._hashes[row] = value
+                self._digests.append(digest)
+                self._names.append(None)
+                self._rows[digest] = row
+                self._unnamed += 1
+            if not self._evict():
+                self._merge()
+
+    def get(self, digest: str) -> int | None:
+        row = self._rows.get(digest)
+        return None if row is None else int(self._hashes[row])
+
+    def search(self, value: int, max_distance: int, limit: int | None = None):
+        """``[(distance, digest, name), ...]`` within ``max_distance``, nearest first."""
+        query = np.uint64(value)
+        with self._lock:
+            count = len(self._digests)
+            radius = max_distance // _BANDS
+            if radius > _MAX_BAND_RADIUS:
+                distances = _popcount(self._hashes[:count] ^ query)
+                rows = np.flatnonzero(distances <= max_distance)
+                distances = distances[rows]
+            else:
+                query_bands = np.array(
+                    [(band << _BAND_BITS) | ((value >> (band * _BAND_BITS)) & 0xFFFF) for band in range(_BANDS)],
+                    dtype=np.uint32,
+                )
+                # Same dtype as the keys, or searchsorted converts the whole key array.
+                probes = (query_bands[:, None] ^ _BAND_MASKS[radius]).ravel()
+                starts = np.searchsorted(self._band_keys, probes, "left")
+                lengths = np.searchsorted(self._band_keys, probes, "right") - starts
+                # Concatenated [start, end) ranges without a Python loop.
+                positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+                rows = np.unique(np.concatenate([self._band_rows[positions], np.arange(self._sorted, count)]))
+                distances = _popcount(self._hashes[rows] ^ query)
+                keep = distances <= max_distance
+                rows, distances = rows[keep], distances[keep]
+            order = np.argsort(distances, kind="stable")[:limit]
+            return [(int(distances[i]), self._digests[rows[i]], self._names[rows[i]]) for i in order]
+
+    def _evict(self) -> bool:
+        """Drop the oldest unnamed rows once over ``max_unnamed``; True if it did.
+
+        Trims an eighth below the cap, so the O(rows) compaction is amortised.
+        """
+        if self.max_unnamed is None or self._unnamed <= self.max_unnamed:
+            return False
+        drop = self._unnamed - self.max_unnamed + self.max_unnamed // 8
+        keep = []
+        for row, name in enumerate(self._names):
+            if name is None and drop:
+                drop -= 1
+                del self._rows[self._digests[row]]
+                self._unnamed -= 1
+            else:
+                keep.append(row)
+        keep = np.array(keep, dtype=np.int64)
+        hashes = np.zeros(max(2 * len(keep), 1024), dtype=np.uint64)
+        hashes[: len(keep)] = self._hashes[keep]
+        self._hashes = hashes
+        self._digests = [self._digests[row] for row in keep]
+        self._names = [self._names[row] for row in keep]
+        self._rows = {digest: row for row, digest in enumerate(self._digests)}
+        self._merge()
+        return True
+
+    def _merge(self):
+        count = len(self._digests)
+        hashes = self._hashes[:count]
+        keys = np.concatenate(
+            [
+                (np.uint32(band) << _BAND_BITS)
+                | ((hashes >> np.uint64(band * _BAND_BITS)) & np.uint64(0xFFFF)).astype(np.uint32)
+                for band in range(_BANDS)
+            ]
+        )
+        order = np.argsort(keys, kind="stable")
+        self._band_keys = keys[order]
+        self._band_rows = order % count if count else order
+        self._sorted = count
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+def make_key(*parts) -> str:
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Two-tier JSON result cache: an in-memory LRU in front of a SQLite file.
+
+    The disk tier survives restarts and is trimmed by least-recent access once the
+    stored payloads exceed ``max_disk_bytes``.
+    """
+
+    def __init__(self, db_path: Path, memory_items: int = 256, max_disk_bytes: int = 256 << 20):
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = {"memory": 0, "disk": 0}
+        self._misses = 0
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._db.commit()
+        self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._hits["memory"] += 1
+                return json.loads(self._memory[key])
+            row = self._db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self._hits["disk"] += 1
+            self._remember(key, row[0])
+            return json.loads(row[0])
+
+    def set(self, key: str, value):
+        encoded = json.dumps(value, separators=(",", ":"))
+        size = len(encoded)
+        with self._lock:
+            self._remember(key, encoded)
+            if size > self.max_disk_bytes:
+                return
+            previous = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, encoded, size, time.time()),
+            )
+            self._disk_bytes += size - (previous[0] if previous else 0)
+            self._evict()
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+                "hits": dict(self._hits),
+                "misses": self._misses,
+            }
+
+    def _remember(self, key: str, encoded: str):
+        self._memory[key] = encoded
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        while self._disk_bytes > self.max_disk_bytes:
+            rows = self._db.execute(
+                "SELECT key, size FROM entries ORDER BY accessed LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                return
+            for key, size in rows:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._disk_bytes -= size
+                if self._disk_bytes <= self.max_disk_bytes:
+                    return
@@ -0,0 +1,193 @@
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+
+SHARD_SUFFIX = ".shard"
+INDEX_SUFFIX = ".idx"
+DEFAULT_SHARD_BYTES = 1 << 30
+# Data, index and in-progress files of a shard.
+_SHARD_FILE_ENDINGS = tuple(
+    SHARD_SUFFIX + ending for ending in ("", ".tmp", INDEX_SUFFIX, INDEX_SUFFIX + ".tmp")
+)
+
+
+def index_path(shard_path: Path) -> Path:
+    return shard_path.with_name(shard_path.name + INDEX_SUFFIX)
+
+
+class ShardWriter:
+    """Pack files into numbered shards of at most ``max_bytes`` each.
+
+    A shard is one data file holding the members back to back plus a JSON index
+    (``<name>.shard.idx``) of ``name -> [offset, size, mtime_ns]``. Both are written
+    to temporary files and renamed into place, data first, so a server that has an
+    older shard mapped keeps reading it undisturbed. Shards left over from an earlier,
+    larger pack under the same prefix are removed on ``close``.
+    """
+
+    def __init__(self, prefix: Path, max_bytes: int = DEFAULT_SHARD_BYTES):
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.paths: list[Path] = []
+        self._file = None
+        self._members = {}
+        self._offset = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, name: str, data: bytes, mtime_ns: int = 0):
+        if self._file is None or (self._offset and self._offset + len(data) > self.max_bytes):
+            self._finish()
+            path = self.prefix.with_name(f"{self.prefix.name}-{len(self.paths):05d}{SHARD_SUFFIX}")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = path.with_name(path.name + ".tmp").open("wb")
+            self.paths.append(path)
+        self._file.write(data)
+        self._members[name] = [self._offset, len(data), mtime_ns]
+        self._offset += len(data)
+
+    def add_file(self, name: str, path: Path):
+        self.add(name, path.read_bytes(), path.stat().st_mtime_ns)
+
+    def close(self):
+        self._finish()
+        for path in self.prefix.parent.glob(f"{self.prefix.name}-*{SHARD_SUFFIX}"):
+            if path not in self.paths:
+                index_path(path).unlink(missing_ok=True)
+                path.unlink(missing_ok=True)
+
+    def _finish(self):
+        if self._file is None:
+            return
+        self._file.close()
+        path = self.paths[-1]
+        os.replace(self._file.name, path)
+        target = index_path(path)
+        tmp = target.with_name(target.name + ".tmp")
+        index = {"version": 1, "size": self._offset, "members": self._members}
+        tmp.write_text(json.dumps(index), encoding="utf-8")
+        os.replace(tmp, target)
+        self._file = None
+        self._members = {}
+        self._offset = 0
+
+
+def pack_directory(
+    source: Path, prefix: Path, extensions: set[str] | None = None, max_bytes: int = DEFAULT_SHARD_BYTES
+) -> list[Path]:
+    """Pack every file under ``source`` (names relative to it, ``/``-separated) into
+    shards at ``prefix-NNNNN.shard``; returns the shard paths. Existing shards under
+    ``source`` are skipped, so the output may live inside it."""
+    with ShardWriter(prefix, max_bytes) as writer:
+        for path in sorted(source.rglob("*")):
+            if not path.is_file() or path.name.endswith(_SHARD_FILE_ENDINGS):
+                continue
+            if extensions is not None and path.suffix.lower() not in extensions:
+                continue
+            writer.add_file(path.relative_to(source).as_posix(), path)
+    return writer.paths
+
+
+class Shard:
+    """Read-only view of one shard; members are zero-copy slices of an mmap."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        index = json.loads(index_path(path).read_text(encoding="utf-8"))
+        self.members: dict[str, list[int]] = index["members"]
+        with path.open("rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size != index["size"]:
+                # Caught between the data and index renames of a repack.
+                raise ValueError(f"{path} does not match its index.")
+            self.mtime_ns = stat.st_mtime_ns
+            # mmap keeps its own handle; an empty shard has nothing to map.
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.members else None
+        self._view = memoryview(self._map) if self._map is not None else memoryview(b"")
+
+    def __len__(self):
+        return len(self.members)
+
+    def get(self, name: str) -> memoryview | None:
+        member = self.members.get(name)
+        if member is None:
+            return None
+        offset, size, _ = member
+        return self._view[offset : offset + size]
+
+
+class ShardSet:
+    """Every complete shard in a directory, with one name lookup across them.
+
+    ``refresh`` picks up added, replaced and removed shards. Shards are never closed
+    explicitly: slices handed out may still be in use, so a dropped shard's mapping
+    goes away with its last reference.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._lock = threading.Lock()
+        self._shards: dict[Path, Shard] = {}
+        self._lookup: dict[str, Shard] = {}
+
+    def __len__(self):
+        return len(self._lookup)
+
+    def __contains__(self, name: str):
+        return name in self._lookup
+
+    def refresh(self) -> bool:
+        """Rescan the directory; returns True when the set of shards changed."""
+        with self._lock:
+            try:
+                paths = sorted(
+                    path for path in self.root.glob(f"*{SHARD_SUFFIX}") if index_path(path).exists()
+                )
+            except FileNotFoundError:
+                paths = []
+            shards = {}
+            for path in paths:
+                current = self._shards.get(path)
+                try:
+                    if current is not None and current.mtime_ns == path.stat().st_mtime_ns:
+                        shards[path] = current
+                    else:
+                        shards[path] = Shard(path)
+                except (OSError, ValueError):
+                    # Mid-repack or unreadable: keep serving the mapping already open.
+                    if current is not None:
+                        shards[path] = current
+            if shards.keys() == self._shards.keys() and all(
+                shards[path] is self._shards[path] for path in shards
+            ):
+                return False
+            lookup = {}
+            # Later shards (by file name) win for names packed more than once.
+            for shard in shards.values():
+                lookup.update(dict.fromkeys(shard.members, shard))
+            self._shards, self._lookup = shards, lookup
+            return True
+
+    def get(self, name: str) -> memoryview | None:
+        shard = self._lookup.get(name)
+        return shard.get(name) if shard is not None else None
+
+    def stat(self, name: str):
+        """``(size, mtime_ns)`` of a member, or ``None``."""
+        shard = self._lookup.get(name)
+        if shard is None:
+            return None
+        _, size, mtime_ns = shard.members[name]
+        return size, mtime_ns
+
+    def items(self):
+        """``(name, size, mtime_ns)`` for every member."""
+        for name, shard in self._lookup.items():
+            _, size, mtime_ns = shard.members[name]
+            yield name, size, mtime_ns
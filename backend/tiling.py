@@ -0,0 +1,49 @@
+import math
+
+import numpy as np
+
+from boxes import batched_nms
+
+
+def _starts(length: int, tile: int, overlap: float) -> list[int]:
+    if length <= tile:
+        return [0]
+    stride = max(1, int(tile * (1.0 - overlap)))
+    count = math.ceil((length - tile) / stride) + 1
+    # Spread the tiles evenly so the last one ends exactly at the image border.
+    return [round(index * (length - tile) / (count - 1)) for index in range(count)]
+
+
+def tile_grid(width: int, height: int, tile_size: int, overlap: float) -> list[tuple[int, int, int, int]]:
+    """Overlapping ``tile_size`` windows covering the image, as xyxy pixel boxes.
+
+    Returns an empty list when the image already fits in a single tile.
+    """
+    if width <= tile_size and height <= tile_size:
+        return []
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in _starts(height, tile_size, overlap)
+        for x in _starts(width, tile_size, overlap)
+    ]
+
+
+def merge_tiles(
+    detections: list[tuple[np.ndarray, np.ndarray, np.ndarray]],
+    offsets: list[tuple[int, int]],
+    iou_threshold: float = 0.5,
+    metric: str = "ios",
+):
+    """Shift per-tile ``(xyxy, conf, cls)`` arrays into image coordinates and run
+    class-aware NMS across tiles. Returns merged arrays sorted by confidence."""
+    shifted = []
+    for (xyxy, conf, cls), (dx, dy) in zip(detections, offsets):
+        if len(xyxy):
+            shifted.append((xyxy + np.array([dx, dy, dx, dy], dtype=np.float32), conf, cls))
+    if not shifted:
+        return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+    xyxy = np.concatenate([item[0] for item in shifted])
+    conf = np.concatenate([item[1] for item in shifted])
+    cls = np.concatenate([item[2] for item in shifted])
+    keep = batched_nms(xyxy, conf, cls, iou_threshold, metric)
+    return xyxy[keep], conf[keep], cls[keep]
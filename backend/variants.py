@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from inference_backends import BACKENDS
+
+FULL = "full"
+
+
+@dataclass(frozen=True)
+class ModelVariant:
+    name: str
+    backend: str
+    imgsz: int
+    # None: the task's main weights.
+    weights: Path | None = None
+
+
+def parse_variants(value: str) -> dict[str, ModelVariant]:
+    """Parse comma-separated ``name:backend:imgsz[:weights]`` entries, most to least
+    expensive, e.g. ``int8:onnx-int8:640,small:onnx-int8:416``."""
+    variants = {}
+    for entry in (part.strip() for part in value.split(",")):
+        if not entry:
+            continue
+        fields = entry.split(":", 3)
+        if len(fields) < 3 or not fields[0] or not fields[2].isdigit():
+            raise ValueError(f"Bad model variant {entry!r}; expected name:backend:imgsz[:weights].")
+        name, backend, imgsz = fields[:3]
+        if backend not in BACKENDS:
+            raise ValueError(f"Bad model variant {entry!r}; backend must be one of {BACKENDS}.")
+        if name == FULL or name in variants:
+            raise ValueError(f"Model variant name {name!r} is reserved or repeated.")
+        weights = Path(fields[3]) if len(fields) == 4 and fields[3] else None
+        variants[name] = ModelVariant(name, backend, int(imgsz), weights)
+    return variants
+
+
+class VariantSelector:
+    """Picks the model variant for one task from current load.
+
+    ``names`` run from most to least expensive, ``full`` first. The selector steps one
+    variant cheaper when the queue is deeper than ``max_queue`` or the recent p90
+    latency of the serving variant is above ``target_latency_s``, and one step back when
+    both are under half of that. After a switch it holds for ``cooldown_s`` and starts a
+    fresh latency window, so a decision is never based on the previous variant's timings.
+    """
+
+    def __init__(
+        self,
+        names: list[str],
+        max_queue: int,
+        target_latency_s: float,
+        cooldown_s: float = 5.0,
+        window: int = 32,
+        min_samples: int = 8,
+    ):
+        self.names = list(names)
+        self.max_queue = max_queue
+        self.target_latency_s = target_latency_s
+        self.cooldown_s = cooldown_s
+        self.min_samples = min(min_samples, window)
+        self.level = 0
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._changed = time.monotonic()
+        self._switches = 0
+        self._served = Counter()
+
+    def _recent_latency(self) -> float | None:
+        if len(self._latencies) < self.min_samples:
+            return None
+        return float(np.percentile(self._latencies, 90))
+
+    def choose(self, queue_depth: int, ready=lambda name: True) -> str:
+        """Variant for the next request; ``ready(name)`` rules out variants that are not
+        loaded yet, falling back towards ``full``."""
+        with self._lock:
+            now = time.monotonic()
+            if len(self.names) > 1 and now - self._changed >= self.cooldown_s:
+                latency = self._recent_latency()
+                overloaded = queue_depth > self.max_queue or (
+                    latency is not None and latency > self.target_latency_s
+                )
+                relaxed = queue_depth <= self.max_queue // 2 and (
+                    latency is None or latency < self.target_latency_s / 2
+                )
+                if overloaded and self.level < len(self.names) - 1:
+                    self._move(self.level + 1, now)
+                elif relaxed and self.level > 0:
+                    self._move(self.level - 1, now)
+            level = self.level
+            while level and not ready(self.names[level]):
+                level -= 1
+            name = self.names[level]
+            self._served[name] += 1
+            return name
+
+    def observe(self, name: str, seconds: float):
+        """Latency of one prediction; only the variant currently selected counts."""
+        with self._lock:
+            if name == self.names[self.level]:
+                self._latencies.append(seconds)
+
+    def _move(self, level: int, now: float):
+        self.level = level
+        self._changed = now
+        self._switches += 1
+        self._latencies.clear()
+
+    def stats(self):
+        with self._lock:
+            latency = self._recent_latency()
+            return {
+                "variants": self.names,
+                "selected": self.names[self.level],
+                "recent_p90_ms": round(latency * 1000, 1) if latency is not None else None,
+                "max_queue": self.max_queue,
+                "target_latency_ms": self.target_latency_s * 1000,
+                "switches": self._switches,
+                "served": dict(self._served),
+            }
@@ -32,6 +32,7 @@ export default function Home() {
   const [analysisReport, setAnalysisReport] = useState(null);
   const [showReport, setShowReport] = useState(false);
   const [chatMessages, setChatMessages] = useState([]);
+  const [chatSessionId, setChatSessionId] = useState(null);
   const [chatInput, setChatInput] = useState("");
   const [chatLoading, setChatLoading] = useState(false);
   const imgRef = useRef(null);
@@ -65,14 +66,16 @@ export default function Home() {
     setShowReport(false);
     setAnalysisError("");
     setChatMessages([]);
+    setChatSessionId(null);
     if (sparkleTimerRef.current) {
       clearTimeout(sparkleTimerRef.current);
       sparkleTimerRef.current = null;
     }
   }, [currentImage, task]);
 
+  // The display derivative is bounded in size; originals can be many megabytes.
   const imageUrl = currentImage
-    ? `${API_BASE}/images/${encodeURIComponent(currentImage)}`
+    ? `${API_BASE}/images/${encodeURIComponent(currentImage)}?variant=display`
     : "";
 
   const handlePrev = () => setIndex((prev) => Math.max(prev - 1, 0));
@@ -159,6 +162,7 @@ export default function Home() {
       setAnalysisReport(normalized);
       setShowReport(true);
       setChatMessages([]); // Reset chat when new report is generated
+      setChatSessionId(null);
     } catch (err) {
       setAnalysisError(err.message);
     } finally {
@@ -179,11 +183,22 @@ export default function Home() {
       const response = await fetch(`${API_BASE}/chat`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-          image_name: currentImage,
-          report: analysisReport,
-          messages: updatedMessages,
-        }),
+        // The backend keeps the report and history for a session, so only the
+        // new message is sent once the report has an id.
+        body: JSON.stringify(
+          analysisReport.report_id
+            ? {
+                ...(chatSessionId
+                  ? { session_id: chatSessionId }
+                  : { report_id: analysisReport.report_id }),
+                message: userMessage.content,
+              }
+            : {
+                image_name: currentImage,
+                report: analysisReport,
+                messages: updatedMessages,
+              }
+        ),
       });
 
       if (!response.ok) {
@@ -192,6 +207,7 @@ export default function Home() {
       }
 
       const data = await response.json();
+      if (data.session_id) setChatSessionId(data.session_id);
       setChatMessages([
         ...updatedMessages,
         { role: "assistant", content: data.reply },
@@ -373,7 +389,7 @@ export default function Home() {
     }
     try {
       // Add cache-busting timestamp to bypass browser cache
-      const cacheBuster = `?t=${Date.now()}`;
+      const cacheBuster = `&t=${Date.now()}`;
       const response = await fetch(imageUrl + cacheBuster, {
         mode: "cors",
         cache: "no-store",
@@ -435,12 +451,20 @@ export default function Home() {
     if (!ctx) return null;
     ctx.drawImage(img, 0, 0);
 
+    // Boxes are in original-image pixels; the fetched display image may be smaller.
+    const scaleX = canvas.width / imageMeta.width;
+    const scaleY = canvas.height / imageMeta.height;
     predictions.forEach((pred) => {
       const [x1, y1, x2, y2] = pred.bbox;
       const color = colorForLabel(pred.label, pred.class_id);
       ctx.strokeStyle = color;
       ctx.lineWidth = Math.max(2, img.naturalWidth * 0.003);
-      ctx.strokeRect(x1, y1, x2 - x1, y2 - y1);
+      ctx.strokeRect(
+        x1 * scaleX,
+        y1 * scaleY,
+        (x2 - x1) * scaleX,
+        (y2 - y1) * scaleY
+      );
     });
 
     return canvas.toDataURL("image/jpeg", 0.92);
@@ -734,6 +758,8 @@ export default function Home() {
                 className="preview-image"
                 onLoad={(e) => {
                   const img = e.currentTarget;
+                  // Predictions carry the original size their boxes refer to.
+                  if (predictions.length) return;
                   setImageMeta({
                     width: img.naturalWidth,
                     height: img.naturalHeight,
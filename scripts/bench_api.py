@@ -0,0 +1,340 @@
+"""Load test for the backend API with synthetic data and no external services.
+
+Generates JPEGs at several resolutions and two tiny randomly initialised YOLO
+models, starts the Azure OpenAI stub and the backend as subprocesses, then drives
+``/images``, ``/predict``, ``/damage-analysis`` and ``/chat`` at the requested
+concurrency. The ``images`` scenario cycles through the first ``--image-pages``
+pages of the listing, each requested with the ``next_cursor`` of the page before
+it, so it times cursor paging over the image index rather than image reads.
+Throughput, latency percentiles and the backend's memory use are
+printed and written as JSON, so runs can be compared across commits::
+
+    python scripts/bench_api.py --concurrency 1,8 --output bench/$(git rev-parse --short HEAD).json
+
+Pass ``--api`` to benchmark an already running backend (and its own images)
+instead; memory is then not reported.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+from bench_inference_pool import make_jpegs  # noqa: E402
+from stub_openai_server import STUB_REPORT  # noqa: E402
+
+PART_NAMES = ["Back-bumper", "Front-bumper", "Front-door", "Hood", "Fender", "Headlight", "Roof", "Trunk"]
+DAMAGE_NAMES = ["dent", "scratch", "crack", "glass-shatter", "lamp-broken", "tire-flat"]
+SCENARIOS = ["images", "predict", "damage-analysis", "chat"]
+IMAGE_PAGE_SIZE = 50
+
+
+def make_models(models_dir: Path, width: float):
+    """Save randomly initialised YOLOv8 detectors as parts_best.pt and damage_best.pt."""
+    from ultralytics import YOLO
+    from ultralytics.nn.tasks import DetectionModel, yaml_model_load
+
+    models_dir.mkdir(parents=True, exist_ok=True)
+    for filename, names in (("parts_best.pt", PART_NAMES), ("damage_best.pt", DAMAGE_NAMES)):
+        cfg = yaml_model_load("yolov8n.yaml")
+        cfg["scales"] = {"tiny": [0.33, width, 1024]}
+        cfg["scale"] = "tiny"
+        model = YOLO("yolov8n.yaml")
+        model.model = DetectionModel(cfg, nc=len(names), verbose=False)
+        model.model.names = dict(enumerate(names))
+        model.save(models_dir / filename)
+
+
+def make_images(image_dir: Path, sizes: list[tuple[int, int]], per_size: int) -> list[str]:
+    image_dir.mkdir(parents=True, exist_ok=True)
+    names = []
+    for seed, (width, height) in enumerate(sizes):
+        for index, payload in enumerate(make_jpegs(per_size, width, height, seed=seed)):
+            name = f"bench_{width}x{height}_{index:03d}.jpg"
+            (image_dir / name).write_bytes(payload)
+            names.append(name)
+    return names
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until(url: str, timeout: float, process: subprocess.Popen):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(process.args)} exited with status {process.returncode}")
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise TimeoutError(f"{url} not ready after {timeout:.0f}s")
+
+
+def process_memory_kb(pid: int) -> dict:
+    """Resident and peak resident memory of ``pid`` and its children (Linux only)."""
+    totals = {"rss_kb": 0, "peak_rss_kb": 0}
+    pids = [pid]
+    while pids:
+        current = pids.pop()
+        try:
+            status = Path(f"/proc/{current}/status").read_text()
+            children = Path(f"/proc/{current}/task/{current}/children").read_text().split()
+        except OSError:
+            continue
+        for line in status.splitlines():
+            if line.startswith("VmRSS:"):
+                totals["rss_kb"] += int(line.split()[1])
+            elif line.startswith("VmHWM:"):
+                totals["peak_rss_kb"] += int(line.split()[1])
+        pids.extend(int(child) for child in children)
+    return totals
+
+
+def page_cursors(api: str, pages: int) -> list[str | None]:
+    """Cursors of the first ``pages`` pages of ``/images``, each the ``next_cursor``
+    of the page before it; ``None`` stands for the first page."""
+    cursors = [None]
+    while len(cursors) < pages:
+        params = {"limit": IMAGE_PAGE_SIZE}
+        if cursors[-1] is not None:
+            params["cursor"] = cursors[-1]
+        next_cursor = httpx.get(f"{api}/images", params=params).json()["next_cursor"]
+        if next_cursor is None:
+            break
+        cursors.append(next_cursor)
+    return cursors
+
+
+def request_factory(scenario: str, image_names: list[str], cursors: list[str | None] = (None,)):
+    """Return ``make(index) -> (method, path, kwargs)`` for one scenario."""
+    chat_report = {key: STUB_REPORT[key] for key in ("summary", "overall_severity", "items")}
+
+    def make(index: int):
+        image_name = image_names[index % len(image_names)] if image_names else ""
+        if scenario == "images":
+            cursor = cursors[index % len(cursors)]
+            params = {"limit": IMAGE_PAGE_SIZE, **({"cursor": cursor} if cursor is not None else {})}
+            return "GET", "/images", {"params": params}
+        if scenario == "predict":
+            return "POST", "/predict", {"params": {"task": "damage", "image_name": image_name}}
+        if scenario == "damage-analysis":
+            return "POST", "/damage-analysis", {"json": {"image_name": image_name}}
+        return "POST", "/chat", {
+            "json": {
+                "image_name": image_name,
+                "report": chat_report,
+                "messages": [{"role": "user", "content": f"Which repair comes first? ({index})"}],
+            }
+        }
+
+    return make
+
+
+async def run_scenario(
+    api: str, scenario: str, image_names, concurrency: int, requests: int, warmup: int, cursors=(None,)
+):
+    make = request_factory(scenario, image_names, cursors)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=api, timeout=300, limits=limits) as client:
+        next_index = 0
+        latencies: list[float] = []
+        statuses: dict[str, int] = {}
+        cache_hits = 0
+
+        async def worker(count_towards_results: bool, total: int):
+            nonlocal next_index, cache_hits
+            while next_index < total:
+                index = next_index
+                next_index += 1
+                method, path, kwargs = make(index)
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    status = str(response.status_code)
+                except httpx.HTTPError as exc:
+                    response, status = None, type(exc).__name__
+                elapsed = time.perf_counter() - started
+                if not count_towards_results:
+                    continue
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+                if response is not None and response.headers.get("X-Cache") == "hit":
+                    cache_hits += 1
+
+        if warmup:
+            await asyncio.gather(*(worker(False, warmup) for _ in range(min(concurrency, warmup))))
+        next_index = 0
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(True, requests) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed,
+        "mean_ms": float(latencies_ms.mean()),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "max_ms": float(latencies_ms.max()),
+        "status_counts": statuses,
+        "cache_hit_ratio": cache_hits / len(latencies),
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_services(workdir: Path, args) -> tuple[str, list[subprocess.Popen], int]:
+    print("Generating synthetic images and models...")
+    sizes = [tuple(int(v) for v in size.split("x")) for size in args.sizes.split(",")]
+    make_images(workdir / "img", sizes, args.images_per_size)
+    make_models(workdir / "models", args.model_width)
+
+    stub_port, api_port = free_port(), free_port()
+    log = open(workdir / "services.log", "w")
+    stub = subprocess.Popen(
+        [
+            sys.executable,
+            str(REPO_ROOT / "scripts" / "stub_openai_server.py"),
+            "--port",
+            str(stub_port),
+            "--latency-ms",
+            str(args.llm_latency_ms),
+        ],
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    env = {
+        **os.environ,
+        "IMAGE_DIR": str(workdir / "img"),
+        "MODELS_DIR": str(workdir / "models"),
+        "RESULT_CACHE_DIR": str(workdir / "cache"),
+        "AZURE_OPENAI_ENDPOINT": f"http://127.0.0.1:{stub_port}",
+        "AZURE_OPENAI_KEY": "stub",
+        "AZURE_OPENAI_DEPLOYMENT": "stub",
+    }
+    if args.no_cache:
+        # A zero-sized cache stores nothing, so every request reaches the model / LLM.
+        env.update(RESULT_CACHE_MEMORY_ITEMS="0", RESULT_CACHE_MAX_BYTES="0")
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(api_port), "--log-level", "warning"],
+        cwd=REPO_ROOT / "backend",
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    api = f"http://127.0.0.1:{api_port}"
+    wait_until(f"http://127.0.0.1:{stub_port}/docs", 60, stub)
+    wait_until(f"{api}/ready", args.startup_timeout, backend)
+    return api, [backend, stub], backend.pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and latency of the backend API.")
+    parser.add_argument("--api", help="Benchmark this running backend instead of starting one.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Subset of {', '.join(SCENARIOS)}.")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated client counts.")
+    parser.add_argument("--requests", type=int, default=100, help="Timed requests per scenario and level.")
+    parser.add_argument("--warmup", type=int, default=8, help="Untimed requests before each run.")
+    parser.add_argument("--sizes", default="640x480,1280x960,2048x1536,4032x3024", help="Image sizes WxH.")
+    parser.add_argument("--images-per-size", type=int, default=8)
+    parser.add_argument(
+        "--image-pages",
+        type=int,
+        default=4,
+        help=f"Pages of {IMAGE_PAGE_SIZE} names the images scenario cycles through.",
+    )
+    parser.add_argument("--model-width", type=float, default=0.125, help="YOLOv8 width multiple.")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="Stub completion latency.")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the backend result cache.")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--output", type=Path, help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    processes: list[subprocess.Popen] = []
+    with tempfile.TemporaryDirectory(prefix="bench_api_") as tmp:
+        try:
+            if args.api:
+                api, backend_pid = args.api.rstrip("/"), None
+            else:
+                api, processes, backend_pid = start_services(Path(tmp), args)
+            image_names = httpx.get(f"{api}/images", params={"limit": 1000}).json()["images"]
+            cursors = page_cursors(api, args.image_pages) if "images" in scenarios else [None]
+            memory_start = process_memory_kb(backend_pid) if backend_pid else None
+
+            results = []
+            for scenario in scenarios:
+                for concurrency in levels:
+                    result = asyncio.run(
+                        run_scenario(
+                            api, scenario, image_names, concurrency, args.requests, args.warmup, cursors
+                        )
+                    )
+                    if backend_pid:
+                        result["memory"] = process_memory_kb(backend_pid)
+                    results.append(result)
+                    print(
+                        f"{scenario:<16} c={concurrency:<3} {result['rps']:>8.1f} req/s  "
+                        f"p50 {result['p50_ms']:>8.1f}  p95 {result['p95_ms']:>8.1f}  "
+                        f"p99 {result['p99_ms']:>8.1f} ms  hits {result['cache_hit_ratio']:.0%}  "
+                        f"{result['status_counts']}"
+                    )
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait(timeout=30)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "memory_at_start": memory_start,
+        "results": results,
+    }
+    if memory_start:
+        print(f"backend RSS {results[-1]['memory']['rss_kb'] / 1024:.0f} MiB "
+              f"(start {memory_start['rss_kb'] / 1024:.0f} MiB, peak {results[-1]['memory']['peak_rss_kb'] / 1024:.0f} MiB)")
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import json
+
+import httpx
+
+QUESTIONS = [
+    "Which repair should be done first, and why?",
+    "How much would the bumper repair cost at an independent shop versus a dealer?",
+    "Is it safe to drive the car before the repairs are done?",
+    "Could the hood damage be hiding structural problems underneath?",
+    "What should I photograph for the insurance claim?",
+]
+
+
+def run(client: httpx.Client, image_name: str, report: dict, turns: int, session: bool):
+    """Per-turn ``(request_bytes, prompt_tokens)`` for one conversation."""
+    rows = []
+    messages = []
+    state = {"report_id": report["report_id"]}
+    for turn in range(turns):
+        question = f"{QUESTIONS[turn % len(QUESTIONS)]} (turn {turn + 1})"
+        if session:
+            body = {**state, "message": question}
+        else:
+            messages.append({"role": "user", "content": question})
+            body = {"image_name": image_name, "report": report, "messages": messages}
+        encoded = json.dumps(body).encode("utf-8")
+        response = client.post("/chat", content=encoded, headers={"Content-Type": "application/json"})
+        response.raise_for_status()
+        reply = response.json()
+        if session:
+            state = {"session_id": reply["session_id"]}
+        else:
+            messages.append({"role": "assistant", "content": reply["reply"]})
+        rows.append((len(encoded), (reply.get("usage") or {}).get("prompt_tokens") or 0))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Request size and prompt tokens per /chat turn: full history vs server-side session."
+    )
+    parser.add_argument("--api", default="http://127.0.0.1:8009", help="Backend base URL.")
+    parser.add_argument("--image", help="Image name (default: first from /images).")
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    client = httpx.Client(base_url=args.api, timeout=300)
+    image_name = args.image or client.get("/images", params={"limit": 1}).json()["images"][0]
+    report = client.post("/damage-analysis", json={"image_name": image_name}).json()
+    if "report_id" not in report:
+        raise SystemExit("The backend did not return a report_id; it predates chat sessions.")
+
+    stateless = run(client, image_name, report, args.turns, session=False)
+    session = run(client, image_name, report, args.turns, session=True)
+
+    print(f"{'turn':>4} {'full req B':>11} {'session req B':>14} {'full prompt tok':>16} {'session prompt tok':>19}")
+    for turn, ((full_bytes, full_tokens), (session_bytes, session_tokens)) in enumerate(zip(stateless, session), 1):
+        print(f"{turn:>4} {full_bytes:>11} {session_bytes:>14} {full_tokens:>16} {session_tokens:>19}")
+    totals = [sum(column) for column in zip(*(a + b for a, b in zip(stateless, session)))]
+    print(f"{'sum':>4} {totals[0]:>11} {totals[2]:>14} {totals[1]:>16} {totals[3]:>19}")
+    print("\nSession prompt tokens exclude the occasional summarization call (see /stats llm).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from batching import MicroBatcher  # noqa: E402
+from inference_backends import load_detector  # noqa: E402
+from inference_pool import InferencePool  # noqa: E402
+
+
+def make_jpegs(count: int, width: int, height: int, seed: int = 0) -> list[bytes]:
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    payloads = []
+    for _ in range(count):
+        noise = rng.normal(0, 25, (height, width, 3)).astype(np.float32)
+        pixels = np.clip(gradient + noise + rng.uniform(0, 80), 0, 255).astype(np.uint8)
+        buffer = BytesIO()
+        Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+        payloads.append(buffer.getvalue())
+    return payloads
+
+
+def run(label: str, model, concurrency: int, payloads: list[bytes], clients: int, requests: int, max_batch: int):
+    batcher = MicroBatcher(
+        label, lambda images: model.predict(images, verbose=False), max_batch_size=max_batch, concurrency=concurrency
+    )
+
+    def one_request(index: int) -> float:
+        # Decode on the client thread, as the API does before handing off to the batcher.
+        started = time.perf_counter()
+        image = Image.open(BytesIO(payloads[index % len(payloads)])).convert("RGB")
+        batcher.submit(image).result()
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(one_request, range(clients)))  # settle
+        started = time.perf_counter()
+        latencies = np.array(list(pool.map(one_request, range(requests)))) * 1000
+        elapsed = time.perf_counter() - started
+    return {
+        "run": label,
+        "rps": requests / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "batches": batcher.stats()["batch_size_histogram"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of in-process vs pooled inference.")
+    parser.add_argument("--weights", required=True, help="YOLO .pt detection weights.")
+    parser.add_argument("--backend", choices=["pytorch", "onnx"], default="pytorch")
+    parser.add_argument("--workers", default="0,1,2,4", help="Worker counts to test; 0 = in-process model.")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent client threads.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--size", default="1280x960", help="Synthetic image size WxH.")
+    parser.add_argument("--max-batch", type=int, default=8)
+    args = parser.parse_args()
+
+    weights = Path(args.weights)
+    width, height = (int(v) for v in args.size.split("x"))
+    payloads = make_jpegs(32, width, height)
+    cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    print(f"{cpu_count} CPUs, {args.clients} clients, {args.requests} requests of {args.size}")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        spec = {
+            "weights_path": weights,
+            "backend": args.backend,
+            "digest": hashlib.sha256(weights.read_bytes()).hexdigest(),
+            "cache_dir": Path(cache_dir),
+        }
+        results = []
+        for workers in (int(value) for value in args.workers.split(",")):
+            if workers == 0:
+                model = load_detector(**spec)
+                results.append(run("in-process", model, 1, payloads, args.clients, args.requests, args.max_batch))
+                continue
+            pool = InferencePool({"bench": spec}, workers=workers)
+            pool.start()
+            model = pool.model("bench")
+            while pool.stats()["ready_workers"] < workers:
+                time.sleep(0.2)
+            try:
+                results.append(
+                    run(f"pool x{workers}", model, workers, payloads, args.clients, args.requests, args.max_batch)
+                )
+            finally:
+                pool.stop()
+
+    print()
+    print(f"{'run':<12} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}  batch sizes")
+    for result in results:
+        print(
+            f"{result['run']:<12} {result['rps']:>8.1f} {result['p50_ms']:>8.1f} "
+            f"{result['p95_ms']:>8.1f}  {result['batches']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
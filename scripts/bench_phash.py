@@ -0,0 +1,101 @@
+import argparse
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from phash import HashIndex, phash_bytes  # noqa: E402
+
+
+def make_photos(count: int, width: int, height: int, rng) -> list[bytes]:
+    """Smooth, photo-like JPEGs: upsampled random colour fields plus mild grain."""
+    payloads = []
+    for _ in range(count):
+        field = Image.fromarray(rng.integers(0, 256, (6, 8, 3), dtype=np.uint8)).resize(
+            (width, height), Image.Resampling.BICUBIC
+        )
+        pixels = np.asarray(field, dtype=np.float32) + rng.normal(0, 6, (height, width, 3))
+        buffer = BytesIO()
+        Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, format="JPEG", quality=90)
+        payloads.append(buffer.getvalue())
+    return payloads
+
+
+def variant(data: bytes) -> bytes:
+    """A near-duplicate: downscaled to 60% and re-encoded at low quality."""
+    image = Image.open(BytesIO(data))
+    buffer = BytesIO()
+    image.resize((image.width * 3 // 5, image.height * 3 // 5)).save(buffer, format="JPEG", quality=40)
+    return buffer.getvalue()
+
+
+def brute_force(hashes: np.ndarray, value: int, max_distance: int):
+    distances = np.bitwise_count(hashes ^ np.uint64(value))
+    return np.flatnonzero(distances <= max_distance)
+
+
+def flip_bits(value: int, count: int, rng) -> int:
+    for bit in rng.choice(64, size=count, replace=False):
+        value ^= 1 << int(bit)
+    return value
+
+
+def timed(fn, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - started) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark perceptual hashing and near-duplicate lookups.")
+    parser.add_argument("--hashes", type=int, default=100_000, help="Random hashes in the index.")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--distances", default="2,4,6,8,12", help="Hamming radii to search.")
+    parser.add_argument("--images", type=int, default=20, help="Synthetic JPEGs used to time hashing.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    payloads = make_photos(args.images, 1600, 1200, rng)
+    hash_s = timed(lambda: [phash_bytes(data) for data in payloads], 1) / len(payloads)
+    hashes = [phash_bytes(data) for data in payloads]
+    shifts = [(value ^ phash_bytes(variant(data))).bit_count() for value, data in zip(hashes, payloads)]
+    unrelated = [(a ^ b).bit_count() for a, b in zip(hashes, hashes[1:])]
+    print(
+        f"phash: {hash_s * 1000:.2f} ms/image (1600x1200 JPEG); resized+recompressed copies "
+        f"differ by {np.mean(shifts):.1f} bits (max {max(shifts)}), unrelated images by {np.mean(unrelated):.1f}"
+    )
+
+    hashes = rng.integers(0, 2**64, size=args.hashes, dtype=np.uint64)
+    index = HashIndex()
+    started = time.perf_counter()
+    index.extend(hashes, [f"{row:x}" for row in range(args.hashes)])
+    print(f"index: {args.hashes} hashes built in {time.perf_counter() - started:.2f} s, {index.nbytes() / 1e6:.1f} MB")
+
+    targets = rng.integers(0, args.hashes, size=args.queries)
+    print(f"{'distance':>8} {'multi-index ms':>15} {'brute force ms':>15} {'found':>6}")
+    for max_distance in [int(d) for d in args.distances.split(",") if d]:
+        # Each query is a stored hash with up to max_distance bits flipped, so it has a match.
+        queries = [
+            flip_bits(int(hashes[target]), int(rng.integers(0, max_distance + 1)), rng) for target in targets
+        ]
+        found = sum(
+            any(distance <= max_distance for distance, _, _ in index.search(query, max_distance))
+            for query in queries
+        )
+        for query in queries[:5]:
+            expected = set(brute_force(hashes, query, max_distance).tolist())
+            assert {int(digest, 16) for _, digest, _ in index.search(query, max_distance)} == expected
+        lookup_s = timed(lambda: [index.search(query, max_distance) for query in queries], 1) / len(queries)
+        brute_s = timed(lambda: [brute_force(hashes, query, max_distance) for query in queries], 1) / len(queries)
+        print(f"{max_distance:>8} {lookup_s * 1000:>15.3f} {brute_s * 1000:>15.3f} {found:>3}/{len(queries)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from prepare_damage_seg import mask_to_polygons, normalize_polygon, prepare_dataset
+
+
+def legacy_normalize_polygon(polygon: np.ndarray, width: int, height: int):
+    # Per-coordinate f-string loop used before the vectorized rewrite.
+    normalized = []
+    for x, y in polygon:
+        normalized.append(f"{x / width:.6f}")
+        normalized.append(f"{y / height:.6f}")
+    return " ".join(normalized)
+
+
+def synthetic_mask(rng: np.random.Generator, width: int, height: int, blobs: int):
+    """Irregular damage-like blobs with long, noisy contours."""
+    mask = np.zeros((height, width), dtype=np.uint8)
+    for _ in range(blobs):
+        cx, cy = rng.uniform(0.1, 0.9) * width, rng.uniform(0.1, 0.9) * height
+        radius = rng.uniform(0.03, 0.15) * min(width, height)
+        angles = np.linspace(0, 2 * np.pi, 720, endpoint=False)
+        radii = radius * (1 + 0.25 * rng.standard_normal(angles.size).cumsum() / np.sqrt(angles.size))
+        points = np.stack([cx + radii * np.cos(angles), cy + radii * np.sin(angles)], axis=1)
+        cv2.fillPoly(mask, [points.astype(np.int32)], 255)
+    return mask
+
+
+def generate_dataset(data_root: Path, count: int, width: int, height: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    mask_dir = data_root / "Car damages dataset" / "File1" / "masks_human"
+    img_dir = data_root / "Car damages dataset" / "File1" / "img"
+    mask_dir.mkdir(parents=True, exist_ok=True)
+    img_dir.mkdir(parents=True, exist_ok=True)
+    image_bytes = os.urandom(64 * 1024)
+    for index in range(count):
+        name = f"synthetic_{index:05d}.jpg"
+        (img_dir / name).write_bytes(image_bytes)
+        cv2.imwrite(str(mask_dir / f"{name}.png"), synthetic_mask(rng, width, height, int(rng.integers(1, 6))))
+    return mask_dir
+
+
+def bench_normalize(mask_dir: Path, limit: int = 50):
+    polygons = []
+    for mask_path in sorted(mask_dir.glob("*.png"))[:limit]:
+        mask = cv2.imread(str(mask_path), cv2.IMREAD_GRAYSCALE)
+        height, width = mask.shape
+        polygons.extend((polygon, width, height) for polygon in mask_to_polygons((mask > 0).astype(np.uint8)))
+    points = sum(polygon.shape[0] for polygon, _, _ in polygons)
+    timings = {}
+    for label, fn in (("legacy", legacy_normalize_polygon), ("vectorized", normalize_polygon)):
+        started = time.perf_counter()
+        outputs = [fn(polygon, width, height) for polygon, width, height in polygons]
+        timings[label] = (time.perf_counter() - started, outputs)
+    assert timings["legacy"][1] == timings["vectorized"][1]
+    return len(polygons), points, timings["legacy"][0], timings["vectorized"][0]
+
+
+def label_points(output_root: Path):
+    counts = [
+        (len(line.split()) - 1) // 2
+        for label in output_root.glob("labels/*/*.txt")
+        for line in label.read_text(encoding="utf-8").splitlines()
+        if line
+    ]
+    return sum(counts) / max(len(counts), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=400, help="Synthetic masks to generate.")
+    parser.add_argument("--width", type=int, default=2000)
+    parser.add_argument("--height", type=int, default=1500)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--simplify-tolerance", type=float, default=1.5)
+    parser.add_argument("--max-points", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        data_root = tmp / "data"
+        mask_dir = generate_dataset(data_root, args.count, args.width, args.height)
+
+        polygons, points, legacy_s, vector_s = bench_normalize(mask_dir)
+        print(
+            f"normalize_polygon on {polygons} polygons / {points} points: legacy {legacy_s * 1000:.1f} ms, "
+            f"vectorized {vector_s * 1000:.1f} ms ({legacy_s / max(vector_s, 1e-9):.1f}x)"
+        )
+
+        runs = []
+        for label, output, kwargs in (
+            ("cold, serial", "serial", {"workers": 1}),
+            ("cold, parallel", "parallel", {"workers": args.workers}),
+            ("rerun, unchanged", "parallel", {"workers": args.workers}),
+            (
+                "cold, simplified",
+                "simplified",
+                {
+                    "workers": args.workers,
+                    "simplify_tolerance": args.simplify_tolerance,
+                    "max_points": args.max_points,
+                },
+            ),
+        ):
+            random.seed(0)
+            stats = prepare_dataset(data_root, tmp / output, **kwargs)
+            runs.append((label, kwargs["workers"], stats, label_points(tmp / output)))
+        shutil.rmtree(data_root)
+
+    print()
+    print(f"{'run':<18} {'workers':>7} {'written':>8} {'seconds':>8} {'files/sec':>10} {'pts/polygon':>12}")
+    for label, workers, stats, avg_points in runs:
+        print(
+            f"{label:<18} {workers:>7} {stats['written']:>8} {stats['seconds']:>8.2f} "
+            f"{stats['files'] / max(stats['seconds'], 1e-9):>10.0f} {avg_points:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
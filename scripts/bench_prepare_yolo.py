@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from prepare_yolo import prepare_dataset
+
+CLASSES = ["Dent", "Scratch", "Crack", "Glass shatter", "Lamp broken", "Tire flat"]
+
+
+def generate_dataset(data_root: Path, count: int, seed: int = 0):
+    """Write ``count`` synthetic Supervisely-style annotations plus tiny stand-in images."""
+    rng = random.Random(seed)
+    ann_dir = data_root / "Car damages dataset" / "File1" / "ann"
+    img_dir = data_root / "Car damages dataset" / "File1" / "img"
+    ann_dir.mkdir(parents=True, exist_ok=True)
+    img_dir.mkdir(parents=True, exist_ok=True)
+    image_bytes = os.urandom(64 * 1024)
+    for index in range(count):
+        width, height = rng.choice([(1280, 960), (1920, 1080), (4000, 3000)])
+        objects = []
+        for _ in range(rng.randint(1, 12)):
+            cx, cy = rng.uniform(0, width), rng.uniform(0, height)
+            points = [
+                [
+                    min(max(cx + rng.uniform(-150, 150), 0), width),
+                    min(max(cy + rng.uniform(-150, 150), 0), height),
+                ]
+                for _ in range(rng.randint(4, 40))
+            ]
+            objects.append(
+                {
+                    "classTitle": rng.choice(CLASSES),
+                    "geometryType": "polygon",
+                    "points": {"exterior": points, "interior": []},
+                }
+            )
+        name = f"synthetic_{index:06d}.jpg"
+        (img_dir / name).write_bytes(image_bytes)
+        annotation = {"size": {"width": width, "height": height}, "objects": objects}
+        (ann_dir / f"{name}.json").write_text(json.dumps(annotation), encoding="utf-8")
+    return ann_dir
+
+
+def run(label: str, data_root: Path, output_root: Path, workers: int):
+    started = time.perf_counter()
+    stats = prepare_dataset(data_root, output_root, workers=workers)
+    elapsed = time.perf_counter() - started
+    rate = stats["files"] / max(elapsed, 1e-9)
+    return {"run": label, "workers": workers, "written": stats["written"], "seconds": elapsed, "files_per_sec": rate}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=3000, help="Synthetic annotations to generate.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--touch-fraction", type=float, default=0.05, help="Share edited before the rerun.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        data_root = tmp / "data"
+        ann_dir = generate_dataset(data_root, args.count)
+
+        results = [run("cold, serial", data_root, tmp / "serial", workers=1)]
+        output_root = tmp / "parallel"
+        results.append(run("cold, parallel", data_root, output_root, workers=args.workers))
+        results.append(run("rerun, unchanged", data_root, output_root, workers=args.workers))
+
+        ann_paths = sorted(ann_dir.glob("*.json"))
+        for ann_path in random.Random(1).sample(ann_paths, int(len(ann_paths) * args.touch_fraction)):
+            annotation = json.loads(ann_path.read_text(encoding="utf-8"))
+            annotation["objects"] = annotation["objects"][:-1] or annotation["objects"]
+            ann_path.write_text(json.dumps(annotation), encoding="utf-8")
+        results.append(run("rerun, edited", data_root, output_root, workers=args.workers))
+        shutil.rmtree(data_root)
+
+    print()
+    print(f"{'run':<18} {'workers':>7} {'written':>8} {'seconds':>8} {'files/sec':>10}")
+    for result in results:
+        print(
+            f"{result['run']:<18} {result['workers']:>7} {result['written']:>8} "
+            f"{result['seconds']:>8.2f} {result['files_per_sec']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image
+from ultralytics.engine.results import Results
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from main import _format_result, _to_columnar  # noqa: E402
+
+
+def legacy_format_result(result, image: Image.Image):
+    # Per-box loop that _run_prediction used before the columnar rewrite.
+    names = result.names or {}
+    predictions = []
+    if result.boxes is not None:
+        for box in result.boxes:
+            cls_id = int(box.cls[0]) if box.cls is not None else 0
+            conf = float(box.conf[0]) if box.conf is not None else 0.0
+            x1, y1, x2, y2 = [float(v) for v in box.xyxy[0].tolist()]
+            predictions.append(
+                {
+                    "class_id": cls_id,
+                    "label": names.get(cls_id, str(cls_id)),
+                    "confidence": conf,
+                    "bbox": [x1, y1, x2, y2],
+                }
+            )
+    return {"width": image.width, "height": image.height, "predictions": predictions}
+
+
+def make_result(num_boxes: int, width: int = 1280, height: int = 960, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    x1 = rng.uniform(0, width - 10, num_boxes)
+    y1 = rng.uniform(0, height - 10, num_boxes)
+    x2 = np.minimum(x1 + rng.uniform(5, 200, num_boxes), width)
+    y2 = np.minimum(y1 + rng.uniform(5, 200, num_boxes), height)
+    conf = rng.uniform(0.25, 1.0, num_boxes)
+    cls = rng.integers(0, 21, num_boxes)
+    data = torch.tensor(np.stack([x1, y1, x2, y2, conf, cls], axis=1), dtype=torch.float32)
+    names = {i: f"class-{i}" for i in range(21)}
+    orig = np.zeros((height, width, 3), dtype=np.uint8)
+    return Results(orig, path="synthetic.jpg", names=names, boxes=data), Image.new("RGB", (width, height))
+
+
+def timeit(fn, repeat: int):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=50, help="Timed iterations per case.")
+    args = parser.parse_args()
+
+    print(f"{'boxes':>6} {'legacy ms':>10} {'vector ms':>10} {'speedup':>8} "
+          f"{'records KB':>11} {'columnar KB':>12} {'records dump ms':>16} {'columnar dump ms':>17}")
+    for size in args.sizes:
+        result, image = make_result(size)
+        legacy_ms = timeit(lambda: legacy_format_result(result, image), args.repeat)
+        vector_ms = timeit(lambda: _format_result(result, image), args.repeat)
+        records = _format_result(result, image)
+        columnar = _to_columnar(records)
+        assert records == legacy_format_result(result, image) or size == 0
+        records_dump_ms = timeit(lambda: json.dumps(records), args.repeat)
+        columnar_dump_ms = timeit(lambda: json.dumps(columnar), args.repeat)
+        print(
+            f"{size:>6} {legacy_ms:>10.3f} {vector_ms:>10.3f} {legacy_ms / vector_ms:>7.1f}x "
+            f"{len(json.dumps(records)) / 1024:>11.1f} {len(json.dumps(columnar)) / 1024:>12.1f} "
+            f"{records_dump_ms:>16.3f} {columnar_dump_ms:>17.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from shards import ShardSet, pack_directory  # noqa: E402
+
+
+def make_files(root: Path, count: int, min_kb: int, max_kb: int, seed: int):
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    for index in range(count):
+        (root / f"img_{index:06d}.jpg").write_bytes(os.urandom(rng.randint(min_kb, max_kb) * 1024))
+
+
+def drop_caches() -> bool:
+    """Evict the page cache so reads hit the disk (needs root)."""
+    try:
+        os.sync()
+        Path("/proc/sys/vm/drop_caches").write_text("3\n")
+        return True
+    except OSError:
+        return False
+
+
+def run(label: str, read, names: list[str], threads: int):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(read, names))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<14} {len(names) / elapsed:>10.0f} files/s {total / elapsed / 1e6:>10.1f} MB/s "
+        f"{elapsed / len(names) * 1e6:>8.1f} us/file"
+    )
+    return {"files_per_s": len(names) / elapsed, "mb_per_s": total / elapsed / 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Random-access read throughput: loose image files vs. memory-mapped shards."
+    )
+    parser.add_argument("--dir", default=None, help="Existing image directory (default: synthetic files).")
+    parser.add_argument("--count", type=int, default=5000, help="Synthetic files to create.")
+    parser.add_argument("--min-kb", type=int, default=50)
+    parser.add_argument("--max-kb", type=int, default=400)
+    parser.add_argument("--reads", type=int, default=20000, help="Random reads per layout.")
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument(
+        "--hash", action="store_true", help="SHA-256 what is read, as the API does (zero-copy for shards)."
+    )
+    parser.add_argument("--cold", action="store_true", help="Drop the page cache before each layout (root).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = Path(args.dir) if args.dir else tmp / "loose"
+        if not args.dir:
+            make_files(source, args.count, args.min_kb, args.max_kb, args.seed)
+        started = time.perf_counter()
+        paths = pack_directory(source, tmp / "shards" / "images")
+        print(f"packed {source} into {len(paths)} shard(s) in {time.perf_counter() - started:.2f} s")
+
+        shards = ShardSet(tmp / "shards")
+        shards.refresh()
+        rng = random.Random(args.seed)
+        names = [name for name, _, _ in shards.items()]
+        names = [rng.choice(names) for _ in range(args.reads)]
+
+        # Every byte is touched: copied out of the mapping, or hashed straight from it.
+        def read_loose(name: str) -> int:
+            data = (source / name).read_bytes()
+            if args.hash:
+                hashlib.sha256(data)
+            return len(data)
+
+        def read_shard(name: str) -> int:
+            data = shards.get(name)
+            if args.hash:
+                hashlib.sha256(data)
+            else:
+                data = bytes(data)
+            return len(data)
+
+        for label, read in (("loose files", read_loose), ("mmap shards", read_shard)):
+            if args.cold and not drop_caches():
+                print("--cold needs root; measuring with a warm page cache.")
+                args.cold = False
+            run(label, read, names, args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from boxes import iou_matrix  # noqa: E402
+from inference_backends import OnnxDetector, export_onnx  # noqa: E402
+from main import _file_digest, _format_result  # noqa: E402
+
+
+def load_images(image_dir: Path | None, count: int):
+    if image_dir is not None:
+        paths = sorted(p for p in image_dir.iterdir() if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+        return [(p.name, Image.open(p).convert("RGB")) for p in paths[:count]]
+    rng = np.random.default_rng(0)
+    sizes = [(640, 480), (1280, 960), (1920, 1080), (800, 1200)]
+    return [
+        (f"synthetic_{i}", Image.fromarray(rng.integers(0, 255, (*sizes[i % 4][::-1], 3), dtype=np.uint8)))
+        for i in range(count)
+    ]
+
+
+def match(reference: list[dict], candidate: list[dict], min_iou: float):
+    """Greedy same-class matching; returns (matched, max confidence delta)."""
+    if not reference or not candidate:
+        return 0, 0.0
+    ious = iou_matrix([p["bbox"] for p in reference], [p["bbox"] for p in candidate])
+    same_class = np.array([[r["class_id"] == c["class_id"] for c in candidate] for r in reference])
+    ious = np.where(same_class, ious, 0.0)
+    matched, max_delta = 0, 0.0
+    for _ in range(min(len(reference), len(candidate))):
+        r, c = np.unravel_index(ious.argmax(), ious.shape)
+        if ious[r, c] < min_iou:
+            break
+        matched += 1
+        max_delta = max(max_delta, abs(reference[r]["confidence"] - candidate[c]["confidence"]))
+        ious[r, :] = 0
+        ious[:, c] = 0
+    return matched, max_delta
+
+
+def timed_load(fn):
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    model = fn()
+    return model, time.perf_counter() - started, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that the ONNX Runtime backend reproduces PyTorch predictions."
+    )
+    parser.add_argument("--weights", required=True, help="YOLO .pt detection weights.")
+    parser.add_argument("--images", default=None, help="Directory of images (default: synthetic).")
+    parser.add_argument("--count", type=int, default=16)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--threads", type=int, default=0, help="ONNX intra-op threads (0 = auto).")
+    parser.add_argument("--min-iou", type=float, default=0.9, help="IoU for boxes to count as equal.")
+    parser.add_argument("--min-match", type=float, default=0.95, help="Required share of matched boxes.")
+    args = parser.parse_args()
+
+    weights = Path(args.weights)
+    images = load_images(Path(args.images) if args.images else None, args.count)
+    stat = weights.stat()
+    digest = _file_digest(str(weights), stat.st_mtime_ns, stat.st_size)
+
+    from ultralytics import YOLO
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        torch_model, torch_load_s, torch_rss = timed_load(lambda: YOLO(str(weights)))
+        onnx_path = export_onnx(weights, Path(cache_dir), digest, args.imgsz)
+        onnx_model, onnx_load_s, onnx_rss = timed_load(
+            lambda: OnnxDetector(onnx_path, intra_op_threads=args.threads)
+        )
+
+        totals = {"reference": 0, "candidate": 0, "matched": 0}
+        max_delta = 0.0
+        latency = {"pytorch": [], "onnx": []}
+        for name, image in images:
+            started = time.perf_counter()
+            reference = _format_result(
+                torch_model.predict(image, imgsz=args.imgsz, conf=args.conf, verbose=False)[0], image
+            )["predictions"]
+            latency["pytorch"].append(time.perf_counter() - started)
+            started = time.perf_counter()
+            candidate = _format_result(onnx_model.predict([image], conf=args.conf)[0], image)["predictions"]
+            latency["onnx"].append(time.perf_counter() - started)
+
+            matched, delta = match(reference, candidate, args.min_iou)
+            totals["reference"] += len(reference)
+            totals["candidate"] += len(candidate)
+            totals["matched"] += matched
+            max_delta = max(max_delta, delta)
+            print(f"{name}: pytorch {len(reference)} boxes, onnx {len(candidate)} boxes, {matched} matched")
+
+    print()
+    print(f"{'backend':<8} {'load s':>7} {'max RSS +MB':>12} {'p50 ms':>8} {'mean ms':>8}")
+    for backend, load_s, rss in (("pytorch", torch_load_s, torch_rss), ("onnx", onnx_load_s, onnx_rss)):
+        values = np.array(latency[backend][1:] or latency[backend]) * 1000
+        print(f"{backend:<8} {load_s:>7.2f} {rss / 1024:>12.1f} {np.median(values):>8.1f} {values.mean():>8.1f}")
+
+    expected = max(totals["reference"], totals["candidate"])
+    share = totals["matched"] / expected if expected else 1.0
+    print(f"\nMatched {totals['matched']}/{expected} boxes ({share:.1%}), max confidence delta {max_delta:.4f}")
+    if share < args.min_match:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
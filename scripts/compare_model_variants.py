@@ -0,0 +1,185 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from boxes import iou_matrix  # noqa: E402
+from inference_backends import load_detector  # noqa: E402
+from main import _file_digest, _format_result  # noqa: E402
+from variants import FULL, ModelVariant, parse_variants  # noqa: E402
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+def load_split(dataset: Path, split: str, count: int | None):
+    """``(name, image, boxes, classes)`` for a split written by prepare_yolo.py."""
+    paths = sorted(p for p in (dataset / "images" / split).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    items = []
+    for path in paths[:count]:
+        # Labels use the stored pixel grid, so images are not EXIF-rotated.
+        image = Image.open(path).convert("RGB")
+        label_path = dataset / "labels" / split / f"{path.stem}.txt"
+        rows = np.loadtxt(label_path, ndmin=2) if label_path.exists() else np.zeros((0, 5))
+        rows = rows.reshape(-1, 5)
+        xc, w = rows[:, 1] * image.width, rows[:, 3] * image.width
+        yc, h = rows[:, 2] * image.height, rows[:, 4] * image.height
+        boxes = np.stack([xc - w / 2, yc - h / 2, xc + w / 2, yc + h / 2], axis=1)
+        items.append((path.name, image, boxes, rows[:, 0].astype(np.int64)))
+    return items
+
+
+def match_flags(predictions: list[dict], boxes: np.ndarray, classes: np.ndarray, min_iou: float):
+    """Greedy same-class matching in confidence order; True for each prediction that
+    claims a previously unclaimed reference box."""
+    order = sorted(range(len(predictions)), key=lambda i: -predictions[i]["confidence"])
+    flags = [False] * len(predictions)
+    if not predictions or not len(boxes):
+        return flags
+    ious = iou_matrix([p["bbox"] for p in predictions], boxes.tolist())
+    claimed = np.zeros(len(boxes), dtype=bool)
+    for i in order:
+        candidates = np.where((classes == predictions[i]["class_id"]) & ~claimed, ious[i], 0.0)
+        best = int(candidates.argmax())
+        if candidates[best] >= min_iou:
+            claimed[best] = flags[i] = True
+    return flags
+
+
+def average_precision(scored: list[tuple[float, bool]], positives: int) -> float:
+    """Area under the interpolated precision/recall curve of one class."""
+    if not positives:
+        return float("nan")
+    scored = sorted(scored, key=lambda item: -item[0])
+    hits = np.cumsum([hit for _, hit in scored]) if scored else np.zeros(0)
+    precision = hits / np.arange(1, len(scored) + 1)
+    recall = hits / positives
+    precision = np.concatenate([[0.0], precision, [0.0]])
+    recall = np.concatenate([[0.0], recall, [recall[-1] if len(recall) else 0.0]])
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+    return float(np.sum((recall[1:] - recall[:-1]) * precision[1:]))
+
+
+def evaluate(model, items, conf: float, min_iou: float):
+    """Per-image latency, predictions and detection metrics of one variant."""
+    model.predict([items[0][1]], conf=conf, verbose=False)  # warm-up
+    latencies, outputs = [], []
+    scored, positives, hits, predicted = {}, {}, 0, 0
+    for _, image, boxes, classes in items:
+        started = time.perf_counter()
+        predictions = _format_result(model.predict([image], conf=conf, verbose=False)[0], image)["predictions"]
+        latencies.append(time.perf_counter() - started)
+        outputs.append(predictions)
+        flags = match_flags(predictions, boxes, classes, min_iou)
+        for prediction, flag in zip(predictions, flags):
+            scored.setdefault(prediction["class_id"], []).append((prediction["confidence"], flag))
+        for cls_id in classes.tolist():
+            positives[cls_id] = positives.get(cls_id, 0) + 1
+        hits += sum(flags)
+        predicted += len(predictions)
+    labelled = sum(positives.values())
+    aps = [average_precision(scored.get(cls_id, []), count) for cls_id, count in positives.items()]
+    latencies = np.array(latencies) * 1000
+    return outputs, {
+        "p50_ms": float(np.median(latencies)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "precision": hits / predicted if predicted else 0.0,
+        "recall": hits / labelled if labelled else 0.0,
+        "map50": float(np.mean(aps)) if aps else float("nan"),
+    }
+
+
+def agreement(reference: list[list[dict]], candidate: list[list[dict]], min_iou: float) -> float:
+    """Share of the full model's boxes that the variant reproduces (same class, IoU)."""
+    matched = total = 0
+    for ref, cand in zip(reference, candidate):
+        boxes = np.array([p["bbox"] for p in ref], dtype=np.float32).reshape(-1, 4)
+        classes = np.array([p["class_id"] for p in ref], dtype=np.int64)
+        matched += sum(match_flags(cand, boxes, classes, min_iou))
+        total += len(ref)
+    return matched / total if total else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Accuracy and latency of model variants on a prepare_yolo.py validation split."
+    )
+    parser.add_argument("--weights", default="/Users/kanavkahol/work/car_parts/models/parts_best.pt")
+    parser.add_argument("--dataset", default="/Users/kanavkahol/work/car_parts/yolo_dataset")
+    parser.add_argument(
+        "--variants",
+        default="int8:onnx-int8:640,small:onnx-int8:416,tiny:onnx-int8:320",
+        help="Same format as PARTS_MODEL_VARIANTS; weights paths are relative to --weights.",
+    )
+    parser.add_argument("--backend", default="pytorch", help="Backend of the full model.")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--count", type=int, default=None, help="Validation images to use (default: all).")
+    parser.add_argument("--calibration", type=int, default=32, help="Train images used to calibrate INT8.")
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold (the API default).")
+    parser.add_argument("--min-iou", type=float, default=0.5)
+    parser.add_argument("--threads", type=int, default=0, help="ONNX intra-op threads (0 = auto).")
+    parser.add_argument("--cache-dir", default=None, help="Keep ONNX exports here (default: temporary).")
+    args = parser.parse_args()
+
+    weights = Path(args.weights)
+    dataset = Path(args.dataset)
+    items = load_split(dataset, "val", args.count)
+    if not items:
+        sys.exit(f"No validation images under {dataset / 'images' / 'val'}")
+    calibration = sorted(
+        str(p) for p in (dataset / "images" / "train").iterdir() if p.suffix.lower() in IMAGE_SUFFIXES
+    )[: args.calibration]
+    variants = [ModelVariant(FULL, args.backend, args.imgsz), *parse_variants(args.variants).values()]
+    print(f"{len(items)} validation images, {len(calibration)} calibration images\n")
+
+    with tempfile.TemporaryDirectory() as scratch:
+        cache_dir = Path(args.cache_dir or scratch)
+        rows, reference = [], None
+        for variant in variants:
+            path = weights.parent / variant.weights if variant.weights else weights
+            stat = path.stat()
+            started = time.perf_counter()
+            model = load_detector(
+                path,
+                variant.backend,
+                _file_digest(str(path), stat.st_mtime_ns, stat.st_size),
+                cache_dir,
+                imgsz=variant.imgsz,
+                intra_op_threads=args.threads,
+                pytorch_imgsz=variant.imgsz,
+                calibration_images=calibration,
+            )
+            load_s = time.perf_counter() - started
+            served = getattr(model, "backend", "pytorch")
+            outputs, row = evaluate(model, items, args.conf, args.min_iou)
+            reference = reference or outputs
+            row.update(
+                name=variant.name,
+                backend=served,
+                imgsz=variant.imgsz,
+                load_s=load_s,
+                agreement=agreement(reference, outputs, args.min_iou),
+            )
+            rows.append(row)
+            print(f"{variant.name}: {served} @ {variant.imgsz}, loaded in {load_s:.1f} s")
+
+    print()
+    print(
+        f"{'variant':<10} {'backend':<10} {'imgsz':>5} {'p50 ms':>8} {'p95 ms':>8} {'speedup':>8} "
+        f"{'prec':>6} {'recall':>6} {'mAP50':>6} {'agree':>6}"
+    )
+    for row in rows:
+        print(
+            f"{row['name']:<10} {row['backend']:<10} {row['imgsz']:>5} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+            f"{rows[0]['p50_ms'] / row['p50_ms']:>7.2f}x {row['precision']:>6.3f} {row['recall']:>6.3f} "
+            f"{row['map50']:>6.3f} {row['agreement']:>6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import time
+
+import httpx
+
+MODES = {
+    "full": {"mode": "full"},
+    "grounded": {"mode": "grounded"},
+    "grounded+crops": {"mode": "grounded", "crops": True},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare token use and latency of /damage-analysis report modes."
+    )
+    parser.add_argument("--api", default="http://127.0.0.1:8009", help="Backend base URL.")
+    parser.add_argument("--images", nargs="*", help="Image names (default: first --count from /images).")
+    parser.add_argument("--count", type=int, default=5)
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Subset of {', '.join(MODES)}.")
+    args = parser.parse_args()
+
+    client = httpx.Client(base_url=args.api, timeout=300)
+    images = args.images or client.get("/images", params={"limit": args.count}).json()["images"]
+
+    print(f"{'mode':<16} {'calls':>5} {'prompt tok':>11} {'compl tok':>10} {'LLM ms':>8} {'wall ms':>8} {'items':>6}")
+    for name in args.modes.split(","):
+        rows = []
+        for image_name in images:
+            started = time.perf_counter()
+            response = client.post("/damage-analysis", json={"image_name": image_name, **MODES[name]})
+            response.raise_for_status()
+            report = response.json()
+            usage = report.get("usage") or {}
+            rows.append(
+                (
+                    usage.get("prompt_tokens") or 0,
+                    usage.get("completion_tokens") or 0,
+                    usage.get("latency_ms") or 0.0,
+                    (time.perf_counter() - started) * 1000,
+                    len(report.get("items") or []),
+                )
+            )
+        count = len(rows)
+        means = [sum(column) / count for column in zip(*rows)]
+        print(
+            f"{name:<16} {count:>5} {means[0]:>11.0f} {means[1]:>10.0f} "
+            f"{means[2]:>8.0f} {means[3]:>8.0f} {means[4]:>6.1f}"
+        )
+    print("\nToken counts and LLM latency come from the call that produced each report,")
+    print("so they stay meaningful when the backend answers from its result cache.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+
+IMAGE_EXTENSIONS = [".jpg", ".png", ".jpeg"]
+
+
+def find_image(img_dir: Path, image_name: str):
+    image_path = img_dir / image_name
+    if image_path.exists():
+        return image_path
+    for ext in IMAGE_EXTENSIONS:
+        candidate = img_dir / f"{image_name}{ext}"
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def input_fingerprint(data: bytes, image_path: Path) -> str:
+    """Hash of an input file's bytes plus the stat of the image it points at."""
+    stat = image_path.stat()
+    digest = hashlib.sha256(data)
+    digest.update(f"{image_path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def link_or_copy(src: Path, dst: Path):
+    """Hardlink ``src`` to ``dst``, falling back to a copy across filesystems."""
+    if dst.exists() or dst.is_symlink():
+        try:
+            if os.path.samefile(src, dst):
+                return
+        except OSError:
+            pass
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def remove_outputs(output_root: Path, split_name: str, image_file: str):
+    label_path = output_root / "labels" / split_name / f"{Path(image_file).stem}.txt"
+    image_path = output_root / "images" / split_name / image_file
+    for path in (label_path, image_path):
+        if path.exists():
+            path.unlink()
+
+
+@contextmanager
+def worker_map(workers: int | None, chunksize: int = 32):
+    """Yield a lazy ``map(fn, items)``; unordered over a process pool unless workers == 1."""
+    if workers == 1:
+        yield map
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield lambda fn, items: pool.imap_unordered(fn, items, chunksize=chunksize)
+
+
+def load_manifest(path: Path):
+    if not path.exists():
+        return {"files": {}}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_manifest(path: Path, manifest: dict):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
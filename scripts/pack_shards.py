@@ -0,0 +1,70 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from shards import DEFAULT_SHARD_BYTES, SHARD_SUFFIX, Shard, pack_directory  # noqa: E402
+
+
+def unpack(shard_paths: list[Path], output: Path) -> int:
+    """Write every member back out as a loose file; returns the file count."""
+    count = 0
+    for shard_path in shard_paths:
+        shard = Shard(shard_path)
+        for name, (_, _, mtime_ns) in shard.members.items():
+            target = output / name
+            if not target.resolve().is_relative_to(output.resolve()):
+                raise ValueError(f"Refusing to unpack {name!r} outside {output}.")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            data = shard.get(name)
+            if name == "data.yaml":
+                # Point the dataset at its new location.
+                lines = bytes(data).decode("utf-8").splitlines(keepends=True)
+                data = "".join(
+                    f"path: {output.resolve()}\n" if line.startswith("path:") else line for line in lines
+                ).encode("utf-8")
+            target.write_bytes(data)
+            if mtime_ns:
+                os.utime(target, ns=(mtime_ns, mtime_ns))
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert between a directory of loose files and packed, memory-mappable shards."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pack = commands.add_parser("pack", help="Pack a directory tree into shards.")
+    pack.add_argument("source", help="Directory to pack, e.g. IMAGE_DIR or a YOLO dataset root.")
+    pack.add_argument("prefix", help="Output prefix; shards are written as PREFIX-00000.shard, ...")
+    pack.add_argument("--shard-bytes", type=int, default=DEFAULT_SHARD_BYTES, help="Maximum shard size.")
+    pack.add_argument(
+        "--extensions", default=None, help="Comma-separated suffixes to include, e.g. .jpg,.png (default: all)."
+    )
+
+    unpack_parser = commands.add_parser("unpack", help="Restore the loose files from shards.")
+    unpack_parser.add_argument("shards", nargs="+", help="Shard files or directories of shards.")
+    unpack_parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        source, prefix = Path(args.source), Path(args.prefix)
+        extensions = {ext.strip().lower() for ext in args.extensions.split(",")} if args.extensions else None
+        paths = pack_directory(source, prefix, extensions, args.shard_bytes)
+        members = sum(len(Shard(path)) for path in paths)
+        size = sum(path.stat().st_size for path in paths)
+        print(f"Packed {members} files ({size / 1e6:.1f} MB) into {len(paths)} shard(s) at {prefix}-*{SHARD_SUFFIX}")
+    else:
+        shard_paths = []
+        for item in map(Path, args.shards):
+            shard_paths.extend(sorted(item.glob(f"*{SHARD_SUFFIX}")) if item.is_dir() else [item])
+        count = unpack(shard_paths, Path(args.output))
+        print(f"Unpacked {count} files from {len(shard_paths)} shard(s) into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
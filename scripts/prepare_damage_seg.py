@@ -1,17 +1,52 @@
 import argparse
+import os
 import random
+import sys
+import time
 from pathlib import Path
 
 import cv2
 import numpy as np
 
+from dataset_utils import (
+    find_image,
+    input_fingerprint,
+    link_or_copy,
+    load_manifest,
+    remove_outputs,
+    save_manifest,
+    worker_map,
+)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from shards import DEFAULT_SHARD_BYTES, pack_directory  # noqa: E402
+
+MANIFEST_NAME = ".prepare_damage_seg_manifest.json"
+
 
 def iter_masks(mask_dir: Path):
     for mask_path in sorted(mask_dir.glob("*.png")):
         yield mask_path
 
 
-def mask_to_polygons(mask: np.ndarray):
+def simplify_contour(contour: np.ndarray, tolerance: float = 0.0, max_points: int | None = None):
+    """Douglas-Peucker simplification; tolerance grows until max_points is met."""
+    if tolerance > 0:
+        contour = cv2.approxPolyDP(contour, tolerance, True)
+    if max_points:
+        max_points = max(max_points, 3)
+    if max_points and contour.shape[0] > max_points:
+        epsilon = max(tolerance, 0.5)
+        simplified = contour
+        while simplified.shape[0] > max_points:
+            epsilon *= 1.5
+            simplified = cv2.approxPolyDP(contour, epsilon, True)
+        contour = simplified
+    return contour
+
+
+def mask_to_polygons(mask: np.ndarray, tolerance: float = 0.0, max_points: int | None = None):
     contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     polygons = []
     for contour in contours:
@@ -20,17 +55,46 @@ def mask_to_polygons(mask: np.ndarray):
         area = cv2.contourArea(contour)
         if area < 10.0:
             continue
+        contour = simplify_contour(contour, tolerance, max_points)
+        if contour.shape[0] < 3:
+            continue
         polygon = contour.reshape(-1, 2)
         polygons.append(polygon)
     return polygons
 
 
 def normalize_polygon(polygon: np.ndarray, width: int, height: int):
-    normalized = []
-    for x, y in polygon:
-        normalized.append(f"{x / width:.6f}")
-        normalized.append(f"{y / height:.6f}")
-    return " ".join(normalized)
+    coords = (polygon / np.array([width, height], dtype=np.float64)).ravel()
+    # One C-level format call for the whole contour instead of an f-string per coordinate.
+    return " ".join(["%.6f"] * coords.size) % tuple(coords.tolist())
+
+
+def process_mask(task):
+    """Worker: turn one mask into a label file unless its fingerprint is unchanged."""
+    mask_path, image_path, known_fingerprint, label_path, dest_img, tolerance, max_points = task
+    data = mask_path.read_bytes()
+    fingerprint = input_fingerprint(data, image_path)
+    if fingerprint == known_fingerprint:
+        return mask_path.name, fingerprint, "unchanged"
+
+    mask = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if mask is None:
+        return mask_path.name, None, "unreadable"
+
+    height, width = mask.shape[:2]
+    binary = (mask > 0).astype(np.uint8)
+    polygons = mask_to_polygons(binary, tolerance, max_points)
+
+    label_lines = []
+    for polygon in polygons:
+        if polygon.shape[0] < 3:
+            continue
+        coords = normalize_polygon(polygon, width, height)
+        label_lines.append(f"0 {coords}")
+
+    label_path.write_text("\n".join(label_lines), encoding="utf-8")
+    link_or_copy(image_path, dest_img)
+    return mask_path.name, fingerprint, "written"
 
 
 def prepare_dataset(
@@ -38,7 +102,12 @@ def prepare_dataset(
     output_root: Path,
     split_ratio: float = 0.8,
     seed: int = 42,
+    workers: int | None = None,
+    simplify_tolerance: float = 0.0,
+    max_points: int | None = None,
+    force: bool = False,
 ):
+    started = time.perf_counter()
     mask_dir = data_root / "Car damages dataset" / "File1" / "masks_human"
     img_dir = data_root / "Car damages dataset" / "File1" / "img"
 
@@ -52,48 +121,64 @@ def prepare_dataset(
     random.shuffle(masks)
 
     split_index = int(len(masks) * split_ratio)
-    train_masks = masks[:split_index]
-    val_masks = masks[split_index:]
-
-    for split_name, split_masks in [("train", train_masks), ("val", val_masks)]:
+    splits = {
+        mask_path.name: "train" if index < split_index else "val"
+        for index, mask_path in enumerate(masks)
+    }
+    for split_name in ("train", "val"):
         (output_root / "images" / split_name).mkdir(parents=True, exist_ok=True)
         (output_root / "labels" / split_name).mkdir(parents=True, exist_ok=True)
 
-        for mask_path in split_masks:
-            image_name = mask_path.stem
-            image_path = img_dir / image_name
-            if not image_path.exists():
-                for ext in [".jpg", ".png", ".jpeg"]:
-                    candidate = img_dir / f"{image_name}{ext}"
-                    if candidate.exists():
-                        image_path = candidate
-                        break
-            if not image_path.exists():
-                print(f"Skipping missing image for {mask_path.name}")
-                continue
-
-            mask = cv2.imread(str(mask_path), cv2.IMREAD_GRAYSCALE)
-            if mask is None:
-                print(f"Skipping unreadable mask: {mask_path.name}")
-                continue
-
-            height, width = mask.shape[:2]
-            binary = (mask > 0).astype(np.uint8)
-            polygons = mask_to_polygons(binary)
-
-            label_lines = []
-            for polygon in polygons:
-                if polygon.shape[0] < 3:
-                    continue
-                coords = normalize_polygon(polygon, width, height)
-                label_lines.append(f"0 {coords}")
+    manifest_path = output_root / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    settings = {
+        "split_ratio": split_ratio,
+        "seed": seed,
+        "simplify_tolerance": simplify_tolerance,
+        "max_points": max_points,
+    }
+    reusable = not force and manifest.get("settings") == settings
+    previous = {}
+    for name, entry in manifest["files"].items():
+        if reusable and splits.get(name) == entry["split"]:
+            previous[name] = entry
+        else:
+            remove_outputs(output_root, entry["split"], entry["image"])
 
-            label_path = output_root / "labels" / split_name / f"{image_path.stem}.txt"
-            label_path.write_text("\n".join(label_lines), encoding="utf-8")
+    tasks = []
+    images = {}
+    for mask_path in masks:
+        image_path = find_image(img_dir, mask_path.stem)
+        if image_path is None:
+            print(f"Skipping missing image for {mask_path.name}")
+            continue
+        split_name = splits[mask_path.name]
+        label_path = output_root / "labels" / split_name / f"{image_path.stem}.txt"
+        entry = previous.get(mask_path.name)
+        known = entry["fingerprint"] if entry and label_path.exists() else None
+        images[mask_path.name] = image_path.name
+        tasks.append(
+            (
+                mask_path,
+                image_path,
+                known,
+                label_path,
+                output_root / "images" / split_name / image_path.name,
+                simplify_tolerance,
+                max_points,
+            )
+        )
 
-            dest_img = output_root / "images" / split_name / image_path.name
-            if not dest_img.exists():
-                dest_img.write_bytes(image_path.read_bytes())
+    files = {}
+    written = 0
+    with worker_map(workers, chunksize=8) as imap:
+        for name, fingerprint, status in imap(process_mask, tasks):
+            if status == "unreadable":
+                print(f"Skipping unreadable mask: {name}")
+                continue
+            written += status == "written"
+            files[name] = {"fingerprint": fingerprint, "split": splits[name], "image": images[name]}
+    save_manifest(manifest_path, {"settings": settings, "files": files})
 
     data_yaml = output_root / "data.yaml"
     yaml_lines = [
@@ -106,7 +191,13 @@ def prepare_dataset(
     ]
     data_yaml.write_text("\n".join(yaml_lines), encoding="utf-8")
 
+    elapsed = time.perf_counter() - started
     print(f"Wrote damage segmentation dataset to {output_root}")
+    print(
+        f"Processed {len(masks)} masks ({written} written, {len(files) - written} unchanged) "
+        f"in {elapsed:.2f}s ({len(masks) / max(elapsed, 1e-9):.0f} files/sec)"
+    )
+    return {"files": len(masks), "written": written, "seconds": elapsed}
 
 
 def main():
@@ -123,6 +214,29 @@ def main():
     )
     parser.add_argument("--split", type=float, default=0.8, help="Train split ratio.")
     parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="Worker processes (1 runs inline)."
+    )
+    parser.add_argument(
+        "--simplify-tolerance",
+        type=float,
+        default=0.0,
+        help="approxPolyDP tolerance in pixels (0 keeps every contour point).",
+    )
+    parser.add_argument(
+        "--max-points", type=int, default=None, help="Cap on points per polygon."
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Ignore the manifest and rebuild every label."
+    )
+    parser.add_argument(
+        "--shards",
+        action="store_true",
+        help="Also pack the dataset into memory-mappable shards under OUTPUT_ROOT/shards.",
+    )
+    parser.add_argument(
+        "--shard-bytes", type=int, default=DEFAULT_SHARD_BYTES, help="Maximum size of one shard."
+    )
     args = parser.parse_args()
 
     prepare_dataset(
@@ -130,7 +244,15 @@ def main():
         Path(args.output_root),
         split_ratio=args.split,
         seed=args.seed,
+        workers=args.workers,
+        simplify_tolerance=args.simplify_tolerance,
+        max_points=args.max_points,
+        force=args.force,
     )
+    if args.shards:
+        output_root = Path(args.output_root)
+        paths = pack_directory(output_root, output_root / "shards" / "dataset", max_bytes=args.shard_bytes)
+        print(f"Packed into {len(paths)} shard(s) under {output_root / 'shards'}")
 
 
 if __name__ == "__main__":
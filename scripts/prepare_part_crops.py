@@ -0,0 +1,107 @@
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from dataset_utils import find_image
+from prepare_yolo import polygon_to_bbox
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from boxes import overlap_join  # noqa: E402
+
+
+def damage_boxes(ann_path: Path) -> np.ndarray:
+    annotation = json.loads(ann_path.read_text(encoding="utf-8"))
+    boxes = [
+        polygon_to_bbox(obj["points"]["exterior"])
+        for obj in annotation.get("objects", [])
+        if obj.get("geometryType") == "polygon" and obj.get("points", {}).get("exterior")
+    ]
+    return np.array(boxes, dtype=np.float32).reshape(-1, 4)
+
+
+def label_parts(part_boxes: np.ndarray, damage: np.ndarray, min_coverage: float):
+    """``damaged`` when a damage box lies mostly on the part, ``intact`` when none touches
+    it, ``None`` (skipped) for parts only grazed by damage."""
+    labels = ["intact"] * len(part_boxes)
+    for _, part_index, _, coverage in overlap_join(damage, part_boxes):
+        if coverage >= min_coverage:
+            labels[part_index] = "damaged"
+        elif labels[part_index] == "intact":
+            labels[part_index] = None
+    return labels
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Crop detected parts from the damage dataset into a damaged/intact classification dataset."
+    )
+    parser.add_argument(
+        "--damage-root",
+        default="/Users/kanavkahol/work/car_parts/data/Car damages dataset/File1",
+        help="Directory with img/ and ann/ (polygon damage annotations).",
+    )
+    parser.add_argument("--parts-model", default="/Users/kanavkahol/work/car_parts/models/parts_best.pt")
+    parser.add_argument("--output-root", default="/Users/kanavkahol/work/car_parts/part_crops")
+    parser.add_argument("--min-coverage", type=float, default=0.5, help="Share of a damage box on the part.")
+    parser.add_argument("--margin", type=float, default=0.1, help="Crop margin (match PART_CROP_MARGIN).")
+    parser.add_argument("--conf", type=float, default=0.4, help="Minimum part detection confidence.")
+    parser.add_argument("--split", type=float, default=0.8, help="Train split ratio.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch", type=int, default=16)
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+
+    model = YOLO(args.parts_model)
+    root = Path(args.damage_root)
+    output = Path(args.output_root)
+    pairs = []
+    for ann_path in sorted((root / "ann").glob("*.json")):
+        image_path = find_image(root / "img", ann_path.stem)
+        if image_path is not None:
+            pairs.append((ann_path, image_path))
+    random.Random(args.seed).shuffle(pairs)
+    train_count = int(len(pairs) * args.split)
+
+    counts = {}
+    for start in range(0, len(pairs), args.batch):
+        chunk = pairs[start : start + args.batch]
+        # Annotations use the stored pixel grid, so images are not EXIF-rotated here.
+        images = [Image.open(path).convert("RGB") for _, path in chunk]
+        results = model.predict(images, conf=args.conf, verbose=False)
+        for offset, ((ann_path, image_path), image, result) in enumerate(zip(chunk, images, results)):
+            split = "train" if start + offset < train_count else "val"
+            part_boxes = result.boxes.xyxy.cpu().numpy().reshape(-1, 4)
+            for index, (label, (x1, y1, x2, y2)) in enumerate(
+                zip(label_parts(part_boxes, damage_boxes(ann_path), args.min_coverage), part_boxes)
+            ):
+                if label is None:
+                    continue
+                margin_x, margin_y = (x2 - x1) * args.margin, (y2 - y1) * args.margin
+                crop = image.crop(
+                    (
+                        max(0, int(x1 - margin_x)),
+                        max(0, int(y1 - margin_y)),
+                        min(image.width, int(x2 + margin_x) + 1),
+                        min(image.height, int(y2 + margin_y) + 1),
+                    )
+                )
+                target = output / split / label / f"{image_path.stem}_{index}.jpg"
+                target.parent.mkdir(parents=True, exist_ok=True)
+                crop.save(target, quality=92)
+                counts[(split, label)] = counts.get((split, label), 0) + 1
+        print(f"{min(start + args.batch, len(pairs))}/{len(pairs)} images", end="\r")
+
+    print()
+    for (split, label), count in sorted(counts.items()):
+        print(f"{split:<6} {label:<8} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,26 @@
+import argparse
 import json
 import os
 import random
-import shutil
+import sys
+import time
 from pathlib import Path
 
-def load_annotations(ann_dir: Path):
-    annotations = []
-    class_titles = set()
-    for ann_path in sorted(ann_dir.glob("*.json")):
-        with ann_path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        objects = data.get("objects", [])
-        size = data.get("size", {})
-        width = size.get("width")
-        height = size.get("height")
-        annotations.append((ann_path, objects, width, height))
-        for obj in objects:
-            title = obj.get("classTitle")
-            if title:
-                class_titles.add(title)
-    return annotations, sorted(class_titles)
+from dataset_utils import (
+    find_image,
+    input_fingerprint,
+    link_or_copy,
+    load_manifest,
+    remove_outputs,
+    save_manifest,
+    worker_map,
+)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from shards import DEFAULT_SHARD_BYTES, pack_directory  # noqa: E402
+
+MANIFEST_NAME = ".prepare_yolo_manifest.json"
 
 
 def polygon_to_bbox(points):
@@ -36,12 +37,60 @@ def yolo_bbox(xmin, ymin, xmax, ymax, width, height):
     return x_center, y_center, w, h
 
 
+def parse_annotation(task):
+    """Worker: fingerprint one annotation and, if it changed, extract its boxes.
+
+    Returns ``(name, fingerprint, titles, records)``; titles and records are None
+    when the fingerprint matches the manifest and the file can be skipped.
+    """
+    ann_path, image_path, known_fingerprint = task
+    data = ann_path.read_bytes()
+    fingerprint = input_fingerprint(data, image_path)
+    if fingerprint == known_fingerprint:
+        return ann_path.name, fingerprint, None, None
+
+    annotation = json.loads(data)
+    objects = annotation.get("objects", [])
+    size = annotation.get("size", {})
+    width = size.get("width")
+    height = size.get("height")
+    titles = sorted({obj.get("classTitle") for obj in objects if obj.get("classTitle")})
+    records = []
+    for obj in objects:
+        if obj.get("geometryType") != "polygon":
+            continue
+        points = obj.get("points", {}).get("exterior", [])
+        if not points:
+            continue
+        xmin, ymin, xmax, ymax = polygon_to_bbox(points)
+        title = obj.get("classTitle")
+        if title is None:
+            continue
+        records.append((title, *yolo_bbox(xmin, ymin, xmax, ymax, width, height)))
+    return ann_path.name, fingerprint, titles, records
+
+
+def write_item(task):
+    """Worker: write one label file and link its image into the split."""
+    records, class_to_id, image_path, label_path, dest_img = task
+    label_lines = [
+        f"{class_to_id[title]} {x_center:.6f} {y_center:.6f} {w:.6f} {h:.6f}"
+        for title, x_center, y_center, w, h in records
+    ]
+    label_path.write_text("\n".join(label_lines), encoding="utf-8")
+    link_or_copy(image_path, dest_img)
+    return label_path.name
+
+
 def prepare_dataset(
     data_root: Path,
     output_root: Path,
     split_ratio: float = 0.8,
     seed: int = 42,
+    workers: int | None = None,
+    force: bool = False,
 ):
+    started = time.perf_counter()
     ann_dir = data_root / "Car damages dataset" / "File1" / "ann"
     img_dir = data_root / "Car damages dataset" / "File1" / "img"
 
@@ -50,58 +99,86 @@ def prepare_dataset(
     if not img_dir.exists():
         raise FileNotFoundError(f"Image dir not found: {img_dir}")
 
-    annotations, class_titles = load_annotations(ann_dir)
-    class_to_id = {title: idx for idx, title in enumerate(class_titles)}
-
+    ann_paths = sorted(ann_dir.glob("*.json"))
     random.seed(seed)
-    random.shuffle(annotations)
-
-    split_index = int(len(annotations) * split_ratio)
-    train_items = annotations[:split_index]
-    val_items = annotations[split_index:]
-
-    for split_name, items in [("train", train_items), ("val", val_items)]:
+    random.shuffle(ann_paths)
+    split_index = int(len(ann_paths) * split_ratio)
+    splits = {
+        ann_path.name: "train" if index < split_index else "val"
+        for index, ann_path in enumerate(ann_paths)
+    }
+    for split_name in ("train", "val"):
         (output_root / "images" / split_name).mkdir(parents=True, exist_ok=True)
         (output_root / "labels" / split_name).mkdir(parents=True, exist_ok=True)
 
-        for ann_path, objects, width, height in items:
-            image_name = ann_path.stem
-            image_path = img_dir / image_name
-            if not image_path.exists():
-                for ext in [".jpg", ".png", ".jpeg"]:
-                    candidate = img_dir / f"{image_name}{ext}"
-                    if candidate.exists():
-                        image_path = candidate
-                        break
-            if not image_path.exists():
-                print(f"Skipping missing image for {ann_path.name}")
+    # Entries are only reusable when they were produced with the same split settings
+    # and still sit in the split this run assigns them to.
+    manifest_path = output_root / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    settings = {"split_ratio": split_ratio, "seed": seed}
+    reusable = not force and manifest.get("settings") == settings
+    previous = {}
+    for name, entry in manifest["files"].items():
+        if reusable and splits.get(name) == entry["split"]:
+            previous[name] = entry
+        else:
+            remove_outputs(output_root, entry["split"], entry["image"])
+
+    tasks = {}
+    for ann_path in ann_paths:
+        image_path = find_image(img_dir, ann_path.stem)
+        if image_path is None:
+            print(f"Skipping missing image for {ann_path.name}")
+            continue
+        entry = previous.get(ann_path.name)
+        label_path = output_root / "labels" / splits[ann_path.name] / f"{image_path.stem}.txt"
+        known = entry["fingerprint"] if entry and label_path.exists() else None
+        tasks[ann_path.name] = (ann_path, image_path, known)
+
+    with worker_map(workers) as imap:
+        parsed = {name: result for name, *result in imap(parse_annotation, tasks.values())}
+        titles = {
+            name: found_titles if found_titles is not None else previous[name]["titles"]
+            for name, (_, found_titles, _) in parsed.items()
+        }
+        class_titles = sorted({title for item_titles in titles.values() for title in item_titles})
+        if class_titles != manifest.get("classes"):
+            # Class ids shifted, so every label needs rewriting; re-parse the skipped ones.
+            skipped = [(*tasks[name][:2], None) for name, result in parsed.items() if result[2] is None]
+            parsed.update({name: result for name, *result in imap(parse_annotation, skipped)})
+        class_to_id = {title: idx for idx, title in enumerate(class_titles)}
+
+        write_tasks = []
+        for name, (_, _, records) in parsed.items():
+            if records is None:
                 continue
-
-            label_lines = []
-            for obj in objects:
-                if obj.get("geometryType") != "polygon":
-                    continue
-                points = obj.get("points", {}).get("exterior", [])
-                if not points:
-                    continue
-                xmin, ymin, xmax, ymax = polygon_to_bbox(points)
-                title = obj.get("classTitle")
-                if title is None:
-                    continue
-                class_id = class_to_id[title]
-                x_center, y_center, w, h = yolo_bbox(
-                    xmin, ymin, xmax, ymax, width, height
+            _, image_path, _ = tasks[name]
+            split_name = splits[name]
+            write_tasks.append(
+                (
+                    records,
+                    class_to_id,
+                    image_path,
+                    output_root / "labels" / split_name / f"{image_path.stem}.txt",
+                    output_root / "images" / split_name / image_path.name,
                 )
-                label_lines.append(
-                    f"{class_id} {x_center:.6f} {y_center:.6f} {w:.6f} {h:.6f}"
-                )
-
-            label_path = output_root / "labels" / split_name / f"{image_path.stem}.txt"
-            label_path.write_text("\n".join(label_lines), encoding="utf-8")
-
-            dest_img = output_root / "images" / split_name / image_path.name
-            if not dest_img.exists():
-                shutil.copy2(image_path, dest_img)
+            )
+        written = sum(1 for _ in imap(write_item, write_tasks))
+
+    manifest = {
+        "settings": settings,
+        "classes": class_titles,
+        "files": {
+            name: {
+                "fingerprint": fingerprint,
+                "split": splits[name],
+                "image": tasks[name][1].name,
+                "titles": titles[name],
+            }
+            for name, (fingerprint, _, _) in parsed.items()
+        },
+    }
+    save_manifest(manifest_path, manifest)
 
     data_yaml = output_root / "data.yaml"
     yaml_lines = [
@@ -114,14 +191,59 @@ def prepare_dataset(
     yaml_lines.extend([f"  - {name}" for name in class_titles])
     data_yaml.write_text("\n".join(yaml_lines), encoding="utf-8")
 
+    elapsed = time.perf_counter() - started
     print(f"Wrote dataset to {output_root}")
     print(f"Classes ({len(class_titles)}): {class_titles}")
+    print(
+        f"Processed {len(ann_paths)} annotations ({written} written, "
+        f"{len(parsed) - written} unchanged) in {elapsed:.2f}s "
+        f"({len(ann_paths) / max(elapsed, 1e-9):.0f} files/sec)"
+    )
+    return {"files": len(ann_paths), "written": written, "seconds": elapsed}
 
 
 def main():
-    data_root = Path("/Users/kanavkahol/work/car_parts/data")
-    output_root = Path("/Users/kanavkahol/work/car_parts/yolo_dataset")
-    prepare_dataset(data_root, output_root)
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--data-root",
+        default="/Users/kanavkahol/work/car_parts/data",
+        help="Root directory containing the dataset.",
+    )
+    parser.add_argument(
+        "--output-root",
+        default="/Users/kanavkahol/work/car_parts/yolo_dataset",
+        help="Output directory for the YOLO detection dataset.",
+    )
+    parser.add_argument("--split", type=float, default=0.8, help="Train split ratio.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="Worker processes (1 runs inline)."
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Ignore the manifest and rebuild every label."
+    )
+    parser.add_argument(
+        "--shards",
+        action="store_true",
+        help="Also pack the dataset into memory-mappable shards under OUTPUT_ROOT/shards.",
+    )
+    parser.add_argument(
+        "--shard-bytes", type=int, default=DEFAULT_SHARD_BYTES, help="Maximum size of one shard."
+    )
+    args = parser.parse_args()
+
+    prepare_dataset(
+        Path(args.data_root),
+        Path(args.output_root),
+        split_ratio=args.split,
+        seed=args.seed,
+        workers=args.workers,
+        force=args.force,
+    )
+    if args.shards:
+        output_root = Path(args.output_root)
+        paths = pack_directory(output_root, output_root / "shards" / "dataset", max_bytes=args.shard_bytes)
+        print(f"Packed into {len(paths)} shard(s) under {output_root / 'shards'}")
 
 
 if __name__ == "__main__":
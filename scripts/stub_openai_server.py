@@ -0,0 +1,215 @@
+"""Local stand-in for the Azure OpenAI chat completions API.
+
+Point the backend at it with ``AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8090`` and any
+``AZURE_OPENAI_KEY``/``AZURE_OPENAI_DEPLOYMENT`` to exercise /damage-analysis and
+/chat without a real deployment. Latency and injected errors are configurable so
+retry, timeout and concurrency behaviour can be checked.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import random
+import time
+from io import BytesIO
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from PIL import Image
+
+STUB_REPORT = {
+    "summary": "Stub report: moderate impact damage to the front bumper and hood.",
+    "overall_severity": "medium",
+    "recommended_actions": "Inspect the bumper mounts and refinish the hood.",
+    "items": [
+        {
+            "part": "Front-bumper",
+            "damage_type": "dent",
+            "severity": "moderate",
+            "evidence": "Visible deformation on the lower left bumper.",
+            "repair_recommendation": "repair",
+            "estimated_repair_cost_usd": "300-700",
+            "description": "A dent across the lower left bumper cover.",
+        },
+        {
+            "part": "Hood",
+            "damage_type": "scratch",
+            "severity": "minor",
+            "evidence": "Light linear marks near the leading edge.",
+            "repair_recommendation": "refinish",
+            "estimated_repair_cost_usd": "150-400",
+            "description": "Surface scratches on the front edge of the hood.",
+        },
+    ],
+}
+
+
+def _image_tokens(image_url: dict) -> int:
+    """Vision token cost as billed by the real API: 85 base plus 170 per 512px tile."""
+    if image_url.get("detail") == "low":
+        return 85
+    try:
+        encoded = image_url["url"].split(",", 1)[1]
+        width, height = Image.open(BytesIO(base64.b64decode(encoded))).size
+    except Exception:
+        return 85
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def _estimate_tokens(messages) -> int:
+    tokens = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            tokens += len(content) // 4
+            continue
+        for part in content or []:
+            if part.get("type") == "image_url":
+                tokens += _image_tokens(part.get("image_url") or {})
+            else:
+                tokens += len(part.get("text", "")) // 4
+    return max(1, tokens)
+
+
+async def _stream_chunks(deployment: str, content: str, token_delay: float, usage: dict | None = None):
+    created = int(time.time())
+
+    def chunk(delta: dict, finish_reason=None):
+        payload = {
+            "id": "chatcmpl-stub-stream",
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": deployment,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    yield chunk({"role": "assistant", "content": ""})
+    # Roughly one token per four characters, like the real API.
+    for start in range(0, len(content), 4):
+        await asyncio.sleep(token_delay)
+        yield chunk({"content": content[start : start + 4]})
+    yield chunk({}, finish_reason="stop")
+    if usage is not None:
+        # stream_options.include_usage: one last chunk with usage and no choices.
+        payload = {
+            "id": "chatcmpl-stub-stream",
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": deployment,
+            "choices": [],
+            "usage": usage,
+        }
+        yield f"data: {json.dumps(payload)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+def create_app(
+    latency_ms: float = 200.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    error_status: int = 429,
+    retry_after: float | None = 1.0,
+    token_delay_ms: float = 20.0,
+) -> FastAPI:
+    app = FastAPI(title="Azure OpenAI stub")
+    app.state.requests = 0
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def chat_completions(deployment: str, request: Request):
+        app.state.requests += 1
+        body = await request.json()
+        delay = max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000.0
+        await asyncio.sleep(delay)
+
+        if random.random() < error_rate:
+            headers = {}
+            if retry_after is not None:
+                headers["retry-after"] = str(retry_after)
+            return JSONResponse(
+                status_code=error_status,
+                content={"error": {"code": str(error_status), "message": "Injected stub error."}},
+                headers=headers,
+            )
+
+        messages = body.get("messages", [])
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            content = json.dumps(STUB_REPORT)
+        else:
+            last = messages[-1]["content"] if messages else ""
+            content = f"Stub reply to: {last}"
+            if body.get("max_tokens"):
+                # Cut off at max_tokens like the real API (about four characters per token).
+                content = content[: body["max_tokens"] * 4]
+        prompt_tokens = _estimate_tokens(messages)
+        completion_tokens = max(1, len(content) // 4)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+            return StreamingResponse(
+                _stream_chunks(
+                    deployment, content, token_delay_ms / 1000.0, usage if include_usage else None
+                ),
+                media_type="text/event-stream",
+            )
+        return {
+            "id": f"chatcmpl-stub-{app.state.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": deployment,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": usage,
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Base response latency.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- latency jitter.")
+    parser.add_argument(
+        "--token-delay-ms", type=float, default=20.0, help="Delay between streamed tokens."
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail.")
+    parser.add_argument("--error-status", type=int, default=429, help="Status code for failures.")
+    parser.add_argument(
+        "--retry-after",
+        type=float,
+        default=1.0,
+        help="Retry-After seconds sent with failures; negative to omit.",
+    )
+    args = parser.parse_args()
+
+    app = create_app(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after if args.retry_after >= 0 else None,
+        token_delay_ms=args.token_delay_ms,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
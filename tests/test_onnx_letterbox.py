@@ -0,0 +1,112 @@
+"""OnnxDetector's hand-written pre/postprocessing against the ultralytics reference.
+
+Runs on synthetic arrays, so no weights, export or onnxruntime session is needed.
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from inference_backends import OnnxDetector
+
+augment = pytest.importorskip("ultralytics.data.augment")
+ops = pytest.importorskip("ultralytics.utils.ops")
+
+# (width, height): landscape, portrait, odd sizes, a phone photo and an upscale.
+SIZES = [(640, 480), (480, 640), (333, 517), (1001, 250), (4032, 3024), (100, 50)]
+
+
+def make_detector(imgsz: int = 640, stride: int = 32) -> OnnxDetector:
+    # Only the letterbox/postprocess helpers are exercised; they need no session.
+    detector = OnnxDetector.__new__(OnnxDetector)
+    detector.imgsz = imgsz
+    detector.stride = stride
+    return detector
+
+
+def random_image(width: int, height: int) -> Image.Image:
+    rng = np.random.default_rng(width * 10007 + height)
+    return Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_target_shape_matches_ultralytics_minimal_padding(size):
+    detector = make_detector()
+    image = random_image(*size)
+    reference = augment.LetterBox((640, 640), auto=True, stride=32)(image=np.asarray(image))
+    assert detector._target_shape([image]) == reference.shape[:2]
+
+
+def test_mixed_batch_uses_the_square_input():
+    detector = make_detector()
+    assert detector._target_shape([random_image(640, 480), random_image(480, 640)]) == (640, 640)
+
+
+@pytest.mark.parametrize("auto", [True, False])
+@pytest.mark.parametrize("size", SIZES)
+def test_letterbox_matches_ultralytics(size, auto):
+    detector = make_detector()
+    image = random_image(*size)
+    array = np.asarray(image)
+    target = detector._target_shape([image]) if auto else (640, 640)
+    canvas, ratio, (left, top), shape = detector._letterbox(image, target)
+
+    reference = augment.LetterBox((640, 640), auto=auto, stride=32)(image=array)
+    np.testing.assert_array_equal(canvas, reference)
+    assert shape == array.shape[:2]
+    scale = min(640 / size[1], 640 / size[0])
+    assert ratio == (round(size[0] * scale) / size[0], round(size[1] * scale) / size[1])
+    # The image sits at the pad offset; the first padded row/column is grey.
+    assert (canvas[:top] == 114).all() and (canvas[:, :left] == 114).all()
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_postprocess_maps_boxes_back_like_ultralytics(size):
+    detector = make_detector()
+    width, height = size
+    image = random_image(width, height)
+    target = detector._target_shape([image])
+    _, ratio, pad, shape = detector._letterbox(image, target)
+
+    boxes = np.array(
+        [
+            [0.1 * width, 0.2 * height, 0.4 * width, 0.7 * height],
+            [0.5 * width, 0.1 * height, 0.9 * width, 0.3 * height],
+            # Runs past the bottom-right corner, so it must be clipped.
+            [0.8 * width, 0.8 * height, 1.2 * width, 1.3 * height],
+        ],
+        dtype=np.float32,
+    )
+    scores = np.array([0.9, 0.8, 0.7], dtype=np.float32)
+    classes = np.array([1, 2, 0])
+    # Model output: (4 + classes, anchors) of letterboxed center/size boxes, plus
+    # one anchor under the confidence threshold.
+    scale = np.array([*ratio, *ratio], dtype=np.float32)
+    letterboxed = boxes * scale + np.array([*pad, *pad], dtype=np.float32)
+    centers = (letterboxed[:, :2] + letterboxed[:, 2:]) / 2
+    xywh = np.concatenate([centers, letterboxed[:, 2:] - letterboxed[:, :2]], axis=1)
+    class_scores = np.zeros((4, 3), dtype=np.float32)
+    class_scores[np.arange(3), classes] = scores
+    class_scores[3, 0] = 0.1
+    output = np.concatenate([np.vstack([xywh, xywh[:1]]), class_scores], axis=1).T
+
+    detections = detector._postprocess(output, ratio, pad, shape, conf=0.25, iou=0.7, max_det=300)
+
+    assert len(detections) == 3
+    np.testing.assert_allclose(detections[:, 4], scores, rtol=1e-6)
+    np.testing.assert_array_equal(detections[:, 5], classes)
+    expected = ops.scale_boxes(target, letterboxed.copy(), (height, width))
+    np.testing.assert_allclose(detections[:, :4], expected, atol=1e-3)
+    clipped = boxes.copy()
+    clipped[:, [0, 2]] = clipped[:, [0, 2]].clip(0, width)
+    clipped[:, [1, 3]] = clipped[:, [1, 3]].clip(0, height)
+    np.testing.assert_allclose(detections[:, :4], clipped, atol=1e-2)
+
+
+def test_postprocess_without_detections_is_empty():
+    detector = make_detector()
+    output = np.zeros((4 + 3, 10), dtype=np.float32)
+    detections = detector._postprocess(
+        output, (1.0, 1.0), (0, 0), (640, 640), conf=0.25, iou=0.7, max_det=300
+    )
+    assert detections.shape == (0, 6)